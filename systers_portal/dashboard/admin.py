@@ -1,12 +1,112 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList, SEARCH_VAR
+from django.core.paginator import InvalidPage
 from dashboard.models import (
     SysterUser, Community, News, Resource, Tag, ResourceType,
     CommunityPage)
+from dashboard.paginator import EstimatedCountPaginator
 
-admin.site.register(SysterUser)
-admin.site.register(Community)
-admin.site.register(News)
-admin.site.register(Resource)
+
+class LargeTableChangeList(ChangeList):
+
+    """ChangeList that defers the columns listed in the model admin
+    deferred_fields and counts the unfiltered rows with the model admin
+    paginator instead of COUNT(*)
+    """
+    def get_queryset(self, request):
+        queryset = super(LargeTableChangeList, self).get_queryset(request)
+        return queryset.defer(*self.model_admin.deferred_fields)
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(request, self.queryset,
+                                                   self.list_per_page)
+        result_count = paginator.count
+        if self.get_filters_params() or self.params.get(SEARCH_VAR):
+            full_result_count = self.model_admin.get_paginator(
+                request, self.root_queryset, self.list_per_page).count
+        else:
+            full_result_count = result_count
+        can_show_all = result_count <= self.list_max_show_all
+        multi_page = result_count > self.list_per_page
+        if (self.show_all and can_show_all) or not multi_page:
+            result_list = self.queryset._clone()
+        else:
+            try:
+                result_list = paginator.page(self.page_num + 1).object_list
+            except InvalidPage:
+                raise IncorrectLookupParameters
+
+        self.result_count = result_count
+        self.full_result_count = full_result_count
+        self.result_list = result_list
+        self.can_show_all = can_show_all
+        self.multi_page = multi_page
+        self.paginator = paginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+
+    """ModelAdmin for tables with many rows, using raw id widgets for
+    relations, deferred columns and estimated counts on the changelist
+    """
+    deferred_fields = ()
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
+
+
+class SysterUserAdmin(LargeTableAdmin):
+    list_display = ('__unicode__', 'country_name')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('user__username', 'user__first_name', 'user__last_name',
+                     'user__email')
+
+    def country_name(self, obj):
+        # Displaying the field itself sorts the translated choices of all the
+        # countries on every row
+        return obj.country.name
+    country_name.short_description = 'country'
+    country_name.admin_order_field = 'country'
+
+
+class CommunityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'members_count', 'news_count',
+                    'resources_count')
+    raw_id_fields = ('members', 'community_admin', 'parent_community')
+    search_fields = ('name', 'slug')
+
+
+class NewsAdmin(LargeTableAdmin):
+    list_display = ('title', 'community', 'is_public', 'date_created')
+    list_filter = ('is_public',)
+    list_select_related = ('community',)
+    raw_id_fields = ('community', 'author', 'tags')
+    search_fields = ('title', '=slug')
+    deferred_fields = ('content',)
+
+
+class ResourceAdmin(LargeTableAdmin):
+    list_display = ('title', 'community', 'resource_type', 'is_public',
+                    'date_created')
+    list_filter = ('is_public', 'resource_type')
+    list_select_related = ('community', 'resource_type')
+    raw_id_fields = ('community', 'author', 'tags')
+    search_fields = ('title', '=slug')
+    deferred_fields = ('content',)
+
+
+class CommunityPageAdmin(admin.ModelAdmin):
+    list_select_related = ('community', 'page')
+    raw_id_fields = ('page', 'community')
+
+
+admin.site.register(SysterUser, SysterUserAdmin)
+admin.site.register(Community, CommunityAdmin)
+admin.site.register(News, NewsAdmin)
+admin.site.register(Resource, ResourceAdmin)
 admin.site.register(Tag)
 admin.site.register(ResourceType)
-admin.site.register(CommunityPage)
+admin.site.register(CommunityPage, CommunityPageAdmin)
@@ -0,0 +1,191 @@
+import copy
+import itertools
+import time
+from collections import namedtuple
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import resolve, reverse
+from django.db import connection
+from django.http import HttpResponse
+from django.test.client import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.decorators import (membership_required, admin_required,
+                                  authorship_required)
+from dashboard.models import (SysterUser, Community, News, Resource,
+                              CommunityPage)
+from dashboard.permissions import invalidate_community, invalidate_model
+from dashboard.search import search
+
+
+BenchmarkResult = namedtuple("BenchmarkResult",
+                             ["name", "repeat", "mean", "minimum", "queries"])
+
+
+class BenchmarkData(object):
+
+    """Objects of the dataset the benchmarks run on: the community with the
+    most members, one of its members, its admin, one of its News, the root of
+    its community tree and a published community page.
+    """
+    def __init__(self):
+        communities = Community.objects.order_by("-members_count", "id")
+        try:
+            self.community = communities.filter(news_count__gt=0)[0]
+        except IndexError:
+            raise ValueError("There are no communities with News, seed a "
+                             "dataset with the seed_dataset command first")
+        self.member = self.community.members.exclude(
+            pk=self.community.community_admin_id)[0].user
+        self.admin = self.community.community_admin.user
+        self.news = News.objects.filter(community=self.community)[0]
+        self.author = self.news.author.user
+        self.root = self.community.get_root()
+        self.superuser = User(username="benchmark", is_staff=True,
+                              is_active=True, is_superuser=True)
+        page = CommunityPage.objects.filter(
+            page__publisher_public__isnull=False).select_related(
+            "page__publisher_public")[:1]
+        self.page_url = (page[0].page.publisher_public.get_absolute_url()
+                         if page else None)
+
+
+def _view(request, **kwargs):
+    return HttpResponse()
+
+
+def _guarded_view(decorator, data, user, kwargs, cold=False):
+    view = decorator(_view)
+    factory = RequestFactory()
+
+    def run():
+        if cold:
+            invalidate_model(type(data.community))
+            invalidate_model(type(data.news))
+            invalidate_community(data.community.pk)
+        request = factory.get("/")
+        # a fresh copy, so the memoized community ids aren't reused
+        request.user = copy.copy(user)
+        view(request, **kwargs)
+    return run
+
+
+def membership_required_benchmark(data):
+    return _guarded_view(
+        membership_required(Community, "slug", "community_slug"), data,
+        data.member, {"community_slug": data.community.slug})
+
+
+def membership_required_cold_benchmark(data):
+    return _guarded_view(
+        membership_required(Community, "slug", "community_slug"), data,
+        data.member, {"community_slug": data.community.slug}, cold=True)
+
+
+def admin_required_benchmark(data):
+    return _guarded_view(
+        admin_required(News, "slug", "news_slug"), data, data.admin,
+        {"news_slug": data.news.slug})
+
+
+def authorship_required_benchmark(data):
+    return _guarded_view(
+        authorship_required(News, "slug", "news_slug", obj_varname="news"),
+        data, data.author, {"news_slug": data.news.slug})
+
+
+def subtree_members_benchmark(data):
+    return lambda: data.root.get_subtree_members().count()
+
+
+def search_benchmark(data):
+    return lambda: search(data.community, "lorem ipsum", public_only=False)
+
+
+def changelist_benchmark(model):
+    def benchmark(data):
+        url = reverse("admin:dashboard_{0}_changelist".format(
+            model._meta.model_name))
+        view = resolve(url).func
+        factory = RequestFactory()
+
+        def run():
+            request = factory.get(url)
+            request.user = data.superuser
+            response = view(request)
+            response.render()
+            assert response.status_code == 200, response.status_code
+        return run
+    return benchmark
+
+
+def cms_page_benchmark(cached):
+    def benchmark(data):
+        if data.page_url is None:
+            return None
+        client = Client()
+        counter = itertools.count()
+
+        def run():
+            url = data.page_url
+            if not cached:
+                # a new query string misses the page cache every time
+                url += "?benchmark={0}".format(next(counter))
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+        return run
+    return benchmark
+
+
+BENCHMARKS = (
+    ("membership_required", membership_required_benchmark),
+    ("membership_required, cold cache", membership_required_cold_benchmark),
+    ("admin_required", admin_required_benchmark),
+    ("authorship_required with obj_varname", authorship_required_benchmark),
+    ("community subtree members", subtree_members_benchmark),
+    ("search", search_benchmark),
+    ("admin changelist systeruser", changelist_benchmark(SysterUser)),
+    ("admin changelist community", changelist_benchmark(Community)),
+    ("admin changelist news", changelist_benchmark(News)),
+    ("admin changelist resource", changelist_benchmark(Resource)),
+    ("cms page, rendered", cms_page_benchmark(cached=False)),
+    ("cms page, page cache", cms_page_benchmark(cached=True)),
+)
+
+
+def measure(name, func, repeat):
+    """Call a function once to warm up the caches, then repeat times while
+    measuring the time and the queries.
+
+    :returns: BenchmarkResult with the mean and the minimum milliseconds and
+              the mean number of queries per call
+    """
+    func()
+    timings = []
+    with CaptureQueriesContext(connection) as context:
+        for i in range(repeat):
+            start = time.time()
+            func()
+            timings.append((time.time() - start) * 1000)
+    return BenchmarkResult(name, repeat, sum(timings) / repeat, min(timings),
+                           float(len(context)) / repeat)
+
+
+def run_benchmarks(names=None, repeat=20):
+    """Run the benchmarks on the data in the database.
+
+    :param names: optional iterable of benchmark names to run, all are run if
+                  None
+    :param repeat: number of measured calls per benchmark
+    :returns: list of BenchmarkResult, in the order of BENCHMARKS
+    :raises ValueError: if the database has no data to run the benchmarks on
+    """
+    data = BenchmarkData()
+    results = []
+    for name, benchmark in BENCHMARKS:
+        if names and name not in names:
+            continue
+        func = benchmark(data)
+        if func is not None:
+            results.append(measure(name, func, repeat))
+    return results
@@ -0,0 +1,52 @@
+"""Versioned cache keys shared by the dashboard caches.
+
+Cached values that can't be deleted one by one, e.g. the roles of all the
+users of a community, are stored under keys that include a version, which is
+itself stored in the cache without a timeout. Replacing the version
+invalidates all of them at once and the stale values expire on their own.
+
+The versions are only seen by the processes sharing the cache, so with a
+per-process cache like locmem a version replaced in one process would leave
+the other processes serving stale values. Unless DASHBOARD_SHARED_CACHE is
+set, versioned_cache is therefore a dummy cache that never stores anything.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, get_cache
+
+
+if getattr(settings, "DASHBOARD_SHARED_CACHE", False):
+    versioned_cache = cache
+else:
+    versioned_cache = get_cache("django.core.cache.backends.dummy.DummyCache")
+
+
+def new_version():
+    """Return a new unique version string"""
+    return uuid.uuid4().hex
+
+
+def get_version(version_key):
+    """Return the current version stored under version_key, creating one if
+    the key is missing or was evicted from the cache.
+
+    :param version_key: string cache key of the version
+    :returns: string version
+    """
+    version = versioned_cache.get(version_key)
+    if version is None:
+        version = new_version()
+        if not versioned_cache.add(version_key, version, None):
+            version = versioned_cache.get(version_key, version)
+    return version
+
+
+def bump_versions(*version_keys):
+    """Replace the versions stored under the keys, invalidating the values
+    cached under them.
+
+    :param version_keys: string cache keys of the versions
+    """
+    versioned_cache.set_many(dict((version_key, new_version())
+                                  for version_key in version_keys), None)
@@ -0,0 +1,222 @@
+import random
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+
+from dashboard.models import (SysterUser, Community, News, Resource, Tag,
+                              ResourceType, CommunityPage,
+                              update_community_counters)
+from dashboard.permissions import invalidate_model
+
+
+BATCH_SIZE = 500
+
+CONTENT = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+           "eiusmod tempor incididunt ut labore et dolore magna aliqua. ")
+
+
+def community_tree(count, roots, children):
+    """Lay out count communities as roots trees in which every community has
+    at most children child communities, numbering them breadth first.
+
+    :param count: number of communities
+    :param roots: number of root communities
+    :param children: maximum number of children per community
+    :returns: list of (parent index or None, tree index, lft, rght, level)
+              tuples, one per community
+
+    >>> community_tree(4, 1, 2)
+    [(None, 0, 1, 8, 0), (0, 0, 2, 5, 1), (0, 0, 6, 7, 1), (1, 0, 3, 4, 2)]
+    """
+    parents = [None if i < roots else (i - roots) // children
+               for i in range(count)]
+    child_indexes = [[] for i in range(count)]
+    for index, parent in enumerate(parents):
+        if parent is not None:
+            child_indexes[parent].append(index)
+    nodes = [None] * count
+    for tree in range(min(roots, count)):
+        counter = 0
+        # iterative depth first traversal numbering lft and rght like MPTT
+        stack = [(tree, 0, False)]
+        lefts = {}
+        while stack:
+            index, level, visited = stack.pop()
+            counter += 1
+            if visited:
+                nodes[index] = (parents[index], tree, lefts[index], counter,
+                                level)
+                continue
+            lefts[index] = counter
+            stack.append((index, level, True))
+            for child in reversed(child_indexes[index]):
+                stack.append((child, level + 1, False))
+    return nodes
+
+
+def _bulk_create(model, objs):
+    model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+
+
+def seed_dataset(prefix="seed", users=1000, communities=50, roots=5,
+                 children=3, members=100, news=20, resources=20, tags=50,
+                 resource_types=5, pages=True, seed=0):
+    """Fill the database with a synthetic dataset using bulk inserts.
+
+    The objects are named after the prefix, so a dataset can be seeded next to
+    existing data. The signals of the models are not sent, the denormalized
+    community counters are recounted at the end instead.
+
+    :param prefix: string prefix of the names and slugs of the objects
+    :param users: number of Users with a SysterUser
+    :param communities: number of communities
+    :param roots: number of root communities, the other communities are nested
+                  under them by parent_community
+    :param children: maximum number of child communities per community
+    :param members: number of members per community
+    :param news: number of News per community
+    :param resources: number of Resources per community
+    :param tags: number of Tags, every News and Resource gets up to 3
+    :param resource_types: number of ResourceTypes
+    :param pages: if True a published CMS page with a CommunityPage is
+                  created for every root community
+    :param seed: seed of the random generator, so datasets are repeatable
+    :returns: dictionary mapping model names to the number of created objects
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+    with transaction.atomic():
+        _bulk_create(User, [
+            User(username="{0}-user{1}".format(prefix, i),
+                 email="{0}-user{1}@example.com".format(prefix, i),
+                 password=password)
+            for i in range(users)])
+        user_ids = User.objects.filter(
+            username__startswith="{0}-user".format(prefix)).values_list(
+            "id", flat=True)
+        SysterUser.objects.provision(user_ids, BATCH_SIZE)
+        systeruser_ids = list(SysterUser.objects.filter(
+            user__in=user_ids).order_by("id").values_list("id", flat=True))
+
+        _bulk_create(Tag, [Tag(name="{0}-tag{1}".format(prefix, i))
+                           for i in range(tags)])
+        tag_ids = list(Tag.objects.filter(
+            name__startswith="{0}-tag".format(prefix)).order_by(
+            "id").values_list("id", flat=True))
+        _bulk_create(ResourceType, [
+            ResourceType(name="{0}-type{1}".format(prefix, i))
+            for i in range(resource_types)])
+        resource_type_ids = list(ResourceType.objects.filter(
+            name__startswith="{0}-type".format(prefix)).order_by(
+            "id").values_list("id", flat=True))
+
+        # The MPTT fields are computed here, communities are inserted level by
+        # level so the ids of the parents are known
+        tree_id_offset = (Community.objects.aggregate(
+            Max("tree_id"))["tree_id__max"] or 0) + 1
+        nodes = community_tree(communities, roots, children)
+        community_ids = [None] * communities
+        for level in range(max([node[4] for node in nodes] or [-1]) + 1):
+            indexes = [i for i, node in enumerate(nodes) if node[4] == level]
+            slugs = {}
+            objs = []
+            for i in indexes:
+                parent, tree, lft, rght, node_level = nodes[i]
+                slug = "{0}-community{1}".format(prefix, i)
+                slugs[slug] = i
+                objs.append(Community(
+                    name="{0} community {1}".format(prefix, i), slug=slug,
+                    community_admin_id=rng.choice(systeruser_ids),
+                    parent_community_id=(None if parent is None
+                                         else community_ids[parent]),
+                    tree_id=tree_id_offset + tree, lft=lft, rght=rght,
+                    level=node_level))
+            _bulk_create(Community, objs)
+            for pk, slug in Community.objects.filter(
+                    slug__startswith="{0}-community".format(prefix),
+                    level=level).values_list("id", "slug"):
+                community_ids[slugs[slug]] = pk
+
+        membership = Community.members.through
+        member_ids = {}
+        objs = []
+        for community_id in community_ids:
+            member_ids[community_id] = rng.sample(
+                systeruser_ids, min(members, len(systeruser_ids)))
+            objs.extend(membership(community_id=community_id,
+                                   systeruser_id=systeruser_id)
+                        for systeruser_id in member_ids[community_id])
+        _bulk_create(membership, objs)
+
+        counts = {}
+        for model, count in ((News, news), (Resource, resources)):
+            name = model._meta.model_name
+            objs = []
+            for c, community_id in enumerate(community_ids):
+                for i in range(count):
+                    obj = model(
+                        title="{0} {1} {2} of community {3}".format(
+                            prefix, name, i, c),
+                        slug="{0}-{1}{2}-{3}".format(prefix, name, c, i),
+                        community_id=community_id,
+                        author_id=rng.choice(member_ids[community_id] or
+                                             systeruser_ids),
+                        is_public=rng.random() < 0.8,
+                        content=CONTENT * rng.randint(1, 20))
+                    if model == Resource and resource_type_ids:
+                        obj.resource_type_id = rng.choice(resource_type_ids)
+                    objs.append(obj)
+            _bulk_create(model, objs)
+            counts[name] = len(objs)
+            through = model.tags.through
+            if tag_ids:
+                object_ids = model.objects.filter(
+                    slug__startswith="{0}-{1}".format(prefix, name)
+                ).order_by("id").values_list("id", flat=True)
+                field = "{0}_id".format(name)
+                objs = []
+                for object_id in object_ids:
+                    object_tag_ids = rng.sample(
+                        tag_ids, rng.randint(0, min(3, len(tag_ids))))
+                    objs.extend(through(tag_id=tag_id, **{field: object_id})
+                                for tag_id in object_tag_ids)
+                _bulk_create(through, objs)
+        update_community_counters(community_ids)
+
+    counts.update({"user": len(systeruser_ids), "community": communities,
+                   "tag": len(tag_ids),
+                   "resourcetype": len(resource_type_ids)})
+    if pages:
+        counts["communitypage"] = create_community_pages(
+            Community.objects.filter(
+                slug__startswith="{0}-community".format(prefix), level=0))
+    for model in (SysterUser, Community, News, Resource):
+        invalidate_model(model)
+    return counts
+
+
+def create_community_pages(communities):
+    """Create and publish a CMS page with some text for every community.
+
+    :param communities: iterable of Community objects
+    :returns: number of created pages
+    """
+    from cms.api import add_plugin, create_page
+
+    template = settings.CMS_TEMPLATES[0][0]
+    language = settings.LANGUAGE_CODE
+    count = 0
+    for community in communities:
+        page = create_page(community.name, template, language,
+                           slug=community.slug)
+        placeholder = page.placeholders.get(slot="page_content")
+        add_plugin(placeholder, "TextPlugin", language,
+                   body="<p>{0}</p>".format(CONTENT * 10))
+        page.publish(language)
+        CommunityPage.objects.create(title=community.name, page=page,
+                                     community=community)
+        count += 1
+    return count
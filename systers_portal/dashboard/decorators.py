@@ -3,7 +3,62 @@ from django.shortcuts import get_object_or_404
 from django.utils.decorators import available_attrs
 from django.utils.functional import wraps
 
-from dashboard.models import Community
+from dashboard.models import Community, SysterUser
+from dashboard.permissions import (ROLE_MEMBER, ROLE_ADMIN, get_object_field,
+                                   has_community_role, has_object_role)
+
+
+def is_community_member(request, community_id):
+    """Return True if the current user is a member of the community. The
+    answer is memoized on the request user, so several guarded views or
+    template checks during the same request query it only once.
+
+    :param request: HttpRequest object
+    :param community_id: Community id
+    :returns: boolean
+    """
+    return has_community_role(request.user, community_id, ROLE_MEMBER)
+
+
+def _permission_required(has_permission, model, lookup_vars, obj_varname):
+    """Build a view decorator that resolves the object from the view kwargs and
+    checks the permission of the requesting user on it.
+
+    Only the ids needed for the check are fetched, unless obj_varname is given.
+    In that case the object is fetched once, used for the check and passed to
+    the view under that keyword argument, so the view doesn't load it again.
+
+    :param has_permission: function taking the request, the model, the field
+                           lookup name, its value and the fetched object or
+                           None, returning a boolean
+    :param model: model class of the object
+    :param lookup_vars: string field lookup name and a string variable name
+                        passed to the view
+    :param obj_varname: string name of the keyword argument used to pass the
+                        object to the view or None
+    :returns: inner decorator function
+    """
+
+    def decorator(view_func):
+        @wraps(view_func, assigned=available_attrs(view_func))
+        def _wrapped_view(request, *args, **kwargs):
+            lookup, varname = lookup_vars
+            value = kwargs.get(varname, None)
+            if value is None:
+                raise ValueError("The lookup value can't be 'None'.")
+            if not request.user.is_authenticated():
+                raise PermissionDenied
+            obj = None
+            if obj_varname is not None:
+                obj = get_object_or_404(model, **{lookup: value})
+            if has_permission(request, model, lookup, value, obj):
+                if obj_varname is not None:
+                    kwargs[obj_varname] = obj
+                return view_func(request, *args, **kwargs)
+            else:
+                raise PermissionDenied
+        return _wrapped_view
+    return decorator
 
 
 def membership_required(model, *lookup_vars, **kwargs):
@@ -12,6 +67,10 @@ def membership_required(model, *lookup_vars, **kwargs):
     reference to that community, i.e. the model object belongs to that
     community.
 
+    Unless the answer is memoized for the request or cached, the community of
+    the object and the membership of the user are resolved with a single
+    query joining the object to the community members.
+
     >>> from dashboard.models import Resource
     >>> membership_required(Community, "id__exact", "id")
     <function decorator at 0x...>
@@ -22,29 +81,23 @@ def membership_required(model, *lookup_vars, **kwargs):
                   referencing Community model
     :param lookup_vars: string field lookup name and a string variable name
                         passed to the view
+    :param obj_varname: optional keyword argument name to pass the fetched
+                        object to the view
     :returns: inner decorator function
     :raises ValueError: if the value of the second element from request kwargs
                         is missing or None
+    :raises Http404: if no object matches the lookup
     """
 
-    def decorator(view_func):
-        @wraps(view_func, assigned=available_attrs(view_func))
-        def _wrapped_view(request, *args, **kwargs):
-            lookup, varname = lookup_vars
-            value = kwargs.get(varname, None)
-            if value is None:
-                raise ValueError("The lookup value can't be 'None'.")
-            obj = get_object_or_404(model, **{lookup: value})
-            systeruser = request.user.systeruser
-            user_communities = systeruser.member_of_community.filter(
-                members=systeruser)
-            obj_community = obj if model == Community else obj.community
-            if obj_community in user_communities:
-                return view_func(request, *args, **kwargs)
-            else:
-                raise PermissionDenied
-        return _wrapped_view
-    return decorator
+    def has_permission(request, model, lookup, value, obj):
+        if obj is None:
+            return has_object_role(request.user, model, lookup, value,
+                                   ROLE_MEMBER)
+        community_id = obj.pk if model == Community else obj.community_id
+        return is_community_member(request, community_id)
+
+    return _permission_required(has_permission, model, lookup_vars,
+                                kwargs.get("obj_varname"))
 
 
 def admin_required(model, *lookup_vars, **kwargs):
@@ -62,28 +115,23 @@ def admin_required(model, *lookup_vars, **kwargs):
                   referencing Community model
     :param lookup_vars: string field lookup name and a string variable name
                         passed to the view
+    :param obj_varname: optional keyword argument name to pass the fetched
+                        object to the view
     :returns: inner decorator function
     :raises ValueError: if the value of the second element from request kwargs
                         is missing or None
+    :raises Http404: if no object matches the lookup
     """
 
-    def decorator(view_func):
-        @wraps(view_func, assigned=available_attrs(view_func))
-        def _wrapped_view(request, *args, **kwargs):
-            lookup, varname = lookup_vars
-            value = kwargs.get(varname, None)
-            if value is None:
-                raise ValueError("The lookup value can't be 'None'.")
-            obj = get_object_or_404(model, **{lookup: value})
-            systeruser = request.user.systeruser
-            obj_community = obj if model == Community else obj.community
-            community_admin = obj_community.community_admin
-            if community_admin == systeruser:
-                return view_func(request, *args, **kwargs)
-            else:
-                raise PermissionDenied
-        return _wrapped_view
-    return decorator
+    def has_permission(request, model, lookup, value, obj):
+        if obj is None:
+            return has_object_role(request.user, model, lookup, value,
+                                   ROLE_ADMIN)
+        community_id = obj.pk if model == Community else obj.community_id
+        return has_community_role(request.user, community_id, ROLE_ADMIN)
+
+    return _permission_required(has_permission, model, lookup_vars,
+                                kwargs.get("obj_varname"))
 
 
 def authorship_required(model, *lookup_vars, **kwargs):
@@ -98,24 +146,22 @@ def authorship_required(model, *lookup_vars, **kwargs):
     :param model: model object with author field referencing SysterUser model
     :param lookup_vars: string field lookup name and a string variable name
                         passed to the view
+    :param obj_varname: optional keyword argument name to pass the fetched
+                        object to the view
     :returns: inner decorator function
     :raises ValueError: if the value of the second element from request kwargs
                         is missing or None
+    :raises Http404: if no object matches the lookup
     """
 
-    def decorator(view_func):
-        @wraps(view_func, assigned=available_attrs(view_func))
-        def _wrapped_view(request, *args, **kwargs):
-            lookup, varname = lookup_vars
-            value = kwargs.get(varname, None)
-            if value is None:
-                raise ValueError("The lookup value can't be 'None'.")
-            obj = get_object_or_404(model, **{lookup: value})
-            systeruser = request.user.systeruser
-            obj_author = obj.author
-            if obj_author == systeruser:
-                return view_func(request, *args, **kwargs)
-            else:
-                raise PermissionDenied
-        return _wrapped_view
-    return decorator
+    def has_permission(request, model, lookup, value, obj):
+        if obj is None:
+            author_user_id = get_object_field(model, lookup, value,
+                                              "author__user")
+        else:
+            author_user_id = get_object_field(SysterUser, "id", obj.author_id,
+                                              "user")
+        return author_user_id == request.user.pk
+
+    return _permission_required(has_permission, model, lookup_vars,
+                                kwargs.get("obj_varname"))
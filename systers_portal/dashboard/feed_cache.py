@@ -0,0 +1,135 @@
+import calendar
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.encoding import iri_to_uri
+from django.utils.http import (http_date, parse_etags, parse_http_date_safe,
+                               quote_etag)
+
+from dashboard.cache_versions import (bump_versions, get_version,
+                                      versioned_cache)
+
+
+FEED_CACHE_TIMEOUT = getattr(settings, "DASHBOARD_FEED_CACHE_TIMEOUT", 3600)
+
+_FEEDS_VERSION_KEY = "dashboard:feeds:version"
+
+
+def _community_feeds_version_key(community_id):
+    return "dashboard:feeds:community:{0}".format(community_id)
+
+
+def _feed_key(request, community_id):
+    path_hash = hashlib.md5(iri_to_uri(u"{0}{1}".format(
+        request.get_host(), request.get_full_path())).encode(
+        "utf-8")).hexdigest()
+    return "dashboard:feeds:feed:{0}:{1}:{2}:{3}".format(
+        community_id, get_version(_FEEDS_VERSION_KEY),
+        get_version(_community_feeds_version_key(community_id)), path_hash)
+
+
+def invalidate_feeds(community_id=None):
+    """Invalidate the cached feeds of a community.
+
+    :param community_id: Community id, the feeds of all communities are
+                         invalidated if None, e.g. when a Tag is renamed
+    """
+    if community_id is None:
+        key = _FEEDS_VERSION_KEY
+    else:
+        key = _community_feeds_version_key(community_id)
+    bump_versions(key)
+
+
+def is_not_modified(request, etag, last_modified):
+    """Return True if the client already has the current version of a
+    response. If-None-Match takes precedence over If-Modified-Since.
+
+    :param request: HttpRequest object
+    :param etag: string entity tag of the current response, not quoted
+    :param last_modified: integer timestamp of the current response
+    """
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        return "*" in etags or etag in etags
+    if_modified_since = parse_http_date_safe(
+        request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def content_validators(state, last_changed):
+    """Return the ETag and the Last-Modified time of a response derived from
+    its content instead of the time it was generated.
+
+    Dates only tell the day the content last changed, so Last-Modified is the
+    end of that day, or the current time while the day isn't over and the
+    content may still change.
+
+    >>> from datetime import date
+    >>> etag, last_modified = content_validators([1, 2], date(2014, 6, 1))
+    >>> last_modified
+    1401667200
+
+    :param state: list of values describing the content, e.g. the ids and
+                  dates of the items of a feed
+    :param last_changed: date the content last changed or None if unknown
+    :returns: tuple of a string entity tag and an integer timestamp
+    """
+    last_modified = int(time.time())
+    if last_changed is not None:
+        last_modified = min(last_modified, calendar.timegm(
+            (last_changed + timedelta(days=1)).timetuple()))
+    etag = hashlib.md5(repr((state, last_modified))).hexdigest()
+    return etag, last_modified
+
+
+def _validated_response(response, etag, last_modified):
+    response["ETag"] = quote_etag(etag)
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def cached_feed(feed):
+    """Wrap a Feed view of a community in a cache with conditional GET.
+
+    The ETag and Last-Modified time come from feed.get_state, the ids and
+    dates of the feed items, which is checked against the validators of the
+    request before the feed is built. With a shared cache the feed body is
+    stored with its validators under the current feed version of the
+    community, which changes when a News or Resource of the community or its
+    tags change, so a poll of an unchanged feed costs two cache lookups.
+
+    :param feed: Feed object, called with the request, the community_id and
+                 the other keyword arguments of the view, with a get_state
+                 method taking the community_id and the keyword arguments
+    :returns: view function taking the request, the community id and the
+              keyword arguments of the feed
+    """
+    def view(request, community_id, **kwargs):
+        key = _feed_key(request, community_id)
+        cached = versioned_cache.get(key)
+        if cached is None:
+            state, last_changed = feed.get_state(community_id, **kwargs)
+            if getattr(settings, "DASHBOARD_SHARED_CACHE", False):
+                # renames of the community or of tags and tag changes don't
+                # show in the state but replace the versions
+                state = (state, key)
+            etag, last_modified = content_validators(state, last_changed)
+            if is_not_modified(request, etag, last_modified):
+                return _validated_response(HttpResponseNotModified(), etag,
+                                           last_modified)
+            response = feed(request, community_id=community_id, **kwargs)
+            cached = (etag, last_modified, response.content,
+                      response["Content-Type"])
+            versioned_cache.set(key, cached, FEED_CACHE_TIMEOUT)
+        etag, last_modified, content, content_type = cached
+        if is_not_modified(request, etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=content_type)
+        return _validated_response(response, etag, last_modified)
+    return view
@@ -0,0 +1,138 @@
+from collections import namedtuple
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import require_GET
+
+from dashboard.feed_cache import cached_feed
+from dashboard.models import Community, CommunityPage, News, Resource
+from dashboard.permissions import get_object_community_id
+from dashboard.tags import filter_by_tags
+
+
+FEED_ITEMS = getattr(settings, "DASHBOARD_FEED_ITEMS", 20)
+
+FeedSubject = namedtuple("FeedSubject", ["community", "tag", "link"])
+
+
+class CommunityFeed(Feed):
+
+    """RSS feed of the latest public News and Resources of a community, or of
+    those with a tag.
+    """
+    def get_object(self, request, community_id, tag=None):
+        community = Community.objects.get(pk=community_id)
+        page = CommunityPage.objects.filter(
+            community=community_id,
+            page__publisher_public__isnull=False).select_related(
+            "page__publisher_public")[:1]
+        if page:
+            link = page[0].page.publisher_public.get_absolute_url()
+        else:
+            link = community.website or "/"
+        return FeedSubject(community, tag, link)
+
+    def title(self, obj):
+        if obj.tag:
+            return u"{0}: {1}".format(obj.community.name, obj.tag)
+        return obj.community.name
+
+    def link(self, obj):
+        return obj.link
+
+    def description(self, obj):
+        return u"News and Resources of the {0} community".format(
+            obj.community.name)
+
+    def get_queryset(self, model, community_id, tag=None):
+        queryset = model.objects.filter(
+            community=community_id, is_public=True).order_by(
+            "-date_created", "-id")
+        if tag:
+            queryset = filter_by_tags(queryset, [tag])
+        return queryset
+
+    def get_state(self, community_id, tag=None):
+        """Return the ids and dates of the items of the feed and the date
+        they last changed, with one query per model that doesn't fetch the
+        content, so conditional requests are answered without building the
+        feed.
+
+        :param community_id: Community id
+        :param tag: optional string tag name
+        :returns: tuple of a list of tuples and a date or None if the feed
+                  has no items
+        """
+        state = []
+        for model in (News, Resource):
+            state.extend(
+                (date_created, pk, model._meta.model_name, date_modified)
+                for date_created, pk, date_modified in self.get_queryset(
+                    model, community_id, tag).values_list(
+                    "date_created", "id", "date_modified")[:FEED_ITEMS])
+        state = sorted(state, reverse=True)[:FEED_ITEMS]
+        last_changed = max([max(date_created, date_modified)
+                            for date_created, pk, model_name, date_modified
+                            in state] or [None])
+        return state, last_changed
+
+    def items(self, obj):
+        items = []
+        for model in (News, Resource):
+            queryset = self.get_queryset(
+                model, obj.community.pk, obj.tag).select_related(
+                "author__user").prefetch_related("tags")
+            for item in queryset[:FEED_ITEMS]:
+                # the items are linked to the community page, which lists them
+                item.feed_link = u"{0}#{1}-{2}".format(
+                    obj.link, model._meta.model_name, item.slug)
+                items.append(item)
+        items.sort(key=lambda item: (item.date_created, item.pk),
+                   reverse=True)
+        return items[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.content
+
+    def item_link(self, item):
+        return item.feed_link
+
+    def item_pubdate(self, item):
+        return datetime.combine(item.date_created, time())
+
+    def item_author_name(self, item):
+        return unicode(item.author)
+
+    def item_categories(self, item):
+        return [tag.name for tag in item.tags.all()]
+
+
+class CommunityAtomFeed(CommunityFeed):
+
+    """Atom feed of the latest public News and Resources of a community, or of
+    those with a tag.
+    """
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def _feed_view(feed):
+    view = cached_feed(feed)
+
+    @require_GET
+    def feed_view(request, community_slug, tag=None):
+        community_id = get_object_community_id(Community, "slug",
+                                               community_slug)
+        return view(request, community_id, tag=tag)
+    return feed_view
+
+
+community_rss = _feed_view(CommunityFeed())
+community_atom = _feed_view(CommunityAtomFeed())
@@ -0,0 +1,251 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.backends.util import CursorWrapper
+
+
+logger = logging.getLogger(__name__)
+
+# Requests that take longer than this many milliseconds are logged along with
+# their slowest queries
+SLOW_REQUEST_THRESHOLD = getattr(settings,
+                                 "DASHBOARD_SLOW_REQUEST_THRESHOLD", 1000)
+
+SLOW_REQUEST_QUERIES = 5
+
+# Number of the most recent requests per view kept for the percentiles
+STATS_SAMPLES = getattr(settings, "DASHBOARD_REQUEST_STATS_SAMPLES", 1000)
+
+# Seconds, or number of requests, after which a process adds the samples it
+# collected to the shared statistics in the cache
+STATS_FLUSH_INTERVAL = 60
+STATS_FLUSH_SIZE = 100
+
+STATS_VIEWS_KEY = "dashboard:request_stats:views"
+
+NO_VIEW = "(none)"
+
+
+def _view_stats_key(view):
+    return "dashboard:request_stats:view:{0}".format(view)
+
+
+def get_view_name(view_func):
+    """Return the dotted path of a view function or a view class instance"""
+    name = getattr(view_func, "__name__", view_func.__class__.__name__)
+    return "{0}.{1}".format(view_func.__module__, name)
+
+
+class RequestMetrics(object):
+
+    """Queries, timings and view of a single request. Times are in seconds.
+    """
+    def __init__(self):
+        self.start = time.time()
+        self.end = None
+        self.view = NO_VIEW
+        self.queries = []
+        self.render_start = None
+        self.render_time = 0.0
+        self._connections = []
+
+    @property
+    def sql_count(self):
+        return len(self.queries)
+
+    @property
+    def sql_time(self):
+        return sum(duration for sql, duration in self.queries)
+
+    @property
+    def total_time(self):
+        return (self.end or time.time()) - self.start
+
+    def slowest_queries(self, count=SLOW_REQUEST_QUERIES):
+        return sorted(self.queries, key=lambda query: query[1],
+                      reverse=True)[:count]
+
+    def install(self):
+        """Time the queries of all the database connections of the current
+        thread until uninstall is called.
+        """
+        for connection in connections.all():
+            self._connections.append(
+                (connection, connection.use_debug_cursor,
+                 connection.__dict__.get("make_debug_cursor")))
+            connection.make_debug_cursor = self._cursor_factory(
+                connection, connection.use_debug_cursor)
+            connection.use_debug_cursor = True
+
+    def uninstall(self):
+        while self._connections:
+            connection, use_debug_cursor, make_debug_cursor = (
+                self._connections.pop())
+            connection.use_debug_cursor = use_debug_cursor
+            if make_debug_cursor is None:
+                del connection.make_debug_cursor
+            else:
+                connection.make_debug_cursor = make_debug_cursor
+        self.end = time.time()
+
+    def _cursor_factory(self, connection, use_debug_cursor):
+        make_debug_cursor = connection.make_debug_cursor
+        debug = (use_debug_cursor or
+                 (use_debug_cursor is None and settings.DEBUG))
+
+        def make_cursor(cursor):
+            if debug:
+                cursor = make_debug_cursor(cursor)
+            else:
+                cursor = CursorWrapper(cursor, connection)
+            return TimingCursorWrapper(cursor, self.queries)
+        return make_cursor
+
+
+class TimingCursorWrapper(object):
+
+    """Cursor wrapper that records the SQL and the duration of the executed
+    statements, without formatting the parameters into the SQL like the debug
+    cursor does.
+    """
+    def __init__(self, cursor, queries):
+        self.cursor = cursor
+        self.queries = queries
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def execute(self, sql, params=None):
+        start = time.time()
+        try:
+            return self.cursor.execute(sql, params)
+        finally:
+            self.queries.append((sql, time.time() - start))
+
+    def executemany(self, sql, param_list):
+        start = time.time()
+        try:
+            return self.cursor.executemany(sql, param_list)
+        finally:
+            self.queries.append((sql, time.time() - start))
+
+
+class RequestStats(object):
+
+    """Per-process buffer of request samples that are periodically added to
+    the statistics shared by all processes through the cache.
+
+    The statistics keep the STATS_SAMPLES most recent samples of every view.
+    Samples of concurrent flushes may be lost, so they are approximate.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.size = 0
+        self.flushed_at = time.time()
+
+    def add(self, metrics):
+        """Buffer the sample of a finished request, flushing the buffer if it
+        is full or old enough.
+
+        :param metrics: RequestMetrics object
+        """
+        sample = (metrics.total_time * 1000, metrics.sql_count,
+                  metrics.sql_time * 1000, metrics.render_time * 1000)
+        with self.lock:
+            self.samples[metrics.view].append(sample)
+            self.size += 1
+            flush = (self.size >= STATS_FLUSH_SIZE or
+                     time.time() - self.flushed_at >= STATS_FLUSH_INTERVAL)
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Add the buffered samples to the statistics in the cache"""
+        with self.lock:
+            samples, self.samples = self.samples, defaultdict(list)
+            self.size = 0
+            self.flushed_at = time.time()
+        if not samples:
+            return
+        views = cache.get(STATS_VIEWS_KEY) or set()
+        if not views.issuperset(samples):
+            cache.set(STATS_VIEWS_KEY, views.union(samples), None)
+        keys = dict((_view_stats_key(view), view) for view in samples)
+        stored = cache.get_many(keys.keys())
+        cache.set_many(dict(
+            (key, (stored.get(key, []) + samples[view])[-STATS_SAMPLES:])
+            for key, view in keys.items()), None)
+
+
+request_stats = RequestStats()
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of a list of numbers
+
+    >>> percentile([4, 1, 3, 2], 50)
+    2
+    >>> percentile([4, 1, 3, 2], 99)
+    4
+    """
+    values = sorted(values)
+    index = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(index, 0)]
+
+
+def get_request_stats():
+    """Return the percentiles of the samples collected for every view.
+
+    :returns: list of dictionaries with the string view, the integer number of
+              samples and the p50, p90 and p99 of the total milliseconds,
+              queries, SQL milliseconds and render milliseconds, slowest p90
+              first
+    """
+    views = cache.get(STATS_VIEWS_KEY) or set()
+    stored = cache.get_many([_view_stats_key(view) for view in views])
+    stats = []
+    for view in views:
+        samples = stored.get(_view_stats_key(view))
+        if not samples:
+            continue
+        view_stats = {"view": view, "count": len(samples)}
+        columns = zip(*samples)
+        for index, name in enumerate(("total", "queries", "sql", "render")):
+            for percent in (50, 90, 99):
+                view_stats["{0}_p{1}".format(name, percent)] = percentile(
+                    columns[index], percent)
+        stats.append(view_stats)
+    stats.sort(key=lambda view_stats: view_stats["total_p90"], reverse=True)
+    return stats
+
+
+def reset_request_stats():
+    """Delete the statistics of all views from the cache"""
+    views = cache.get(STATS_VIEWS_KEY) or set()
+    cache.delete_many([_view_stats_key(view) for view in views] +
+                      [STATS_VIEWS_KEY])
+
+
+def log_slow_request(request, metrics):
+    """Log a warning with the timings and the slowest queries of a request
+    that took longer than SLOW_REQUEST_THRESHOLD milliseconds.
+    """
+    if metrics.total_time * 1000 < SLOW_REQUEST_THRESHOLD:
+        return
+    queries = "".join("\n  {0:.1f} ms: {1}".format(duration * 1000, sql)
+                      for sql, duration in metrics.slowest_queries())
+    logger.warning(
+        "Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms, "
+        "rendered in %.1f ms%s", request.method, request.path, metrics.view,
+        metrics.total_time * 1000, metrics.sql_count, metrics.sql_time * 1000,
+        metrics.render_time * 1000, queries)
@@ -0,0 +1,145 @@
+import smtplib
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend
+from django.core.mail.message import sanitize_address
+from django.utils import timezone
+
+from dashboard.models import QueuedEmail
+
+
+EMAIL_RATE = getattr(settings, "DASHBOARD_EMAIL_RATE", 5)
+
+EMAIL_MAX_ATTEMPTS = getattr(settings, "DASHBOARD_EMAIL_MAX_ATTEMPTS", 5)
+
+# Seconds before the first retry of a failed email, doubled for every retry
+EMAIL_RETRY_DELAY = 60
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+
+    """Email backend that stores the messages in the database instead of
+    sending them, so requests don't wait for the SMTP server. The messages
+    are sent by the send_queued_email command.
+    """
+    def send_messages(self, email_messages):
+        emails = []
+        for message in email_messages or []:
+            if not message.recipients():
+                continue
+            emails.append(QueuedEmail(
+                from_email=sanitize_address(message.from_email,
+                                            message.encoding),
+                recipients="\n".join(
+                    sanitize_address(address, message.encoding)
+                    for address in message.recipients()),
+                message=message.message().as_bytes(),
+                next_attempt=timezone.now()))
+        try:
+            QueuedEmail.objects.bulk_create(emails)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(emails)
+
+
+def retry_delay(attempts):
+    """Return the delay before retrying an email that failed attempts times.
+
+    >>> [retry_delay(attempts).seconds for attempts in (1, 2, 3)]
+    [60, 120, 240]
+    """
+    return timedelta(seconds=EMAIL_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+class RateLimiter(object):
+
+    """Space calls to wait so that at most rate of them return per second"""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.last = None
+
+    def wait(self):
+        if self.last is not None:
+            delay = self.last + self.interval - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        self.last = time.time()
+
+
+def _reset(backend):
+    """Drop a broken SMTP connection, so the next email opens a new one"""
+    try:
+        backend.close()
+    except (smtplib.SMTPException, socket.error):
+        backend.connection = None
+
+
+def send_queued_email(batch_size=100, rate=EMAIL_RATE,
+                      max_attempts=EMAIL_MAX_ATTEMPTS):
+    """Send the due queued emails over a single SMTP connection, configured
+    by the EMAIL_* settings.
+
+    Every email is deleted as soon as the server accepted it, so it isn't
+    sent again when the drain stops halfway. Emails the server refuses or
+    that fail to send are retried later with a growing delay, until they
+    failed max_attempts times. A dropped connection is opened again for the
+    next email.
+
+    :param batch_size: number of emails fetched per query
+    :param rate: maximum number of emails sent per second or None
+    :param max_attempts: number of attempts before an email is given up
+    :returns: tuple of the numbers of sent and failed emails
+    :raises smtplib.SMTPException, socket.error: if the connection to the
+                                                 SMTP server can't be opened,
+                                                 the emails that weren't sent
+                                                 yet keep their attempts
+    """
+    backend = EmailBackend(fail_silently=False)
+    limiter = RateLimiter(rate)
+    sent = failed = 0
+    last_pk = 0
+    try:
+        while True:
+            emails = list(QueuedEmail.objects.filter(
+                next_attempt__lte=timezone.now(), pk__gt=last_pk).order_by(
+                "pk")[:batch_size])
+            if not emails:
+                break
+            last_pk = emails[-1].pk
+            for email in emails:
+                limiter.wait()
+                connected = False
+                try:
+                    backend.open()
+                    connected = True
+                    backend.connection.sendmail(email.from_email,
+                                                email.get_recipients(),
+                                                bytes(email.message))
+                except (smtplib.SMTPException, socket.error) as error:
+                    if not connected:
+                        # the server can't be reached, don't count it against
+                        # this email or any of the next ones
+                        raise
+                    if isinstance(error, (smtplib.SMTPServerDisconnected,
+                                          socket.error)):
+                        _reset(backend)
+                    email.attempts += 1
+                    email.last_error = unicode(error)
+                    email.next_attempt = (
+                        timezone.now() + retry_delay(email.attempts)
+                        if email.attempts < max_attempts else None)
+                    email.save(update_fields=["attempts", "last_error",
+                                              "next_attempt"])
+                    failed += 1
+                else:
+                    email.delete()
+                    sent += 1
+    finally:
+        _reset(backend)
+    return sent, failed
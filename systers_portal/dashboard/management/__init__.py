@@ -1,6 +1,11 @@
+from itertools import chain
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
 from django.db.models.signals import post_syncdb
+from django.contrib.auth.management import create_permissions
 from django.contrib.auth.models import Group, Permission
 from dashboard import models
+from dashboard.search import SEARCH_MODELS, search_index_sql
 
 
 content_contributor_permissions = [
@@ -45,19 +50,79 @@ dashboard_group_permissions = {
 def create_user_groups(sender, **kwargs):
     """Create user groups and assign permissions to each group
 
+    All the needed permissions and the existing group permissions are fetched
+    at once, and only the missing ones are inserted in bulk, so running it
+    again on a synchronized database doesn't write anything. Permissions that
+    were granted to the groups by other means are left untouched.
+
     :param sender: models module that was just installed
     """
     verbosity = kwargs.get("verbosity")
     if verbosity > 0:
         print "Initializing data post_syncdb"
-    for group in dashboard_group_permissions:
-        role, created = Group.objects.get_or_create(name=group)
-        if verbosity > 1 and created:
-            print "Creating group {0}".format(group)
-        for perm in dashboard_group_permissions[group]:
-            role.permissions.add(Permission.objects.get(codename=perm))
+    codenames = set(chain.from_iterable(dashboard_group_permissions.values()))
+    with transaction.atomic():
+        permissions = get_dashboard_permissions(codenames)
+        if len(permissions) < len(codenames):
+            # auth may not have created the permissions of this app yet,
+            # depending on the order the post_syncdb receivers were connected
+            create_permissions(sender, [], verbosity=0)
+            permissions = get_dashboard_permissions(codenames)
+        groups = dict((group.name, group) for group in Group.objects.filter(
+            name__in=dashboard_group_permissions.keys()))
+        for group in dashboard_group_permissions:
+            if group not in groups:
+                groups[group] = Group.objects.create(name=group)
+                if verbosity > 1:
+                    print "Creating group {0}".format(group)
+        GroupPermission = Group.permissions.through
+        existing = set(GroupPermission.objects.filter(
+            group__in=groups.values(),
+            permission__in=permissions.values()).values_list(
+            "group_id", "permission_id"))
+        group_permissions = []
+        for group, perms in dashboard_group_permissions.items():
+            group_id = groups[group].id
+            for perm in perms:
+                if (group_id, permissions[perm]) in existing:
+                    continue
+                group_permissions.append(GroupPermission(
+                    group_id=group_id, permission_id=permissions[perm]))
+                if verbosity > 1:
+                    print "Permitting {0} to {1}".format(group, perm)
+        GroupPermission.objects.bulk_create(group_permissions)
+
+
+def get_dashboard_permissions(codenames):
+    """Fetch the ids of dashboard permissions by their codenames
+
+    :param codenames: iterable of permission codenames
+    :returns: dictionary mapping codenames to permission ids
+    """
+    return dict(Permission.objects.filter(
+        content_type__app_label="dashboard",
+        codename__in=codenames).values_list("codename", "id"))
+
+
+def create_search_indexes(sender, **kwargs):
+    """Create the GIN full-text search indexes of News and Resource on
+    PostgreSQL, unless they already exist
+
+    :param sender: models module that was just installed
+    """
+    connection = connections[kwargs.get("db", DEFAULT_DB_ALIAS)]
+    if connection.vendor != "postgresql":
+        return
+    verbosity = kwargs.get("verbosity")
+    cursor = connection.cursor()
+    for model in SEARCH_MODELS:
+        name, sql = search_index_sql(model)
+        cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s",
+                       [name])
+        if cursor.fetchone() is None:
             if verbosity > 1:
-                print "Permitting {0} to {1}".format(group, perm)
-        role.save()
+                print "Creating search index {0}".format(name)
+            cursor.execute(sql)
 
 post_syncdb.connect(create_user_groups, sender=models)
+post_syncdb.connect(create_search_indexes, sender=models)
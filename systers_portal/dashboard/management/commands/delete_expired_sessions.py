@@ -0,0 +1,38 @@
+from optparse import make_option
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import NoArgsCommand
+from django.utils import timezone
+
+
+def delete_expired_sessions(batch_size=1000):
+    """Delete the expired sessions from the database in batches, so that the
+    django_session table is never locked for long.
+
+    :param batch_size: maximum number of sessions deleted per query
+    :returns: integer number of deleted sessions
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        session_keys = list(Session.objects.filter(
+            expire_date__lt=now).values_list("pk", flat=True)[:batch_size])
+        if not session_keys:
+            return deleted
+        Session.objects.filter(pk__in=session_keys).delete()
+        deleted += len(session_keys)
+
+
+class Command(NoArgsCommand):
+    help = ("Delete the expired sessions from the database in batches. Meant "
+            "to be scheduled, e.g. daily.")
+    option_list = NoArgsCommand.option_list + (
+        make_option("--batch-size", type="int", dest="batch_size",
+                    default=1000,
+                    help="Number of sessions deleted per query"),
+    )
+
+    def handle_noargs(self, **options):
+        deleted = delete_expired_sessions(options["batch_size"])
+        if int(options.get("verbosity", 1)) > 0:
+            self.stdout.write("Deleted {0} expired sessions".format(deleted))
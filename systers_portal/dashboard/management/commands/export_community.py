@@ -0,0 +1,42 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models import Community
+from dashboard.transfer import Progress, export_community
+
+
+class Command(BaseCommand):
+    args = "<community slug>"
+    help = ("Stream the users, members, News and Resources of a community as "
+            "newline-delimited JSON, to be loaded into another database with "
+            "the import_community command. The memory use doesn't depend on "
+            "the size of the community.")
+    option_list = BaseCommand.option_list + (
+        make_option("--output", dest="output",
+                    help="Write to this file instead of the standard output"),
+        make_option("--batch-size", type="int", dest="batch_size",
+                    default=1000, help="Number of rows fetched per query"),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("Give the slug of one community")
+        try:
+            community = Community.objects.get(slug=args[0])
+        except Community.DoesNotExist:
+            raise CommandError("There is no community '{0}'".format(args[0]))
+        progress = None
+        if int(options.get("verbosity", 1)) > 0:
+            progress = Progress(self.stderr)
+        stream = self.stdout
+        if options["output"]:
+            stream = open(options["output"], "w")
+        try:
+            export_community(community, stream, options["batch_size"],
+                             progress)
+        finally:
+            if options["output"]:
+                stream.close()
+        if progress is not None:
+            progress.done()
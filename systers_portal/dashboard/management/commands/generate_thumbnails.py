@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import NoArgsCommand
+
+from dashboard.models import SysterUser
+from dashboard.thumbnails import DUMMY_PICTURE, generate_thumbnails
+
+
+class Command(NoArgsCommand):
+    help = ("Generate the missing profile picture thumbnails of all "
+            "SysterUsers, e.g. after uploading pictures outside the portal "
+            "or after the cache was cleared.")
+
+    def handle_noargs(self, **options):
+        start = time.time()
+        names = SysterUser.objects.exclude(profile_picture="").exclude(
+            profile_picture=DUMMY_PICTURE).exclude(
+            profile_picture__isnull=True).values_list(
+            "profile_picture", flat=True).distinct()
+        generated = failed = 0
+        for name in names.iterator():
+            if generate_thumbnails(name):
+                generated += 1
+            else:
+                failed += 1
+        if int(options.get("verbosity", 1)) > 0:
+            self.stdout.write(
+                "Generated the thumbnails of {0} pictures in {1:.1f} s, {2} "
+                "pictures couldn't be read".format(
+                    generated, time.time() - start, failed))
@@ -0,0 +1,40 @@
+import sys
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.transfer import CommunityImporter, Progress, TransferError
+
+
+class Command(BaseCommand):
+    args = "<file>"
+    help = ("Load a community written by the export_community command, "
+            "reading the file line by line and inserting the records in "
+            "batches. Users, Tags and ResourceTypes are matched by name and "
+            "created when missing. Use - to read the standard input.")
+    option_list = BaseCommand.option_list + (
+        make_option("--batch-size", type="int", dest="batch_size",
+                    default=1000,
+                    help="Number of records inserted per transaction"),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("Give the file to import")
+        progress = None
+        if int(options.get("verbosity", 1)) > 0:
+            progress = Progress(self.stdout, "Imported")
+        importer = CommunityImporter(options["batch_size"], progress)
+        stream = sys.stdin if args[0] == "-" else open(args[0])
+        try:
+            counts = importer.run(stream)
+        except TransferError as error:
+            raise CommandError(error)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        if progress is not None:
+            progress.done()
+            for record_type in sorted(counts):
+                self.stdout.write("Created {0} {1} records".format(
+                    counts[record_type], record_type))
@@ -0,0 +1,103 @@
+import time
+from collections import defaultdict
+from functools import wraps
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+
+MIDDLEWARE_HOOKS = ("_request_middleware", "_view_middleware",
+                    "_template_response_middleware", "_response_middleware",
+                    "_exception_middleware")
+
+
+def instrument_middleware(handler, timings):
+    """Wrap the middleware methods loaded by a request handler, so that the
+    time spent and the queries issued in each of them are added up per
+    middleware class.
+
+    :param handler: BaseHandler object
+    :param timings: dictionary mapping string middleware class paths to lists
+                    of float seconds and integer number of queries
+    """
+    def measure(method, name):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            queries = len(connection.queries)
+            start = time.time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timings[name][0] += time.time() - start
+                timings[name][1] += len(connection.queries) - queries
+        return wrapper
+
+    handler.load_middleware()
+    for hook in MIDDLEWARE_HOOKS:
+        methods = getattr(handler, hook)
+        for index, method in enumerate(methods):
+            middleware = method.__self__.__class__
+            name = "{0}.{1}".format(middleware.__module__, middleware.__name__)
+            methods[index] = measure(method, name)
+
+
+def measure_middleware(path, requests=20, **extra):
+    """Request a path with the test client and measure the overhead of every
+    middleware class in MIDDLEWARE_CLASSES.
+
+    :param path: string URL path requested with GET
+    :param requests: number of measured requests, after one warm-up request
+    :param extra: extra WSGI environ variables of the requests
+    :returns: tuple of integer status code of the last response, list of
+              (string middleware class path, float milliseconds, float
+              queries) tuples per request in MIDDLEWARE_CLASSES order and
+              tuple of float milliseconds and float queries of the whole
+              request
+    """
+    timings = defaultdict(lambda: [0.0, 0])
+    client = Client()
+    instrument_middleware(client.handler, timings)
+    client.get(path, **extra)
+    timings.clear()
+    with CaptureQueriesContext(connection) as context:
+        start = time.time()
+        for i in range(requests):
+            response = client.get(path, **extra)
+        total = ((time.time() - start) * 1000 / requests,
+                 float(len(context)) / requests)
+    results = [(name, timings[name][0] * 1000 / requests,
+                float(timings[name][1]) / requests)
+               for name in settings.MIDDLEWARE_CLASSES]
+    return response.status_code, results, total
+
+
+class Command(BaseCommand):
+    args = "path [path ...]"
+    help = ("Measure the time spent and the queries issued by every "
+            "middleware class on GET requests for the given paths. The "
+            "requests are anonymous and made with the test client against the "
+            "configured database.")
+    option_list = BaseCommand.option_list + (
+        make_option("--requests", type="int", dest="requests", default=20,
+                    help="Number of measured requests per path"),
+        make_option("--host", dest="host", default="testserver",
+                    help="Host header of the requests"),
+    )
+
+    def handle(self, *paths, **options):
+        if not paths:
+            raise CommandError("Give at least one path to request")
+        for path in paths:
+            status_code, results, total = measure_middleware(
+                path, options["requests"], HTTP_HOST=options["host"])
+            self.stdout.write("{0} ({1}, {2} requests)".format(
+                path, status_code, options["requests"]))
+            for name, milliseconds, queries in results:
+                self.stdout.write("  {0:<60} {1:8.3f} ms {2:6.1f} queries"
+                                  .format(name, milliseconds, queries))
+            self.stdout.write("  {0:<60} {1:8.3f} ms {2:6.1f} queries".format(
+                "total", *total))
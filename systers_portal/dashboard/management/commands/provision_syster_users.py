@@ -0,0 +1,24 @@
+import time
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from dashboard.models import SysterUser
+
+
+class Command(NoArgsCommand):
+    help = ("Create the missing SysterUsers of all users in bulk, e.g. after "
+            "importing users or creating them in the admin.")
+    option_list = NoArgsCommand.option_list + (
+        make_option("--batch-size", type="int", dest="batch_size",
+                    default=1000,
+                    help="Number of SysterUsers created per query"),
+    )
+
+    def handle_noargs(self, **options):
+        start = time.time()
+        created = SysterUser.objects.provision(
+            batch_size=options["batch_size"])
+        if int(options.get("verbosity", 1)) > 0:
+            self.stdout.write("Created {0} SysterUsers in {1:.1f} s".format(
+                created, time.time() - start))
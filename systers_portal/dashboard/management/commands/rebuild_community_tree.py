@@ -0,0 +1,16 @@
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+
+from dashboard.models import Community
+
+
+class Command(NoArgsCommand):
+    help = ("Rebuild the tree fields of all communities from their "
+            "parent_community, e.g. to backfill existing rows.")
+
+    def handle_noargs(self, **options):
+        with transaction.atomic():
+            Community.objects.rebuild()
+        if int(options.get("verbosity", 1)) > 0:
+            self.stdout.write("Rebuilt the tree of {0} communities".format(
+                Community.objects.count()))
@@ -0,0 +1,35 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from dashboard.instrumentation import get_request_stats, reset_request_stats
+
+
+class Command(NoArgsCommand):
+    help = ("Show the 50th, 90th and 99th percentiles of the total time, the "
+            "number of queries, the SQL time and the render time of the "
+            "recent requests of every view, as recorded by "
+            "RequestInstrumentationMiddleware. Times are in milliseconds. "
+            "The samples are shared through the cache, so the web processes "
+            "have to use the memcached or file cache backend.")
+    option_list = NoArgsCommand.option_list + (
+        make_option("--reset", action="store_true", dest="reset",
+                    default=False,
+                    help="Delete the collected samples after showing them"),
+    )
+
+    def handle_noargs(self, **options):
+        stats = get_request_stats()
+        columns = ("total", "queries", "sql", "render")
+        self.stdout.write("{0:<50} {1:>6} {2}".format(
+            "view", "count", " ".join("{0:>20}".format(
+                "{0} p50/p90/p99".format(column)) for column in columns)))
+        for view_stats in stats:
+            self.stdout.write("{0:<50} {1:>6} {2}".format(
+                view_stats["view"], view_stats["count"], " ".join(
+                    "{0:>20}".format("{0:.0f}/{1:.0f}/{2:.0f}".format(
+                        *[view_stats["{0}_p{1}".format(column, percent)]
+                          for percent in (50, 90, 99)]))
+                    for column in columns)))
+        if options["reset"]:
+            reset_request_stats()
@@ -0,0 +1,50 @@
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.benchmarks import run_benchmarks
+
+
+class Command(BaseCommand):
+    args = "[benchmark name ...]"
+    help = ("Time the dashboard decorators, the admin changelists and the CMS "
+            "pages on the data in the database, e.g. seeded with the "
+            "seed_dataset command, and count their queries. Results can be "
+            "saved and compared to an earlier run.")
+    option_list = BaseCommand.option_list + (
+        make_option("--repeat", type="int", dest="repeat", default=20,
+                    help="Number of measured calls per benchmark"),
+        make_option("--save", dest="save",
+                    help="Save the results as JSON to this file"),
+        make_option("--compare", dest="compare",
+                    help="Compare to the results saved in this file"),
+    )
+
+    def handle(self, *names, **options):
+        previous = {}
+        if options["compare"]:
+            with open(options["compare"]) as results_file:
+                previous = dict((result["name"], result)
+                                for result in json.load(results_file))
+        try:
+            results = run_benchmarks(names, options["repeat"])
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write("{0:<40} {1:>10} {2:>10} {3:>8}{4}".format(
+            "benchmark", "mean ms", "min ms", "queries",
+            "   vs mean ms, queries" if previous else ""))
+        for result in results:
+            line = "{0:<40} {1:10.2f} {2:10.2f} {3:8.1f}".format(
+                result.name, result.mean, result.minimum, result.queries)
+            if result.name in previous:
+                before = previous[result.name]
+                change = ((result.mean - before["mean"]) / before["mean"] *
+                          100 if before["mean"] else 0)
+                line += "   {0:+.0f}%, {1:+.1f}".format(
+                    change, result.queries - before["queries"])
+            self.stdout.write(line)
+        if options["save"]:
+            with open(options["save"], "w") as results_file:
+                json.dump([result._asdict() for result in results],
+                          results_file, indent=2)
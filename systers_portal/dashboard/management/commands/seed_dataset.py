@@ -0,0 +1,59 @@
+import time
+from optparse import make_option
+
+from django.contrib.auth.models import User
+from django.core.management.base import NoArgsCommand, CommandError
+
+from dashboard.dataset import seed_dataset
+
+
+class Command(NoArgsCommand):
+    help = ("Fill the database with a synthetic dataset of users, nested "
+            "communities, News and Resources with tags, using bulk inserts. "
+            "The same options and seed give the same dataset.")
+    option_list = NoArgsCommand.option_list + (
+        make_option("--prefix", dest="prefix", default="seed",
+                    help="Prefix of the names and slugs of the objects"),
+        make_option("--users", type="int", dest="users", default=1000),
+        make_option("--communities", type="int", dest="communities",
+                    default=50),
+        make_option("--roots", type="int", dest="roots", default=5,
+                    help="Number of root communities"),
+        make_option("--children", type="int", dest="children", default=3,
+                    help="Maximum number of child communities per community"),
+        make_option("--members", type="int", dest="members", default=100,
+                    help="Number of members per community"),
+        make_option("--news", type="int", dest="news", default=20,
+                    help="Number of News per community"),
+        make_option("--resources", type="int", dest="resources", default=20,
+                    help="Number of Resources per community"),
+        make_option("--tags", type="int", dest="tags", default=50),
+        make_option("--resource-types", type="int", dest="resource_types",
+                    default=5),
+        make_option("--no-pages", action="store_false", dest="pages",
+                    default=True,
+                    help="Don't create CMS pages for the root communities"),
+        make_option("--seed", type="int", dest="seed", default=0,
+                    help="Seed of the random generator"),
+    )
+
+    def handle_noargs(self, **options):
+        prefix = options["prefix"]
+        if options["users"] < 1 or options["roots"] < 1:
+            raise CommandError("At least one user and one root community are "
+                               "needed")
+        if User.objects.filter(
+                username__startswith="{0}-user".format(prefix)).exists():
+            raise CommandError("A dataset with the prefix '{0}' already "
+                               "exists".format(prefix))
+        start = time.time()
+        counts = seed_dataset(
+            prefix, options["users"], options["communities"],
+            options["roots"], options["children"], options["members"],
+            options["news"], options["resources"], options["tags"],
+            options["resource_types"], options["pages"], options["seed"])
+        if int(options.get("verbosity", 1)) > 0:
+            for name in sorted(counts):
+                self.stdout.write("Created {0} {1}".format(counts[name], name))
+            self.stdout.write("Seeded in {0:.1f} s".format(
+                time.time() - start))
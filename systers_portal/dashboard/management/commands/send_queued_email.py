@@ -0,0 +1,56 @@
+import smtplib
+import socket
+import time
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand, CommandError
+
+from dashboard.mail import (EMAIL_MAX_ATTEMPTS, EMAIL_RATE,
+                            send_queued_email)
+
+
+class Command(NoArgsCommand):
+    help = ("Send the emails queued by QueuedEmailBackend over one SMTP "
+            "connection, retrying failed ones later. With --loop the queue "
+            "is drained again every --interval seconds. Only one worker "
+            "should run at a time.")
+    option_list = NoArgsCommand.option_list + (
+        make_option("--batch-size", type="int", dest="batch_size",
+                    default=100, help="Number of emails fetched per query"),
+        make_option("--rate", type="float", dest="rate", default=EMAIL_RATE,
+                    help="Maximum number of emails sent per second, 0 for "
+                         "no limit"),
+        make_option("--max-attempts", type="int", dest="max_attempts",
+                    default=EMAIL_MAX_ATTEMPTS,
+                    help="Number of failed attempts before an email is "
+                         "given up"),
+        make_option("--loop", action="store_true", dest="loop",
+                    default=False, help="Keep draining the queue"),
+        make_option("--interval", type="float", dest="interval", default=10,
+                    help="Seconds between two drains with --loop"),
+    )
+
+    def handle_noargs(self, **options):
+        verbose = int(options.get("verbosity", 1)) > 0
+        while True:
+            start = time.time()
+            try:
+                sent, failed = send_queued_email(
+                    options["batch_size"], options["rate"],
+                    options["max_attempts"])
+            except (smtplib.SMTPException, socket.error) as error:
+                if not options["loop"]:
+                    raise CommandError("Can't connect to the SMTP server: "
+                                       "{0}".format(error))
+                self.stderr.write("Can't connect to the SMTP server: "
+                                  "{0}".format(error))
+                sent = failed = 0
+            if verbose and (sent or failed or not options["loop"]):
+                elapsed = time.time() - start
+                self.stdout.write(
+                    "Sent {0} emails, {1} failed, in {2:.1f} s, {3:.1f} "
+                    "emails/s".format(sent, failed, elapsed,
+                                      sent / elapsed if elapsed else 0))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.models import Community, update_community_counters
+
+
+class Command(BaseCommand):
+    args = "[community_slug community_slug ...]"
+    help = ("Recount the members, News and Resources of the given "
+            "communities, or of all communities if none is given.")
+
+    def handle(self, *args, **options):
+        community_ids = None
+        if args:
+            community_ids = Community.objects.filter(
+                slug__in=args).values_list("id", flat=True)
+        updated = update_community_counters(community_ids)
+        if int(options.get("verbosity", 1)) > 0:
+            self.stdout.write("Updated the counters of {0} communities".format(
+                updated))
@@ -0,0 +1,117 @@
+import time
+
+from django.conf import settings
+from cms.middleware import language, page, toolbar, user
+
+from dashboard.instrumentation import (
+    RequestMetrics, get_view_name, log_slow_request, request_stats)
+from dashboard.page_cache import (
+    cache_response, get_cached_response, is_cacheable_request)
+
+
+NON_CMS_PATH_PREFIXES = tuple(prefix for prefix in getattr(
+    settings, "DASHBOARD_NON_CMS_PATH_PREFIXES",
+    ("/accounts/", "/api/", settings.STATIC_URL)) if prefix)
+
+
+def is_cms_path(path):
+    """Return False if the path starts with one of the prefixes listed in
+    DASHBOARD_NON_CMS_PATH_PREFIXES, which are never served by django-cms.
+    """
+    return not path.startswith(NON_CMS_PATH_PREFIXES)
+
+
+class CMSPathsOnlyMixin(object):
+
+    """Mixin for middleware that is only needed for requests that may be
+    served by django-cms. The requests for non-CMS paths skip the middleware
+    completely.
+    """
+    def process_request(self, request):
+        method = getattr(super(CMSPathsOnlyMixin, self), "process_request",
+                         None)
+        if method is not None and is_cms_path(request.path):
+            return method(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        method = getattr(super(CMSPathsOnlyMixin, self), "process_view", None)
+        if method is not None and is_cms_path(request.path):
+            return method(request, view_func, view_args, view_kwargs)
+
+    def process_response(self, request, response):
+        method = getattr(super(CMSPathsOnlyMixin, self), "process_response",
+                         None)
+        if method is not None and is_cms_path(request.path):
+            return method(request, response)
+        return response
+
+
+class CurrentUserMiddleware(CMSPathsOnlyMixin, user.CurrentUserMiddleware):
+    pass
+
+
+class CurrentPageMiddleware(CMSPathsOnlyMixin, page.CurrentPageMiddleware):
+    pass
+
+
+class ToolbarMiddleware(CMSPathsOnlyMixin, toolbar.ToolbarMiddleware):
+    pass
+
+
+class LanguageCookieMiddleware(CMSPathsOnlyMixin,
+                               language.LanguageCookieMiddleware):
+    pass
+
+
+class CMSPageCacheMiddleware(object):
+
+    """Serve CMS pages to anonymous visitors from the cache.
+
+    Has to come after the LocaleMiddleware and the cms ToolbarMiddleware in
+    MIDDLEWARE_CLASSES, so the active language and the toolbar are known.
+    """
+    def process_request(self, request):
+        if is_cms_path(request.path) and is_cacheable_request(request):
+            return get_cached_response(request)
+
+    def process_response(self, request, response):
+        if (is_cms_path(request.path) and hasattr(request, "user") and
+                is_cacheable_request(request)):
+            cache_response(request, response)
+        return response
+
+
+class RequestInstrumentationMiddleware(object):
+
+    """Record the number and the time of the queries, the template render
+    time and the total time of every request. Slow requests are logged and
+    the samples are collected for the request_stats command.
+
+    Has to come first in MIDDLEWARE_CLASSES, so the time spent in the other
+    middleware is included. The render time is only measured for
+    TemplateResponses, other views render their templates themselves.
+    """
+    def process_request(self, request):
+        request._metrics = RequestMetrics()
+        request._metrics.install()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics.view = get_view_name(view_func)
+
+    def process_template_response(self, request, response):
+        metrics = request._metrics
+        metrics.render_start = time.time()
+
+        def rendered(response):
+            metrics.render_time = time.time() - metrics.render_start
+        response.add_post_render_callback(rendered)
+        return response
+
+    def process_response(self, request, response):
+        metrics = getattr(request, "_metrics", None)
+        if metrics is None:
+            return response
+        metrics.uninstall()
+        log_slow_request(request, metrics)
+        request_stats.add(metrics)
+        return response
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'SysterUser'
+        db.create_table(u'dashboard_systeruser', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('user', self.gf('django.db.models.fields.related.OneToOneField')(to=orm['auth.User'], unique=True)),
+            ('country', self.gf('django_countries.fields.CountryField')(max_length=2, null=True, blank=True)),
+            ('blog_url', self.gf('django.db.models.fields.URLField')(max_length=255, blank=True)),
+            ('homepage_url', self.gf('django.db.models.fields.URLField')(max_length=255, blank=True)),
+            ('profile_picture', self.gf('django.db.models.fields.files.ImageField')(default='photos/dummy.jpeg', max_length=100, null=True, blank=True)),
+        ))
+        db.send_create_signal(u'dashboard', ['SysterUser'])
+
+        # Adding model 'Community'
+        db.create_table(u'dashboard_community', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('name', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('email', self.gf('django.db.models.fields.EmailField')(max_length=255, blank=True)),
+            ('mailing_list', self.gf('django.db.models.fields.EmailField')(max_length=255, blank=True)),
+            ('resource_area', self.gf('django.db.models.fields.URLField')(max_length=255, blank=True)),
+            ('community_admin', self.gf('django.db.models.fields.related.ForeignKey')(related_name='community', to=orm['dashboard.SysterUser'])),
+            ('parent_community', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['dashboard.Community'], null=True, blank=True)),
+            ('website', self.gf('django.db.models.fields.URLField')(max_length=255, blank=True)),
+            ('facebook', self.gf('django.db.models.fields.URLField')(max_length=255, blank=True)),
+            ('googleplus', self.gf('django.db.models.fields.URLField')(max_length=255, blank=True)),
+            ('twitter', self.gf('django.db.models.fields.URLField')(max_length=255, blank=True)),
+            ('slug', self.gf('django.db.models.fields.SlugField')(unique=True, max_length=150)),
+        ))
+        db.send_create_signal(u'dashboard', ['Community'])
+
+        # Adding M2M table for field members on 'Community'
+        m2m_table_name = db.shorten_name(u'dashboard_community_members')
+        db.create_table(m2m_table_name, (
+            ('id', models.AutoField(verbose_name='ID', primary_key=True, auto_created=True)),
+            ('community', models.ForeignKey(orm[u'dashboard.community'], null=False)),
+            ('systeruser', models.ForeignKey(orm[u'dashboard.systeruser'], null=False))
+        ))
+        db.create_unique(m2m_table_name, ['community_id', 'systeruser_id'])
+
+        # Adding model 'Tag'
+        db.create_table(u'dashboard_tag', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('name', self.gf('django.db.models.fields.CharField')(max_length=255)),
+        ))
+        db.send_create_signal(u'dashboard', ['Tag'])
+
+        # Adding model 'ResourceType'
+        db.create_table(u'dashboard_resourcetype', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('name', self.gf('django.db.models.fields.CharField')(max_length=255)),
+        ))
+        db.send_create_signal(u'dashboard', ['ResourceType'])
+
+        # Adding model 'News'
+        db.create_table(u'dashboard_news', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('title', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('community', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['dashboard.Community'])),
+            ('author', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['dashboard.SysterUser'])),
+            ('date_created', self.gf('django.db.models.fields.DateField')(auto_now_add=True, blank=True)),
+            ('date_modified', self.gf('django.db.models.fields.DateField')(auto_now=True, blank=True)),
+            ('is_public', self.gf('django.db.models.fields.BooleanField')(default=True)),
+            ('content', self.gf('django.db.models.fields.TextField')()),
+            ('slug', self.gf('django.db.models.fields.SlugField')(unique=True, max_length=150)),
+        ))
+        db.send_create_signal(u'dashboard', ['News'])
+
+        # Adding M2M table for field tags on 'News'
+        m2m_table_name = db.shorten_name(u'dashboard_news_tags')
+        db.create_table(m2m_table_name, (
+            ('id', models.AutoField(verbose_name='ID', primary_key=True, auto_created=True)),
+            ('news', models.ForeignKey(orm[u'dashboard.news'], null=False)),
+            ('tag', models.ForeignKey(orm[u'dashboard.tag'], null=False))
+        ))
+        db.create_unique(m2m_table_name, ['news_id', 'tag_id'])
+
+        # Adding model 'CommunityPage'
+        db.create_table(u'dashboard_communitypage', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('title', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('page', self.gf('django.db.models.fields.related.OneToOneField')(to=orm['cms.Page'], unique=True)),
+            ('community', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['dashboard.Community'])),
+        ))
+        db.send_create_signal(u'dashboard', ['CommunityPage'])
+
+        # Adding model 'Resource'
+        db.create_table(u'dashboard_resource', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('title', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('community', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['dashboard.Community'])),
+            ('author', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['dashboard.SysterUser'])),
+            ('date_created', self.gf('django.db.models.fields.DateField')(auto_now_add=True, blank=True)),
+            ('date_modified', self.gf('django.db.models.fields.DateField')(auto_now=True, blank=True)),
+            ('is_public', self.gf('django.db.models.fields.BooleanField')(default=True)),
+            ('resource_type', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['dashboard.ResourceType'], null=True, blank=True)),
+            ('content', self.gf('django.db.models.fields.TextField')()),
+            ('slug', self.gf('django.db.models.fields.SlugField')(unique=True, max_length=150)),
+        ))
+        db.send_create_signal(u'dashboard', ['Resource'])
+
+        # Adding M2M table for field tags on 'Resource'
+        m2m_table_name = db.shorten_name(u'dashboard_resource_tags')
+        db.create_table(m2m_table_name, (
+            ('id', models.AutoField(verbose_name='ID', primary_key=True, auto_created=True)),
+            ('resource', models.ForeignKey(orm[u'dashboard.resource'], null=False)),
+            ('tag', models.ForeignKey(orm[u'dashboard.tag'], null=False))
+        ))
+        db.create_unique(m2m_table_name, ['resource_id', 'tag_id'])
+
+
+    def backwards(self, orm):
+        # Deleting model 'SysterUser'
+        db.delete_table(u'dashboard_systeruser')
+
+        # Deleting model 'Community'
+        db.delete_table(u'dashboard_community')
+
+        # Removing M2M table for field members on 'Community'
+        db.delete_table(db.shorten_name(u'dashboard_community_members'))
+
+        # Deleting model 'Tag'
+        db.delete_table(u'dashboard_tag')
+
+        # Deleting model 'ResourceType'
+        db.delete_table(u'dashboard_resourcetype')
+
+        # Deleting model 'News'
+        db.delete_table(u'dashboard_news')
+
+        # Removing M2M table for field tags on 'News'
+        db.delete_table(db.shorten_name(u'dashboard_news_tags'))
+
+        # Deleting model 'CommunityPage'
+        db.delete_table(u'dashboard_communitypage')
+
+        # Deleting model 'Resource'
+        db.delete_table(u'dashboard_resource')
+
+        # Removing M2M table for field tags on 'Resource'
+        db.delete_table(db.shorten_name(u'dashboard_resource_tags'))
+
+
+    models = {
+        u'auth.group': {
+            'Meta': {'object_name': 'Group'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '80'}),
+            'permissions': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['auth.Permission']", 'symmetrical': 'False', 'blank': 'True'})
+        },
+        u'auth.permission': {
+            'Meta': {'ordering': "(u'content_type__app_label', u'content_type__model', u'codename')", 'unique_together': "((u'content_type', u'codename'),)", 'object_name': 'Permission'},
+            'codename': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        },
+        u'auth.user': {
+            'Meta': {'object_name': 'User'},
+            'date_joined': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75', 'blank': 'True'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'groups': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'related_name': "u'user_set'", 'blank': 'True', 'to': u"orm['auth.Group']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_active': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'is_staff': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'is_superuser': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'last_login': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'password': ('django.db.models.fields.CharField', [], {'max_length': '128'}),
+            'user_permissions': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'related_name': "u'user_set'", 'blank': 'True', 'to': u"orm['auth.Permission']"}),
+            'username': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '30'})
+        },
+        'cms.page': {
+            'Meta': {'ordering': "('tree_id', 'lft')", 'unique_together': "(('publisher_is_draft', 'application_namespace'), ('reverse_id', 'site', 'publisher_is_draft'))", 'object_name': 'Page'},
+            'application_namespace': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True', 'blank': 'True'}),
+            'application_urls': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '200', 'null': 'True', 'blank': 'True'}),
+            'changed_by': ('django.db.models.fields.CharField', [], {'max_length': '70'}),
+            'changed_date': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'created_by': ('django.db.models.fields.CharField', [], {'max_length': '70'}),
+            'creation_date': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'in_navigation': ('django.db.models.fields.BooleanField', [], {'default': 'True', 'db_index': 'True'}),
+            'is_home': ('django.db.models.fields.BooleanField', [], {'default': 'False', 'db_index': 'True'}),
+            'languages': ('django.db.models.fields.CharField', [], {'max_length': '255', 'null': 'True', 'blank': 'True'}),
+            'level': ('django.db.models.fields.PositiveIntegerField', [], {'db_index': 'True'}),
+            'lft': ('django.db.models.fields.PositiveIntegerField', [], {'db_index': 'True'}),
+            'limit_visibility_in_menu': ('django.db.models.fields.SmallIntegerField', [], {'default': 'None', 'null': 'True', 'db_index': 'True', 'blank': 'True'}),
+            'login_required': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'navigation_extenders': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '80', 'null': 'True', 'blank': 'True'}),
+            'parent': ('django.db.models.fields.related.ForeignKey', [], {'blank': 'True', 'related_name': "'children'", 'null': 'True', 'to': "orm['cms.Page']"}),
+            'placeholders': ('django.db.models.fields.related.ManyToManyField', [], {'to': "orm['cms.Placeholder']", 'symmetrical': 'False'}),
+            'publication_date': ('django.db.models.fields.DateTimeField', [], {'db_index': 'True', 'null': 'True', 'blank': 'True'}),
+            'publication_end_date': ('django.db.models.fields.DateTimeField', [], {'db_index': 'True', 'null': 'True', 'blank': 'True'}),
+            'publisher_is_draft': ('django.db.models.fields.BooleanField', [], {'default': 'True', 'db_index': 'True'}),
+            'publisher_public': ('django.db.models.fields.related.OneToOneField', [], {'related_name': "'publisher_draft'", 'unique': 'True', 'null': 'True', 'to': "orm['cms.Page']"}),
+            'reverse_id': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40', 'null': 'True', 'blank': 'True'}),
+            'revision_id': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'rght': ('django.db.models.fields.PositiveIntegerField', [], {'db_index': 'True'}),
+            'site': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'djangocms_pages'", 'to': u"orm['sites.Site']"}),
+            'soft_root': ('django.db.models.fields.BooleanField', [], {'default': 'False', 'db_index': 'True'}),
+            'template': ('django.db.models.fields.CharField', [], {'default': "'INHERIT'", 'max_length': '100'}),
+            'tree_id': ('django.db.models.fields.PositiveIntegerField', [], {'db_index': 'True'}),
+            'xframe_options': ('django.db.models.fields.IntegerField', [], {'default': '0'})
+        },
+        'cms.placeholder': {
+            'Meta': {'object_name': 'Placeholder'},
+            'default_width': ('django.db.models.fields.PositiveSmallIntegerField', [], {'null': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'slot': ('django.db.models.fields.CharField', [], {'max_length': '50', 'db_index': 'True'})
+        },
+        u'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        u'dashboard.community': {
+            'Meta': {'object_name': 'Community'},
+            'community_admin': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'community'", 'to': u"orm['dashboard.SysterUser']"}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '255', 'blank': 'True'}),
+            'facebook': ('django.db.models.fields.URLField', [], {'max_length': '255', 'blank': 'True'}),
+            'googleplus': ('django.db.models.fields.URLField', [], {'max_length': '255', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'mailing_list': ('django.db.models.fields.EmailField', [], {'max_length': '255', 'blank': 'True'}),
+            'members': ('django.db.models.fields.related.ManyToManyField', [], {'blank': 'True', 'related_name': "'member_of_community'", 'null': 'True', 'symmetrical': 'False', 'to': u"orm['dashboard.SysterUser']"}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'parent_community': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['dashboard.Community']", 'null': 'True', 'blank': 'True'}),
+            'resource_area': ('django.db.models.fields.URLField', [], {'max_length': '255', 'blank': 'True'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '150'}),
+            'twitter': ('django.db.models.fields.URLField', [], {'max_length': '255', 'blank': 'True'}),
+            'website': ('django.db.models.fields.URLField', [], {'max_length': '255', 'blank': 'True'})
+        },
+        u'dashboard.communitypage': {
+            'Meta': {'object_name': 'CommunityPage'},
+            'community': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['dashboard.Community']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'page': ('django.db.models.fields.related.OneToOneField', [], {'to': "orm['cms.Page']", 'unique': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'dashboard.news': {
+            'Meta': {'object_name': 'News'},
+            'author': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['dashboard.SysterUser']"}),
+            'community': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['dashboard.Community']"}),
+            'content': ('django.db.models.fields.TextField', [], {}),
+            'date_created': ('django.db.models.fields.DateField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'date_modified': ('django.db.models.fields.DateField', [], {'auto_now': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_public': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '150'}),
+            'tags': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'to': u"orm['dashboard.Tag']", 'null': 'True', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'dashboard.resource': {
+            'Meta': {'object_name': 'Resource'},
+            'author': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['dashboard.SysterUser']"}),
+            'community': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['dashboard.Community']"}),
+            'content': ('django.db.models.fields.TextField', [], {}),
+            'date_created': ('django.db.models.fields.DateField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'date_modified': ('django.db.models.fields.DateField', [], {'auto_now': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_public': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'resource_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['dashboard.ResourceType']", 'null': 'True', 'blank': 'True'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '150'}),
+            'tags': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'to': u"orm['dashboard.Tag']", 'null': 'True', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'dashboard.resourcetype': {
+            'Meta': {'object_name': 'ResourceType'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'dashboard.systeruser': {
+            'Meta': {'object_name': 'SysterUser'},
+            'blog_url': ('django.db.models.fields.URLField', [], {'max_length': '255', 'blank': 'True'}),
+            'country': ('django_countries.fields.CountryField', [], {'max_length': '2', 'null': 'True', 'blank': 'True'}),
+            'homepage_url': ('django.db.models.fields.URLField', [], {'max_length': '255', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'profile_picture': ('django.db.models.fields.files.ImageField', [], {'default': "'photos/dummy.jpeg'", 'max_length': '100', 'null': 'True', 'blank': 'True'}),
+            'user': ('django.db.models.fields.related.OneToOneField', [], {'to': u"orm['auth.User']", 'unique': 'True'})
+        },
+        u'dashboard.tag': {
+            'Meta': {'object_name': 'Tag'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'sites.site': {
+            'Meta': {'ordering': "(u'domain',)", 'object_name': 'Site', 'db_table': "u'django_site'"},
+            'domain': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        }
+    }
+
+    complete_apps = ['dashboard']
\ No newline at end of file
@@ -1,9 +1,85 @@
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
 from django.dispatch import receiver
 from django_countries.fields import CountryField
 from allauth.account.signals import user_signed_up
 from cms.models.pagemodel import Page
+from cms.signals import post_publish, post_unpublish
+from mptt.models import MPTTModel, TreeForeignKey
+
+from dashboard.feed_cache import invalidate_feeds
+from dashboard.page_cache import invalidate_page
+from dashboard.permissions import invalidate_community, invalidate_model
+from dashboard.tags import invalidate_tag_counts
+from dashboard.thumbnails import queue_thumbnails
+
+
+class SysterUserManager(models.Manager):
+
+    """Manager that fetches the related User along with the SysterUser, since
+    it is needed to represent it
+    """
+    def get_queryset(self):
+        return super(SysterUserManager, self).get_queryset().select_related(
+            'user')
+
+    def get_for_user(self, user):
+        """Return the SysterUser of a user, creating it if the user has none
+        yet, e.g. because it was created in the admin or with createsuperuser.
+        The SysterUser is cached on the user, so user.systeruser doesn't query
+        it again.
+
+        :param user: User object
+        :returns: SysterUser object
+        """
+        try:
+            return user.systeruser
+        except SysterUser.DoesNotExist:
+            syster_user, created = self.get_or_create(user=user)
+            setattr(user, User.systeruser.cache_name, syster_user)
+            return syster_user
+
+    def provision(self, user_ids=None, batch_size=1000):
+        """Create the missing SysterUsers of existing users in bulk, e.g.
+        after importing users or to backfill the users that have none.
+
+        Users are processed in batches ordered by id, every batch is inserted
+        with one query in its own transaction. Users that get a SysterUser
+        concurrently are skipped.
+
+        :param user_ids: optional list or values_list QuerySet of User ids to
+                         limit the provisioning to, all users are provisioned
+                         if None
+        :param batch_size: maximum number of SysterUsers created per query
+        :returns: number of created SysterUsers
+        """
+        users = User.objects.filter(systeruser__isnull=True).order_by("pk")
+        if user_ids is not None:
+            users = users.filter(pk__in=user_ids)
+        created = 0
+        last_id = 0
+        while True:
+            batch = list(users.filter(pk__gt=last_id).values_list(
+                "pk", flat=True)[:batch_size])
+            if not batch:
+                return created
+            last_id = batch[-1]
+            try:
+                with transaction.atomic():
+                    self.bulk_create([SysterUser(user_id=user_id)
+                                      for user_id in batch])
+            except IntegrityError:
+                existing = set(self.filter(user__in=batch).values_list(
+                    "user_id", flat=True))
+                batch = [user_id for user_id in batch
+                         if user_id not in existing]
+                with transaction.atomic():
+                    self.bulk_create([SysterUser(user_id=user_id)
+                                      for user_id in batch])
+            created += len(batch)
 
 
 class SysterUser(models.Model):
@@ -18,18 +94,23 @@ class SysterUser(models.Model):
                                         blank=True,
                                         null=True)
 
+    objects = SysterUserManager()
+
     def __unicode__(self):
-        firstname = self.user.first_name
-        lastname = self.user.last_name
-        if firstname and lastname:
-            return "{0} {1}".format(self.user.first_name, self.user.last_name)
+        user = self.user
+        if user.first_name and user.last_name:
+            return "{0} {1}".format(user.first_name, user.last_name)
         else:
-            return self.user.username
+            return user.username
 
 
-class Community(models.Model):
+class Community(MPTTModel):
 
-    """Model to represent a Syster Community"""
+    """Model to represent a Syster Community. Communities are stored as a
+    modified preorder tree by parent_community, so the descendants, the
+    ancestors and the subtree members of a community are each fetched with a
+    single query.
+    """
     name = models.CharField(max_length=255)
     email = models.EmailField(max_length=255, blank=True)
     mailing_list = models.EmailField(max_length=255, blank=True)
@@ -37,21 +118,43 @@ class Community(models.Model):
     members = models.ManyToManyField(SysterUser, blank=True, null=True,
                                      related_name='member_of_community')
     community_admin = models.ForeignKey(SysterUser, related_name='community')
-    parent_community = models.ForeignKey('self', blank=True, null=True)
+    parent_community = TreeForeignKey('self', blank=True, null=True)
     website = models.URLField(max_length=255, blank=True)
     facebook = models.URLField(max_length=255, blank=True)
     googleplus = models.URLField(max_length=255, blank=True)
     twitter = models.URLField(max_length=255, blank=True)
     slug = models.SlugField(max_length=150, unique=True)
+    members_count = models.PositiveIntegerField(default=0, editable=False)
+    news_count = models.PositiveIntegerField(default=0, editable=False)
+    resources_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class MPTTMeta:
+        parent_attr = 'parent_community'
 
     def __unicode__(self):
         return self.name
 
+    def get_subtree_members(self, include_self=True):
+        """Return the members of the communities in the subtree of this
+        community, i.e. of its descendants.
+
+        :param include_self: if True the members of this community are included
+        :returns: QuerySet of distinct SysterUser objects
+        """
+        left, right = self.lft, self.rght
+        if not include_self:
+            left += 1
+            right -= 1
+        return SysterUser.objects.filter(
+            member_of_community__tree_id=self.tree_id,
+            member_of_community__lft__gte=left,
+            member_of_community__rght__lte=right).distinct()
+
 
 class Tag(models.Model):
 
     """Model to represent the tags a resource can have"""
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)
 
     def __unicode__(self):
         return self.name
@@ -60,7 +163,7 @@ class Tag(models.Model):
 class ResourceType(models.Model):
 
     """Model to represent the types a resource can have"""
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)
 
     def __unicode__(self):
         return self.name
@@ -79,6 +182,13 @@ class News(models.Model):
     content = models.TextField()
     slug = models.SlugField(max_length=150, unique=True)
 
+    class Meta:
+        index_together = [
+            ["community", "is_public", "date_created", "id"],
+            ["community", "date_created", "id"],
+            ["author", "date_modified"],
+        ]
+
     def __unicode__(self):
         return "{0} of {1} Community".format(self.title, self.community.name)
 
@@ -108,16 +218,254 @@ class Resource(models.Model):
     content = models.TextField()
     slug = models.SlugField(max_length=150, unique=True)
 
+    class Meta:
+        index_together = [
+            ["community", "is_public", "date_created", "id"],
+            ["community", "date_created", "id"],
+            ["author", "date_modified"],
+        ]
+
     def __unicode__(self):
         return "{0} of {1} Community".format(self.title, self.community.name)
 
 
+class QueuedEmail(models.Model):
+
+    """Model to represent an outgoing email stored by QueuedEmailBackend until
+    the send_queued_email command sends it. Emails that failed too often have
+    no next attempt.
+    """
+    from_email = models.CharField(max_length=255)
+    recipients = models.TextField()
+    message = models.BinaryField()
+    date_created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(blank=True, null=True, db_index=True)
+    last_error = models.TextField(blank=True)
+
+    def __unicode__(self):
+        return "Email from {0} to {1}".format(
+            self.from_email, ", ".join(self.get_recipients()))
+
+    def get_recipients(self):
+        return self.recipients.split("\n")
+
+
 @receiver(user_signed_up)
 def create_syster_user(sender, **kwargs):
     """Keep User and SysterUser synchronized. Create a SystersUser instance on
-    receiving a signal about new user signup.
+    receiving a signal about new user signup, unless the user already has one.
     """
     user = kwargs.get('user')
     if user is not None:
-        syster_user = SysterUser(user=user)
-        syster_user.save()
+        SysterUser.objects.get_for_user(user)
+
+
+@receiver(user_logged_in)
+def provision_syster_user(sender, user, **kwargs):
+    """Give a SysterUser to users that log in without one, e.g. because they
+    were created in the admin or with createsuperuser, before they reach the
+    views guarded by the dashboard decorators. This costs one query per login,
+    not one per request.
+    """
+    SysterUser.objects.get_for_user(user)
+
+
+@receiver(post_save, sender=SysterUser)
+def generate_profile_picture_thumbnails(sender, instance, **kwargs):
+    """Generate the thumbnails of an uploaded profile picture in the
+    background.
+    """
+    queue_thumbnails(instance.profile_picture.name)
+
+
+def update_community_counters(community_ids=None, counters=None):
+    """Recount the denormalized counters of communities with a single UPDATE
+    statement.
+
+    :param community_ids: iterable of Community ids, all communities are
+                          updated if None
+    :param counters: iterable of counter field names to update, all counters
+                     are updated if None
+    :returns: number of updated communities
+    """
+    if community_ids is not None:
+        community_ids = list(community_ids)
+        if not community_ids:
+            return 0
+    table = Community._meta.db_table
+    sources = {
+        "members_count": (Community.members.through._meta.db_table,
+                          "community_id"),
+        "news_count": (News._meta.db_table, "community_id"),
+        "resources_count": (Resource._meta.db_table, "community_id"),
+    }
+    assignments = []
+    for counter in counters or sorted(sources):
+        source_table, column = sources[counter]
+        assignments.append(
+            "{0} = (SELECT COUNT(*) FROM {1} WHERE {1}.{2} = {3}.id)".format(
+                counter, source_table, column, table))
+    sql = "UPDATE {0} SET {1}".format(table, ", ".join(assignments))
+    params = []
+    if community_ids is not None:
+        sql += " WHERE id IN ({0})".format(
+            ", ".join(["%s"] * len(community_ids)))
+        params = community_ids
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
+    return cursor.rowcount
+
+
+@receiver(m2m_changed, sender=Community.members.through)
+def community_members_changed(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Invalidate the cached roles and recount the members of the communities
+    whose members changed. When the communities of a SysterUser are cleared,
+    the affected community ids are collected before the clear and handled
+    after it.
+    """
+    if not reverse:
+        community_ids = [instance.pk]
+    elif action == "pre_clear":
+        instance._cleared_community_ids = list(
+            instance.member_of_community.values_list("id", flat=True))
+        return
+    elif action == "post_clear":
+        community_ids = getattr(instance, "_cleared_community_ids", [])
+    else:
+        community_ids = pk_set or []
+    if action in ("post_add", "post_remove", "post_clear"):
+        for community_id in community_ids:
+            invalidate_community(community_id)
+        update_community_counters(community_ids, ["members_count"])
+
+
+@receiver(post_save, sender=Community)
+def invalidate_admin_role(sender, instance, **kwargs):
+    """Invalidate the cached roles of a community when it is saved, since its
+    community admin might have changed, and its feeds, which show its name.
+    """
+    invalidate_community(instance.pk)
+    invalidate_feeds(instance.pk)
+
+
+def invalidate_object_lookups(sender, **kwargs):
+    """Invalidate the cached permission lookups of the model of a saved or
+    deleted object.
+    """
+    invalidate_model(sender)
+
+
+for model in (SysterUser, Community, News, Resource, CommunityPage):
+    post_save.connect(invalidate_object_lookups, sender=model)
+    post_delete.connect(invalidate_object_lookups, sender=model)
+
+
+def remember_community(sender, instance, **kwargs):
+    """Remember the community and the visibility an existing News or Resource
+    had before it is saved, so that moving it updates the counters of both
+    communities and editing it only invalidates what it changed.
+    """
+    instance._previous_values = []
+    if instance.pk is not None:
+        instance._previous_values = list(sender.objects.filter(
+            pk=instance.pk).values_list("community", "is_public"))
+
+
+def update_content_counters(sender, instance, signal, created=False,
+                            **kwargs):
+    """Recount the News or Resources of the community of a created, moved or
+    deleted object and invalidate its cached tag counts and feeds. Editing an
+    object in place leaves the counters and the tag counts alone, unless it
+    becomes public or private, and only invalidates the feeds if it is public.
+    """
+    counter = "news_count" if sender == News else "resources_count"
+    previous_values = []
+    if signal is not post_delete:
+        previous_values = getattr(instance, "_previous_values", [])
+    community_ids = set(community_id for community_id, is_public
+                        in previous_values)
+    community_ids.add(instance.community_id)
+    counted = created or signal is post_delete or len(community_ids) > 1
+    if counted:
+        update_community_counters(community_ids, [counter])
+    was_public = any(is_public for community_id, is_public in previous_values)
+    if counted or was_public != instance.is_public:
+        for community_id in community_ids:
+            invalidate_tag_counts(community_id)
+            invalidate_feeds(community_id)
+    elif instance.is_public:
+        invalidate_feeds(instance.community_id)
+
+
+for model in (News, Resource):
+    pre_save.connect(remember_community, sender=model)
+    post_save.connect(update_content_counters, sender=model)
+    post_delete.connect(update_content_counters, sender=model)
+
+
+def content_tags_changed(sender, instance, action, reverse, model, pk_set,
+                         **kwargs):
+    """Invalidate the cached tag counts and feeds of the communities whose
+    News or Resources were tagged or untagged. When the objects of a Tag are
+    cleared, the affected community ids are collected before the clear.
+    """
+    if not reverse:
+        community_ids = [instance.community_id]
+    elif action == "pre_clear":
+        instance._cleared_tag_community_ids = list(model.objects.filter(
+            tags=instance).values_list("community", flat=True).distinct())
+        return
+    elif action == "post_clear":
+        community_ids = getattr(instance, "_cleared_tag_community_ids", [])
+    elif action in ("post_add", "post_remove") and pk_set:
+        community_ids = model.objects.filter(pk__in=pk_set).values_list(
+            "community", flat=True).distinct()
+    else:
+        return
+    if action in ("post_add", "post_remove", "post_clear"):
+        for community_id in community_ids:
+            invalidate_tag_counts(community_id)
+            invalidate_feeds(community_id)
+
+
+def invalidate_tag_caches(sender, **kwargs):
+    """Invalidate the cached tag counts and feeds of all communities when a
+    Tag is renamed or deleted.
+    """
+    invalidate_tag_counts()
+    invalidate_feeds()
+
+
+for model in (News, Resource):
+    m2m_changed.connect(content_tags_changed, sender=model.tags.through)
+post_save.connect(invalidate_tag_caches, sender=Tag)
+post_delete.connect(invalidate_tag_caches, sender=Tag)
+
+
+def invalidate_cached_page(sender, instance, **kwargs):
+    """Invalidate the cached responses and placeholders of a CMS page when it
+    is published, unpublished or deleted.
+    """
+    invalidate_page(instance)
+
+
+post_publish.connect(invalidate_cached_page, sender=Page)
+post_unpublish.connect(invalidate_cached_page, sender=Page)
+post_delete.connect(invalidate_cached_page, sender=Page)
+
+
+@receiver(post_save, sender=CommunityPage)
+@receiver(post_delete, sender=CommunityPage)
+def invalidate_community_page(sender, instance, **kwargs):
+    """Invalidate the cached responses of the CMS page of a saved or deleted
+    community page and the feeds of the community, which link to the page.
+    """
+    invalidate_feeds(instance.community_id)
+    try:
+        page = instance.page
+    except Page.DoesNotExist:
+        # the page itself was deleted and has been invalidated already
+        return
+    invalidate_page(page)
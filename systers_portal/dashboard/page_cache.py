@@ -0,0 +1,112 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.encoding import iri_to_uri
+from django.utils.translation import get_language
+
+from dashboard.cache_versions import (bump_versions, get_version,
+                                      versioned_cache)
+
+
+PAGE_CACHE_TIMEOUT = getattr(settings, "DASHBOARD_PAGE_CACHE_TIMEOUT", 600)
+
+
+def _page_version_key(page_id):
+    return "dashboard:page_cache:page:{0}".format(page_id)
+
+
+def _response_key(request):
+    path_hash = hashlib.md5(
+        iri_to_uri(request.get_full_path()).encode("utf-8")).hexdigest()
+    return "dashboard:page_cache:response:{0}:{1}".format(path_hash,
+                                                          get_language())
+
+
+def get_publish_version(page_id):
+    """Return the current publish version of a CMS page. The version changes
+    every time the page is published, unpublished or deleted.
+
+    :param page_id: integer id of the public or the draft Page
+    :returns: string version
+    """
+    return get_version(_page_version_key(page_id))
+
+
+def invalidate_page(page):
+    """Invalidate the cached responses and placeholder fragments of a CMS page.
+
+    Both the draft and the public version of the page are invalidated, so it
+    doesn't matter which one is passed.
+
+    :param page: cms Page object
+    """
+    from cms.models import Placeholder
+
+    page_ids = set([page.pk, page.publisher_public_id]) - set([None])
+    bump_versions(*[_page_version_key(page_id) for page_id in page_ids])
+    languages = [language for language, name in settings.LANGUAGES]
+    keys = [placeholder.get_cache_key(language)
+            for placeholder in Placeholder.objects.filter(page__in=page_ids)
+            for language in languages]
+    cache.delete_many(keys)
+
+
+def is_cacheable_request(request):
+    """Return True if the response to the request may be served from or
+    stored in the page cache: anonymous GET and HEAD requests without the
+    CMS toolbar.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+    toolbar = getattr(request, "toolbar", None)
+    if toolbar is not None and (toolbar.edit_mode or toolbar.show_toolbar):
+        return False
+    return not request.user.is_authenticated()
+
+
+def get_cached_response(request):
+    """Return the cached response to a request for a CMS page, if the page
+    wasn't published again since the response was stored.
+
+    :param request: HttpRequest object
+    :returns: HttpResponse object or None
+    """
+    cached = versioned_cache.get(_response_key(request))
+    if cached is None:
+        return None
+    page_id, version, content, headers = cached
+    if version != get_publish_version(page_id):
+        return None
+    response = HttpResponse(content)
+    response._headers = headers.copy()
+    return response
+
+
+def cache_response(request, response):
+    """Store the response to a request for a CMS page, keyed by the path, the
+    active language and the publish version of the page.
+
+    Only responses of the cms details view are stored, and not if they
+    aren't successful, set cookies or use the CSRF token.
+
+    :param request: HttpRequest object
+    :param response: rendered HttpResponse object
+    :returns: True if the response was stored
+    """
+    from cms.models import Page
+    from cms.views import details
+
+    resolver_match = getattr(request, "resolver_match", None)
+    page = getattr(request, "_current_page_cache", None)
+    if (resolver_match is None or resolver_match.func is not details or
+            not isinstance(page, Page) or response.status_code != 200 or
+            response.streaming or response.cookies or
+            request.META.get("CSRF_COOKIE_USED")):
+        return False
+    versioned_cache.set(_response_key(request),
+                        (page.pk, get_publish_version(page.pk),
+                         response.content, response._headers),
+                        PAGE_CACHE_TIMEOUT)
+    return True
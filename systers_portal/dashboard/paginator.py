@@ -0,0 +1,114 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils.dateparse import parse_date
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+class EstimatedCountPaginator(Paginator):
+
+    """Paginator that doesn't COUNT(*) the rows of large unfiltered tables on
+    PostgreSQL, but reads the estimated number of rows from the planner
+    statistics instead. Filtered querysets and tables estimated to be smaller
+    than estimate_threshold are counted exactly.
+    """
+    estimate_threshold = 100000
+
+    def estimate_count(self):
+        """Return the estimated number of rows of an unfiltered queryset on
+        PostgreSQL or None if it can't be estimated.
+        """
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.where:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        cursor = connection.cursor()
+        cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s",
+                       [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+        return int(row[0]) if row is not None else None
+
+    def _get_count(self):
+        if self._count is None:
+            estimate = self.estimate_count()
+            if estimate is not None and estimate >= self.estimate_threshold:
+                self._count = estimate
+            else:
+                self._count = super(EstimatedCountPaginator,
+                                    self)._get_count()
+        return self._count
+    count = property(_get_count)
+
+
+def encode_cursor(date, pk):
+    """Encode the date and the id of the last object of a page as an opaque
+    cursor.
+
+    >>> import datetime
+    >>> encode_cursor(datetime.date(2014, 6, 1), 42)
+    'MjAxNC0wNi0wMTo0Mg'
+    """
+    return urlsafe_base64_encode("{0}:{1}".format(date.isoformat(), pk))
+
+
+def decode_cursor(cursor):
+    """Decode a cursor returned by encode_cursor.
+
+    >>> decode_cursor('MjAxNC0wNi0wMTo0Mg')
+    (datetime.date(2014, 6, 1), 42)
+
+    :returns: tuple of the date and the id
+    :raises ValueError: if the cursor is not valid
+    """
+    try:
+        date, pk = urlsafe_base64_decode(str(cursor)).split(":")
+        date = parse_date(date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if date is None:
+        raise ValueError("Invalid cursor")
+    return date, pk
+
+
+class KeysetPaginator(object):
+
+    """Paginator that lists a queryset newest first by (date_created, id) and
+    continues after the last object of the previous page instead of counting
+    and skipping rows with OFFSET, so every page costs the same single query
+    however deep it is.
+    """
+    def __init__(self, queryset, per_page, date_field="date_created"):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.date_field = date_field
+
+    def page(self, cursor=None):
+        """Return the objects of a page and the cursor of the next one.
+
+        :param cursor: string cursor of the page, the first page if None
+        :returns: tuple of a list of objects and a cursor string or None if
+                  this is the last page
+        :raises ValueError: if the cursor is not valid
+        """
+        queryset = self.queryset.order_by("-" + self.date_field, "-id")
+        if cursor:
+            date, pk = decode_cursor(cursor)
+            # a row value comparison is a single range scan of an index on
+            # (..., date_field, id), unlike the equivalent OR of two filters
+            opts = queryset.model._meta
+            qn = connections[queryset.db].ops.quote_name
+            where = "({0}.{1}, {0}.{2}) < (%s, %s)".format(
+                qn(opts.db_table), qn(opts.get_field(self.date_field).column),
+                qn(opts.pk.column))
+            queryset = queryset.extra(where=[where], params=[date, pk])
+        objects = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(objects) > self.per_page:
+            objects = objects[:self.per_page]
+            last = objects[-1]
+            next_cursor = encode_cursor(getattr(last, self.date_field),
+                                        last.pk)
+        return objects, next_cursor
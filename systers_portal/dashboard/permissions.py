@@ -0,0 +1,221 @@
+import hashlib
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404
+
+from dashboard.cache_versions import (bump_versions, get_version,
+                                      versioned_cache)
+
+
+ROLE_MEMBER = "member"
+ROLE_ADMIN = "admin"
+
+PERMISSION_CACHE_TIMEOUT = getattr(settings,
+                                   "DASHBOARD_PERMISSION_CACHE_TIMEOUT", 300)
+
+# Attribute of the request user memoizing the roles resolved during the
+# request, the same way ModelBackend memoizes the permissions of the user
+ROLES_MEMO_ATTR = "_dashboard_roles"
+
+
+def _model_version_key(model):
+    return "dashboard:permissions:model:{0}.{1}".format(
+        model._meta.app_label, model._meta.model_name)
+
+
+def _community_version_key(community_id):
+    return "dashboard:permissions:community:{0}".format(community_id)
+
+
+def invalidate_model(model):
+    """Invalidate the cached lookups of objects of the model.
+
+    :param model: model class whose objects were saved or deleted
+    """
+    bump_versions(_model_version_key(model))
+
+
+def invalidate_community(community_id):
+    """Invalidate the cached roles of all users in the community.
+
+    :param community_id: id of the community whose members or admin changed
+    """
+    bump_versions(_community_version_key(community_id))
+
+
+def _object_field_key(model, lookup, value, field):
+    version = get_version(_model_version_key(model))
+    raw_key = u"{0}:{1}:{2}={3}".format(version, field, lookup, value)
+    return "dashboard:permissions:object:{0}.{1}:{2}".format(
+        model._meta.app_label, model._meta.model_name,
+        hashlib.md5(raw_key.encode("utf-8")).hexdigest())
+
+
+def get_object_field(model, lookup, value, field):
+    """Return the value of an object field, looking it up by a single field
+    lookup. The answer is cached until an object of the model is saved or
+    deleted.
+
+    :param model: model class of the object
+    :param lookup: string field lookup name
+    :param value: value of the lookup
+    :param field: string field name to fetch, related fields are allowed
+    :returns: value of the field, i.e. a primary key for foreign keys
+    :raises Http404: if no object matches the lookup
+    """
+    key = _object_field_key(model, lookup, value, field)
+    cached = versioned_cache.get(key)
+    if cached is None:
+        values = list(model._default_manager.filter(
+            **{lookup: value}).values_list(field, flat=True)[:1])
+        if not values:
+            raise Http404("No {0} matches the given query.".format(
+                model._meta.object_name))
+        cached = (values[0],)
+        versioned_cache.set(key, cached, PERMISSION_CACHE_TIMEOUT)
+    return cached[0]
+
+
+def get_object_community_id(model, lookup, value):
+    """Return the id of the community an object belongs to.
+
+    :param model: Community model or model that has a community field
+                  referencing Community model
+    :param lookup: string field lookup name
+    :param value: value of the lookup
+    :returns: Community id
+    :raises Http404: if no object matches the lookup
+    """
+    from dashboard.models import Community
+    field = "id" if model == Community else "community"
+    return get_object_field(model, lookup, value, field)
+
+
+def _get_roles_memo(user):
+    memo = getattr(user, ROLES_MEMO_ATTR, None)
+    if memo is None:
+        memo = {}
+        setattr(user, ROLES_MEMO_ATTR, memo)
+    return memo
+
+
+def _role_key(user, community_id, role):
+    return "dashboard:permissions:role:{0}:{1}:{2}:{3}".format(
+        community_id, get_version(_community_version_key(community_id)),
+        role, user.pk)
+
+
+def _remember_role(user, community_id, role, has_role):
+    _get_roles_memo(user)[(community_id, role)] = has_role
+    versioned_cache.set(_role_key(user, community_id, role), has_role,
+                        PERMISSION_CACHE_TIMEOUT)
+
+
+def _role_exists_sql(role, community_column, connection):
+    """Return the SQL of an EXISTS expression that is true if the user whose
+    id is passed as the parameter has the role in the community whose id is
+    in community_column.
+    """
+    from dashboard.models import Community, SysterUser
+    qn = connection.ops.quote_name
+    user_opts = SysterUser._meta
+    if role == ROLE_MEMBER:
+        through_opts = Community.members.through._meta
+        return ("EXISTS (SELECT 1 FROM {0} INNER JOIN {1} "
+                "ON {0}.{2} = {1}.{3} "
+                "WHERE {0}.{4} = {5} AND {1}.{6} = %s)").format(
+            qn(through_opts.db_table), qn(user_opts.db_table),
+            qn(through_opts.get_field("systeruser").column),
+            qn(user_opts.pk.column),
+            qn(through_opts.get_field("community").column), community_column,
+            qn(user_opts.get_field("user").column))
+    elif role == ROLE_ADMIN:
+        # the community table is aliased, since the outer query may select
+        # from it too
+        opts = Community._meta
+        return ("EXISTS (SELECT 1 FROM {0} admin_community INNER JOIN {1} "
+                "ON admin_community.{2} = {1}.{3} "
+                "WHERE admin_community.{4} = {5} AND {1}.{6} = %s)").format(
+            qn(opts.db_table), qn(user_opts.db_table),
+            qn(opts.get_field("community_admin").column),
+            qn(user_opts.pk.column), qn(opts.pk.column), community_column,
+            qn(user_opts.get_field("user").column))
+    raise ValueError("Unknown role '{0}'".format(role))
+
+
+def has_community_role(user, community_id, role):
+    """Return True if a user has a role in a community.
+
+    The answer is memoized on the user for the rest of the request and cached
+    until the community members or the community admin change. Only the
+    asked role is resolved, with a single EXISTS query.
+
+    :param user: User object
+    :param community_id: Community id
+    :param role: ROLE_MEMBER or ROLE_ADMIN
+    :returns: boolean
+    """
+    from dashboard.models import Community
+    if not user.is_authenticated():
+        return False
+    memo = _get_roles_memo(user)
+    if (community_id, role) in memo:
+        return memo[(community_id, role)]
+    has_role = versioned_cache.get(_role_key(user, community_id, role))
+    if has_role is None:
+        if role == ROLE_MEMBER:
+            has_role = Community.members.through.objects.filter(
+                community=community_id, systeruser__user=user.pk).exists()
+        elif role == ROLE_ADMIN:
+            has_role = Community.objects.filter(
+                id=community_id, community_admin__user=user.pk).exists()
+        else:
+            raise ValueError("Unknown role '{0}'".format(role))
+        _remember_role(user, community_id, role, has_role)
+    else:
+        memo[(community_id, role)] = has_role
+    return has_role
+
+
+def has_object_role(user, model, lookup, value, role):
+    """Return True if a user has a role in the community an object belongs
+    to.
+
+    If the community of the object isn't cached yet, it is fetched together
+    with the role by a single query joining the object to the community
+    members or admin in an EXISTS subquery. Both answers are cached like the
+    ones of get_object_community_id and has_community_role.
+
+    :param user: User object
+    :param model: Community model or model that has a community field
+                  referencing Community model
+    :param lookup: string field lookup name
+    :param value: value of the lookup
+    :param role: ROLE_MEMBER or ROLE_ADMIN
+    :returns: boolean
+    :raises Http404: if no object matches the lookup
+    """
+    from dashboard.models import Community
+    if not user.is_authenticated():
+        return False
+    field = "id" if model == Community else "community"
+    key = _object_field_key(model, lookup, value, field)
+    cached = versioned_cache.get(key)
+    if cached is not None:
+        return has_community_role(user, cached[0], role)
+    queryset = model._default_manager.filter(**{lookup: value})
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    column = "{0}.{1}".format(qn(model._meta.db_table),
+                              qn(model._meta.get_field(field).column))
+    rows = list(queryset.extra(
+        select={"has_role": _role_exists_sql(role, column, connection)},
+        select_params=[user.pk]).values_list(field, "has_role")[:1])
+    if not rows:
+        raise Http404("No {0} matches the given query.".format(
+            model._meta.object_name))
+    community_id, has_role = rows[0][0], bool(rows[0][1])
+    versioned_cache.set(key, (community_id,), PERMISSION_CACHE_TIMEOUT)
+    _remember_role(user, community_id, role, has_role)
+    return has_role
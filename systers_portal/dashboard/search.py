@@ -0,0 +1,103 @@
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+
+from dashboard.models import News, Resource
+from dashboard.tags import filter_by_tags
+
+
+SEARCH_CONFIG = getattr(settings, "DASHBOARD_SEARCH_CONFIG", "english")
+
+SEARCH_MODELS = (News, Resource)
+
+
+def search_vector_sql(config=SEARCH_CONFIG, table=None):
+    """Return the SQL expression of the weighted tsvector of title and content.
+
+    The same expression is used by the GIN expression indexes created on
+    post_syncdb and by the search queries, so PostgreSQL can use the indexes.
+
+    :param config: name of the PostgreSQL text search configuration
+    :param table: optional table name to qualify the columns with
+    :returns: string SQL expression
+    """
+    prefix = "{0}.".format(table) if table else ""
+    return ("(setweight(to_tsvector('{0}', {1}title), 'A') || "
+            "setweight(to_tsvector('{0}', {1}content), 'B'))").format(
+        config, prefix)
+
+
+def search_index_sql(model, config=SEARCH_CONFIG):
+    """Return the name and the SQL statement of the GIN expression index used
+    to search the model.
+
+    :param model: News or Resource model
+    :param config: name of the PostgreSQL text search configuration
+    :returns: tuple of string index name and string SQL statement
+    """
+    table = model._meta.db_table
+    name = "{0}_search".format(table)
+    sql = "CREATE INDEX {0} ON {1} USING gin({2})".format(
+        name, table, search_vector_sql(config))
+    return name, sql
+
+
+def search_queryset(model, community, query, tags=None, public_only=True):
+    """Return the objects of a community matching a search query.
+
+    On PostgreSQL the objects are matched against the full-text search index
+    and ordered by rank, which is available as the rank attribute of the
+    objects. On other databases title and content are matched with icontains
+    and the objects are ordered by creation date.
+
+    :param model: News or Resource model
+    :param community: Community object
+    :param query: string search query
+    :param tags: optional iterable of tag names, objects have to be tagged with
+                 at least one of them
+    :param public_only: if True only public objects are returned
+    :returns: QuerySet of model objects with deferred content
+    """
+    queryset = model.objects.filter(community=community).defer("content")
+    if public_only:
+        queryset = queryset.filter(is_public=True)
+    if tags:
+        queryset = filter_by_tags(queryset, tags)
+    if connections[queryset.db].vendor == "postgresql":
+        vector = search_vector_sql(table=model._meta.db_table)
+        tsquery = "plainto_tsquery('{0}', %s)".format(SEARCH_CONFIG)
+        queryset = queryset.extra(
+            select={"rank": "ts_rank({0}, {1})".format(vector, tsquery)},
+            select_params=[query],
+            where=["{0} @@ {1}".format(vector, tsquery)],
+            params=[query],
+            order_by=["-rank", "-date_created"])
+    else:
+        queryset = queryset.filter(
+            Q(title__icontains=query) | Q(content__icontains=query))
+        queryset = queryset.extra(select={"rank": "0"},
+                                  order_by=["-date_created"])
+    return queryset
+
+
+def search(community, query, tags=None, public_only=True, limit=20):
+    """Search the News and the Resources of a community.
+
+    :param community: Community object
+    :param query: string search query
+    :param tags: optional iterable of tag names, objects have to be tagged with
+                 at least one of them
+    :param public_only: if True only public objects are returned
+    :param limit: maximum number of objects returned
+    :returns: list of at most limit News and Resource objects, best matches
+              first
+    """
+    results = []
+    for model in SEARCH_MODELS:
+        results.extend(search_queryset(model, community, query, tags,
+                                       public_only)[:limit])
+    results.sort(key=attrgetter("date_created"), reverse=True)
+    results.sort(key=attrgetter("rank"), reverse=True)
+    return results[:limit]
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+
+from dashboard.cache_versions import (bump_versions, get_version,
+                                      versioned_cache)
+
+
+MATCH_ANY = "any"
+MATCH_ALL = "all"
+
+TAG_CACHE_TIMEOUT = getattr(settings, "DASHBOARD_TAG_CACHE_TIMEOUT", 3600)
+
+_TAGS_VERSION_KEY = "dashboard:tags:version"
+
+
+def _community_tags_version_key(community_id):
+    return "dashboard:tags:community:{0}".format(community_id)
+
+
+def invalidate_tag_counts(community_id=None):
+    """Invalidate the cached tag counts of a community.
+
+    :param community_id: Community id, the counts of all communities are
+                         invalidated if None, e.g. when a Tag is renamed
+    """
+    if community_id is None:
+        key = _TAGS_VERSION_KEY
+    else:
+        key = _community_tags_version_key(community_id)
+    bump_versions(key)
+
+
+def filter_by_tags(queryset, tags, match=MATCH_ANY):
+    """Filter a queryset of News or Resources by tag names with a single
+    subquery on the through table of the tags, so the objects aren't joined
+    once per tag and don't need to be made distinct.
+
+    :param queryset: QuerySet of News or Resource objects
+    :param tags: iterable of tag names
+    :param match: MATCH_ANY to keep the objects tagged with at least one of
+                  the tags or MATCH_ALL for the objects tagged with all of them
+    :returns: filtered QuerySet
+    :raises ValueError: if match is not MATCH_ANY or MATCH_ALL
+    """
+    tags = sorted(set(tags))
+    if not tags:
+        return queryset
+    model = queryset.model
+    through = model.tags.through
+    object_field = "{0}_id".format(model._meta.model_name)
+    if match == MATCH_ANY:
+        return queryset.filter(pk__in=through.objects.filter(
+            tag__name__in=tags).values(object_field))
+    elif match != MATCH_ALL:
+        raise ValueError("Unknown tag match '{0}'".format(match))
+    # the through table has one row per object and tag, so the objects
+    # having all the tags are the ones with a row for each of them
+    qn = connections[queryset.db].ops.quote_name
+    tag_opts = model.tags.field.rel.to._meta
+    sql = ("{0}.{1} IN (SELECT {2}.{3} FROM {2} INNER JOIN {4} "
+           "ON {2}.{5} = {4}.{6} WHERE {4}.{7} IN ({8}) "
+           "GROUP BY {2}.{3} HAVING COUNT(*) = %s)").format(
+        qn(model._meta.db_table), qn(model._meta.pk.column),
+        qn(through._meta.db_table), qn(object_field), qn(tag_opts.db_table),
+        qn(through._meta.get_field("tag").column), qn(tag_opts.pk.column),
+        qn(tag_opts.get_field("name").column),
+        ", ".join(["%s"] * len(tags)))
+    return queryset.extra(where=[sql], params=tags + [len(tags)])
+
+
+def get_tag_counts(community_id, public_only=True):
+    """Return the number of News and Resources of a community per tag.
+
+    The counts are aggregated with one query per model and cached until the
+    tags of an object in the community, an object of the community or a Tag
+    change.
+
+    :param community_id: Community id
+    :param public_only: if True only public objects are counted
+    :returns: list of (tag name, count) tuples, the most used tags first
+    """
+    from dashboard.models import News, Resource
+    key = "dashboard:tags:counts:{0}:{1}:{2}:{3}".format(
+        community_id, get_version(_TAGS_VERSION_KEY),
+        get_version(_community_tags_version_key(community_id)),
+        "public" if public_only else "all")
+    counts = versioned_cache.get(key)
+    if counts is None:
+        totals = {}
+        for model in (News, Resource):
+            name = model._meta.model_name
+            lookups = {"{0}__community".format(name): community_id}
+            if public_only:
+                lookups["{0}__is_public".format(name)] = True
+            for tag, count in model.tags.through.objects.filter(
+                    **lookups).values("tag__name").annotate(
+                    count=Count("id")).values_list("tag__name", "count"):
+                totals[tag] = totals.get(tag, 0) + count
+        counts = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        versioned_cache.set(key, counts, TAG_CACHE_TIMEOUT)
+    return counts
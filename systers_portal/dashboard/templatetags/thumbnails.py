@@ -0,0 +1,17 @@
+from django import template
+
+from dashboard.thumbnails import get_thumbnail_url
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def profile_picture_url(syster_user, size="medium"):
+    """Return the URL of the profile picture thumbnail of a SysterUser in one
+    of the DASHBOARD_THUMBNAIL_SIZES, or of the dummy picture of that size.
+
+    Usage: {% load thumbnails %}{% profile_picture_url syster_user "small" %}
+    """
+    name = syster_user.profile_picture.name if syster_user else None
+    return get_thumbnail_url(name, size)
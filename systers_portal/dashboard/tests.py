@@ -1,21 +1,67 @@
+import asyncore
+import calendar
+import json
+import shutil
+import smtpd
+import smtplib
+import socket
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO
+from StringIO import StringIO
+from unittest import skipUnless
+
 import mock
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, get_cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.mail import send_mail
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.exceptions import PermissionDenied
+from django.core.urlresolvers import reverse
+from django.http import Http404
+from django.template import Context, Template
+from django.db import connection
 from django.test import TestCase
-from django.contrib.auth.models import Group
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from django.contrib.auth.models import Group, Permission
 from cms.models.pagemodel import Page
 from cms.api import create_page
 from allauth.account import signals
+from PIL import Image
 
 from dashboard.decorators import (membership_required, admin_required,
-                                  authorship_required)
-from dashboard.management import (content_contributor_permissions,
+                                  authorship_required, is_community_member)
+from dashboard import models
+from dashboard.benchmarks import BENCHMARKS
+from dashboard.instrumentation import (NO_VIEW, get_request_stats,
+                                       request_stats, reset_request_stats)
+from dashboard.paginator import EstimatedCountPaginator
+from dashboard.management import (create_user_groups,
+                                  content_contributor_permissions,
                                   content_manager_permissions,
                                   user_content_manager_permissions,
                                   community_admin_permissions)
+from dashboard.mail import send_queued_email
+from dashboard.search import (SEARCH_MODELS, search, search_index_sql,
+                              search_vector_sql)
+from dashboard.tags import (MATCH_ALL, MATCH_ANY, filter_by_tags,
+                            get_tag_counts)
+from dashboard.thumbnails import (generate_thumbnails, get_thumbnail_url,
+                                  thumbnail_worker)
+from dashboard.transfer import CommunityImporter, TransferError
 from dashboard.models import (SysterUser, Community, News, Resource, Tag,
-                              ResourceType, CommunityPage, create_syster_user)
+                              ResourceType, CommunityPage, QueuedEmail,
+                              create_syster_user)
 
 
 class DashboardModelsTestCase(TestCase):
@@ -200,6 +246,94 @@ class DashboardModelsTestCase(TestCase):
         self.assertEqual(about_second_dummy_community,
                          second_dummy_community_about)
 
+    def test_community_counters(self):
+        systeruser = SysterUser.objects.create(user=self.auth_user)
+        community = Community.objects.create(name='dummy_community',
+                                             community_admin=systeruser)
+        second_community = Community.objects.create(
+            name='second_dummy_community',
+            community_admin=systeruser,
+            slug='second_community')
+
+        def counters(community):
+            return Community.objects.filter(pk=community.pk).values_list(
+                'members_count', 'news_count', 'resources_count')[0]
+
+        community.members.add(systeruser)
+        systeruser.member_of_community.add(second_community)
+        news = News.objects.create(title='dummy_article', community=community,
+                                   author=systeruser, slug='news')
+        Resource.objects.create(title='dummy_resource', community=community,
+                                author=systeruser, slug='resource')
+        self.assertEqual(counters(community), (1, 1, 1))
+        self.assertEqual(counters(second_community), (1, 0, 0))
+        # Editing an object in place doesn't recount
+        Community.objects.filter(pk=community.pk).update(news_count=0)
+        news.title = 'edited_article'
+        news.save()
+        self.assertEqual(counters(community), (1, 0, 1))
+        news.community = second_community
+        news.save()
+        self.assertEqual(counters(community), (1, 0, 1))
+        self.assertEqual(counters(second_community), (1, 1, 0))
+        news.delete()
+        systeruser.member_of_community.clear()
+        self.assertEqual(counters(community), (0, 0, 1))
+        self.assertEqual(counters(second_community), (0, 0, 0))
+        Community.objects.update(resources_count=0)
+        call_command('update_community_counters', verbosity=0)
+        self.assertEqual(counters(community), (0, 0, 1))
+
+    def test_community_tree(self):
+        systeruser = SysterUser.objects.create(user=self.auth_user)
+        second_user = User.objects.create(username='user2', password='user2')
+        second_systeruser = SysterUser.objects.create(user=second_user)
+        root = Community.objects.create(name='root', slug='root',
+                                        community_admin=systeruser)
+        child = Community.objects.create(name='child', slug='child',
+                                         community_admin=systeruser,
+                                         parent_community=root)
+        grandchild = Community.objects.create(name='grandchild',
+                                              slug='grandchild',
+                                              community_admin=systeruser,
+                                              parent_community=child)
+        root.members.add(systeruser)
+        child.members.add(systeruser, second_systeruser)
+        grandchild.members.add(second_systeruser)
+        root = Community.objects.get(pk=root.pk)
+        child = Community.objects.get(pk=child.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(root.get_descendants()), [child, grandchild])
+        grandchild = Community.objects.get(pk=grandchild.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(grandchild.get_ancestors()), [root, child])
+        with self.assertNumQueries(1):
+            self.assertItemsEqual(root.get_subtree_members(),
+                                  [systeruser, second_systeruser])
+        self.assertItemsEqual(grandchild.get_subtree_members(),
+                              [second_systeruser])
+        self.assertItemsEqual(
+            child.get_subtree_members(include_self=False),
+            [second_systeruser])
+        Community.objects.update(lft=0, rght=0, level=0)
+        call_command('rebuild_community_tree', verbosity=0)
+        self.assertEqual(list(Community.objects.get(
+            pk=root.pk).get_descendants()), [child, grandchild])
+
+    def test_delete_expired_sessions(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key='expired{0}'.format(i),
+                                   session_data='',
+                                   expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='active', session_data='',
+                               expire_date=now + timedelta(days=1))
+        with self.assertNumQueries(7):
+            call_command('delete_expired_sessions', batch_size=2,
+                         verbosity=0)
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)),
+                         ['active'])
+
     def test_signal_registry(self):
         """Test if the function was registered as a signal receiver"""
         registered_funcs = [r[1]() for r in signals.user_signed_up.receivers]
@@ -215,6 +349,47 @@ class DashboardModelsTestCase(TestCase):
         self.assertEqual(len(systerusers), len(users))
         self.assertEqual(len(users), 1)
         self.assertEqual(systerusers[0].user, users[0])
+        create_syster_user(self.test_create_syster_user, **request)
+        self.assertEqual(SysterUser.objects.count(), 1)
+
+    def test_get_for_user(self):
+        syster_user = SysterUser.objects.get_for_user(self.auth_user)
+        self.assertEqual(syster_user.user, self.auth_user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.auth_user.systeruser, syster_user)
+        auth_user = User.objects.get(pk=self.auth_user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(SysterUser.objects.get_for_user(auth_user),
+                             syster_user)
+
+    def test_provision_syster_user_on_login(self):
+        user = User.objects.create_user(username='admin-made',
+                                        password='secret')
+        self.assertFalse(SysterUser.objects.filter(user=user).exists())
+        self.assertTrue(self.client.login(username='admin-made',
+                                          password='secret'))
+        self.assertTrue(SysterUser.objects.filter(user=user).exists())
+        self.client.logout()
+        self.assertTrue(self.client.login(username='admin-made',
+                                          password='secret'))
+        self.assertEqual(SysterUser.objects.filter(user=user).count(), 1)
+
+    def test_provision_syster_users(self):
+        SysterUser.objects.create(user=self.auth_user)
+        User.objects.bulk_create([User(username='user{0}'.format(i))
+                                  for i in range(5)])
+        with CaptureQueriesContext(connection) as context:
+            call_command('provision_syster_users', batch_size=2, verbosity=0)
+        self.assertEqual(len([query for query in context.captured_queries
+                              if 'INSERT INTO' in query['sql']]), 3)
+        self.assertEqual(
+            SysterUser.objects.filter(user__username__startswith='user')
+            .count(), 5)
+        self.assertEqual(SysterUser.objects.provision(), 0)
+        user_ids = User.objects.filter(
+            username='user0').values_list('pk', flat=True)
+        User.objects.create(username='unprovisioned')
+        self.assertEqual(SysterUser.objects.provision(user_ids), 0)
 
     def test_group_permissions(self):
         groups = ["Content Contributor",
@@ -231,9 +406,22 @@ class DashboardModelsTestCase(TestCase):
                                  list(group.permissions.all())]
             self.assertItemsEqual(group_permissions, permissions[i])
 
+    def test_create_user_groups_idempotent(self):
+        group = Group.objects.get(name="Content Contributor")
+        group.permissions.remove(
+            Permission.objects.get(codename="change_resource"))
+        create_user_groups(models, verbosity=0)
+        group_permissions = [p.codename for p in group.permissions.all()]
+        self.assertItemsEqual(group_permissions,
+                              content_contributor_permissions)
+        # savepoint, permissions, groups, group permissions, release
+        with self.assertNumQueries(5):
+            create_user_groups(models, verbosity=0)
+
 
 class DashboardDecoratorsTestCase(TestCase):
     def setUp(self):
+        cache.clear()
         self.auth_user_foo = User.objects.create_user(username="foo",
                                                       password="foobar")
         self.user_foo = SysterUser(user=self.auth_user_foo)
@@ -279,3 +467,941 @@ class DashboardDecoratorsTestCase(TestCase):
                 else:
                     self.assertRaises(PermissionDenied, wrapped, request,
                                       **request_kwargs)
+
+    def test_membership_required_queries(self):
+        request = mock.MagicMock()
+        request.user = self.auth_user_foo
+        view = mock.MagicMock(return_value='foo response')
+        wrapped = membership_required(Resource, "id__exact", "id")(view)
+        with self.assertNumQueries(1):
+            response = wrapped(request, id=self.resource.id)
+        self.assertEqual(response, view.return_value)
+        self.assertRaises(Http404, wrapped, request, id=self.resource.id + 1)
+
+        # the next request reads the answers from the cache
+        request.user = User.objects.get(username="foo")
+        with self.assertNumQueries(0):
+            response = wrapped(request, id=self.resource.id)
+        self.assertEqual(response, view.return_value)
+
+        # and the later checks of the same request from the memo
+        cache.clear()
+        request.user = User.objects.get(username="foo")
+        with self.assertNumQueries(1):
+            wrapped(request, id=self.resource.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_community_member(request, self.community.id))
+
+    def test_admin_required_queries(self):
+        request = mock.MagicMock()
+        request.user = self.auth_user_bar
+        view = mock.MagicMock(return_value='foo response')
+        wrapped = admin_required(Community, "id__exact", "id")(view)
+        with self.assertNumQueries(1):
+            self.assertRaises(PermissionDenied, wrapped, request,
+                              id=self.community.id)
+        request.user = User.objects.get(username="foo")
+        with self.assertNumQueries(1):
+            response = wrapped(request, id=self.community.id)
+        self.assertEqual(response, view.return_value)
+
+    def test_unshared_cache(self):
+        dummy_cache = get_cache("django.core.cache.backends.dummy.DummyCache")
+        request = mock.MagicMock()
+        view = mock.MagicMock(return_value='foo response')
+        wrapped = membership_required(Resource, "id__exact", "id")(view)
+        with mock.patch("dashboard.permissions.versioned_cache",
+                        dummy_cache), \
+                mock.patch("dashboard.cache_versions.versioned_cache",
+                           dummy_cache):
+            for i in range(2):
+                request.user = User.objects.get(username="foo")
+                with self.assertNumQueries(1):
+                    wrapped(request, id=self.resource.id)
+                with self.assertNumQueries(0):
+                    self.assertTrue(is_community_member(request,
+                                                        self.community.id))
+
+    def test_permission_cache_invalidation(self):
+        request = mock.MagicMock()
+        view = mock.MagicMock(return_value='foo response')
+        membership = membership_required(Community, "id__exact", "id")(view)
+        admin = admin_required(Community, "id__exact", "id")(view)
+        authorship = authorship_required(Resource, "id__exact", "id")(view)
+        request.user = self.auth_user_bar
+        self.assertRaises(PermissionDenied, membership, request,
+                          id=self.community.id)
+        self.assertRaises(PermissionDenied, admin, request,
+                          id=self.community.id)
+        self.assertRaises(PermissionDenied, authorship, request,
+                          id=self.resource.id)
+
+        self.community.members.add(self.user_bar)
+        request.user = User.objects.get(username="bar")
+        self.assertEqual(membership(request, id=self.community.id),
+                         view.return_value)
+        self.user_bar.member_of_community.clear()
+        request.user = User.objects.get(username="bar")
+        self.assertRaises(PermissionDenied, membership, request,
+                          id=self.community.id)
+        self.community.community_admin = self.user_bar
+        self.community.save()
+        request.user = User.objects.get(username="bar")
+        self.assertEqual(admin(request, id=self.community.id),
+                         view.return_value)
+        self.resource.author = self.user_bar
+        self.resource.save()
+        self.assertEqual(authorship(request, id=self.resource.id),
+                         view.return_value)
+
+    def test_decorators_pass_object(self):
+        request = mock.MagicMock()
+        request.user = self.auth_user_foo
+        view = mock.MagicMock(return_value='foo response')
+        decorators = [membership_required, admin_required, authorship_required]
+        for decorator in decorators:
+            decorated = decorator(Resource, "id__exact", "id",
+                                  obj_varname="resource")
+            wrapped = decorated(view)
+            self.assertEqual(wrapped(request, id=self.resource.id),
+                             view.return_value)
+            view.assert_called_with(request, id=self.resource.id,
+                                    resource=self.resource)
+            with self.assertNumQueries(1):
+                wrapped(request, id=self.resource.id)
+            self.assertRaises(Http404, wrapped, request,
+                              id=self.resource.id + 1)
+
+
+class DashboardSearchTestCase(TestCase):
+    def setUp(self):
+        auth_user = User.objects.create(username='foo', password='foobar')
+        self.systeruser = SysterUser.objects.create(user=auth_user)
+        self.community = Community.objects.create(
+            name='dummy_community', community_admin=self.systeruser)
+        self.tag = Tag.objects.create(name='mentorship')
+        self.news = News.objects.create(title='Mentors wanted',
+                                        community=self.community,
+                                        author=self.systeruser,
+                                        content='Apply as a mentor',
+                                        slug='mentors')
+        self.news.tags.add(self.tag)
+        self.resource = Resource.objects.create(title='Mentors guide',
+                                                community=self.community,
+                                                author=self.systeruser,
+                                                content='How to be a mentor',
+                                                slug='guide',
+                                                is_public=False)
+
+    def test_search(self):
+        def titles(results):
+            return [result.title for result in results]
+
+        self.assertEqual(titles(search(self.community, 'mentor')),
+                         ['Mentors wanted'])
+        self.assertItemsEqual(
+            titles(search(self.community, 'mentor', public_only=False)),
+            ['Mentors wanted', 'Mentors guide'])
+        self.assertEqual(
+            titles(search(self.community, 'mentor', tags=['mentorship'],
+                          public_only=False)),
+            ['Mentors wanted'])
+        self.assertEqual(search(self.community, 'unrelated'), [])
+
+    @skipUnless(connection.vendor == 'postgresql',
+                'Full-text search is only indexed on PostgreSQL')
+    def test_postgresql_search(self):
+        News.objects.create(title='Weekly digest', community=self.community,
+                            author=self.systeruser,
+                            content='Say hi to our new mentor',
+                            slug='digest')
+        results = search(self.community, 'mentoring')
+        # matches in the title are weighted above matches in the content
+        self.assertEqual([result.title for result in results],
+                         ['Mentors wanted', 'Weekly digest'])
+        self.assertGreater(results[0].rank, results[1].rank)
+
+        cursor = connection.cursor()
+        for model in SEARCH_MODELS:
+            name, sql = search_index_sql(model)
+            cursor.execute("SELECT indexdef FROM pg_indexes "
+                           "WHERE indexname = %s", [name])
+            self.assertIn("USING gin", cursor.fetchone()[0])
+        # the search expression matches the indexed one
+        cursor.execute("SET enable_seqscan = off")
+        cursor.execute("EXPLAIN SELECT id FROM dashboard_news WHERE "
+                       "{0} @@ plainto_tsquery('english', %s)".format(
+                           search_vector_sql()), ['mentor'])
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn(search_index_sql(News)[0], plan)
+
+
+class DashboardAPITestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='foo')
+        self.user.set_password('foobar')
+        self.user.save()
+        self.systeruser = SysterUser.objects.create(user=self.user)
+        self.community = Community.objects.create(
+            name='api', slug='api', community_admin=self.systeruser)
+        self.community.members.add(self.systeruser)
+        self.tag = Tag.objects.create(name='mentorship')
+        self.resource_type = ResourceType.objects.create(name='guide')
+        today = timezone.now().date()
+        for i in range(7):
+            news = News.objects.create(title='News {0}'.format(i),
+                                       slug='news-{0}'.format(i),
+                                       community=self.community,
+                                       author=self.systeruser,
+                                       content='content', is_public=i != 3)
+            if i % 2:
+                news.tags.add(self.tag)
+        # two News share each date, so the pages split ties by id
+        for news in News.objects.all():
+            News.objects.filter(pk=news.pk).update(
+                date_created=today - timedelta(days=int(news.slug[-1]) // 2))
+        Resource.objects.create(title='Guide', slug='guide',
+                                community=self.community,
+                                author=self.systeruser, content='content',
+                                resource_type=self.resource_type)
+        Resource.objects.create(title='Other', slug='other',
+                                community=self.community,
+                                author=self.systeruser, content='content')
+
+    def get_pages(self, url, **params):
+        slugs = []
+        params['limit'] = 2
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.content)
+            slugs.extend(result['slug'] for result in data['results'])
+            if data['next'] is None:
+                return slugs
+            params['cursor'] = data['next']
+
+    def test_news_list(self):
+        url = reverse('api_news_list', args=['api'])
+        self.assertEqual(self.get_pages(url),
+                         ['news-1', 'news-0', 'news-2', 'news-5', 'news-4',
+                          'news-6'])
+        self.assertEqual(self.get_pages(url, tag='mentorship'),
+                         ['news-1', 'news-5'])
+        self.client.login(username='foo', password='foobar')
+        self.assertEqual(self.get_pages(url),
+                         ['news-1', 'news-0', 'news-3', 'news-2', 'news-5',
+                          'news-4', 'news-6'])
+        response = self.client.get(url, {'limit': 1})
+        result = json.loads(response.content)['results'][0]
+        self.assertEqual(result, {
+            'title': 'News 1', 'slug': 'news-1', 'author': 'foo',
+            'date_created': result['date_created'],
+            'date_modified': result['date_modified'], 'is_public': True,
+            'tags': ['mentorship']})
+
+        # a deep page is one query for the objects and one for their tags,
+        # besides the ones for the session and the logged in user
+        cursor = json.loads(self.client.get(url, {'limit': 4}).content)[
+            'next']
+        with self.assertNumQueries(4):
+            self.client.get(url, {'limit': 2, 'cursor': cursor})
+        self.assertEqual(self.client.get(url, {'cursor': 'bad'}).status_code,
+                         400)
+        self.assertEqual(self.client.get(url, {'limit': 0}).status_code, 400)
+        self.assertEqual(self.client.get(
+            reverse('api_news_list', args=['missing'])).status_code, 404)
+
+    def test_resource_list(self):
+        url = reverse('api_resource_list', args=['api'])
+        self.assertItemsEqual(self.get_pages(url), ['guide', 'other'])
+        self.assertEqual(self.get_pages(url, resource_type='guide'),
+                         ['guide'])
+        response = self.client.get(url, {'resource_type': 'guide'})
+        self.assertEqual(json.loads(response.content)['results'][0][
+            'resource_type'], 'guide')
+
+
+class DashboardTagsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        auth_user = User.objects.create(username='foo', password='foobar')
+        self.systeruser = SysterUser.objects.create(user=auth_user)
+        self.community = Community.objects.create(
+            name='tags', slug='tags', community_admin=self.systeruser)
+        self.python = Tag.objects.create(name='python')
+        self.django = Tag.objects.create(name='django')
+        self.news = []
+        for i, tags in enumerate([[self.python, self.django], [self.python],
+                                  [self.django], []]):
+            news = News.objects.create(title='News {0}'.format(i),
+                                       slug='news-{0}'.format(i),
+                                       community=self.community,
+                                       author=self.systeruser,
+                                       content='content', is_public=i != 1)
+            news.tags.add(*tags)
+            self.news.append(news)
+        self.resource = Resource.objects.create(title='Guide', slug='guide',
+                                                community=self.community,
+                                                author=self.systeruser,
+                                                content='content')
+        self.resource.tags.add(self.python)
+
+    def test_filter_by_tags(self):
+        def slugs(tags, match):
+            with self.assertNumQueries(1):
+                return sorted(filter_by_tags(
+                    News.objects.all(), tags, match).values_list('slug',
+                                                                 flat=True))
+
+        self.assertEqual(slugs(['python', 'django'], MATCH_ANY),
+                         ['news-0', 'news-1', 'news-2'])
+        self.assertEqual(slugs(['python', 'django'], MATCH_ALL), ['news-0'])
+        self.assertEqual(slugs(['python', 'python'], MATCH_ALL),
+                         ['news-0', 'news-1'])
+        self.assertEqual(slugs(['python', 'missing'], MATCH_ALL), [])
+        self.assertEqual(len(slugs([], MATCH_ALL)), 4)
+        self.assertRaises(ValueError, filter_by_tags, News.objects.all(),
+                          ['python'], 'some')
+
+    def test_tag_counts(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(get_tag_counts(self.community.pk),
+                             [('django', 2), ('python', 2)])
+        with self.assertNumQueries(0):
+            get_tag_counts(self.community.pk)
+        self.news[3].content = 'edited'
+        self.news[3].save()
+        with self.assertNumQueries(0):
+            get_tag_counts(self.community.pk)
+        self.assertEqual(get_tag_counts(self.community.pk, public_only=False),
+                         [('python', 3), ('django', 2)])
+
+        self.news[3].tags.add(self.django)
+        self.assertEqual(get_tag_counts(self.community.pk),
+                         [('django', 3), ('python', 2)])
+        self.django.news_set.clear()
+        self.assertEqual(get_tag_counts(self.community.pk), [('python', 2)])
+        self.python.resource_set.remove(self.resource)
+        self.assertEqual(get_tag_counts(self.community.pk), [('python', 1)])
+        self.news[0].delete()
+        self.assertEqual(get_tag_counts(self.community.pk), [])
+        self.news[1].is_public = True
+        self.news[1].save()
+        self.assertEqual(get_tag_counts(self.community.pk), [('python', 1)])
+        self.python.name = 'py'
+        self.python.save()
+        self.assertEqual(get_tag_counts(self.community.pk), [('py', 1)])
+
+    def test_tag_api(self):
+        url = reverse('api_news_list', args=['tags'])
+        response = self.client.get(url, {'tag': ['python', 'django'],
+                                         'tag_match': 'any'})
+        self.assertItemsEqual([result['slug'] for result in json.loads(
+            response.content)['results']], ['news-0', 'news-2'])
+        response = self.client.get(url, {'tag': ['python', 'django']})
+        self.assertEqual([result['slug'] for result in json.loads(
+            response.content)['results']], ['news-0'])
+        self.assertEqual(self.client.get(url, {'tag': 'python',
+                                               'tag_match': 'x'}).status_code,
+                         400)
+        response = self.client.get(reverse('api_tag_counts', args=['tags']))
+        self.assertEqual(json.loads(response.content)['results'],
+                         [{'name': 'django', 'count': 2},
+                          {'name': 'python', 'count': 2}])
+
+
+class DashboardFeedsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        auth_user = User.objects.create(username='foo', password='foobar')
+        self.systeruser = SysterUser.objects.create(user=auth_user)
+        self.community = Community.objects.create(
+            name='Feeds', slug='feeds', community_admin=self.systeruser)
+        self.tag = Tag.objects.create(name='python')
+        self.news = News.objects.create(title='Public news', slug='public',
+                                        community=self.community,
+                                        author=self.systeruser,
+                                        content='content')
+        self.news.tags.add(self.tag)
+        News.objects.create(title='Private news', slug='private',
+                            community=self.community, author=self.systeruser,
+                            content='content', is_public=False)
+        Resource.objects.create(title='Public resource', slug='resource',
+                                community=self.community,
+                                author=self.systeruser, content='content')
+
+    def test_feeds(self):
+        response = self.client.get(reverse('community_rss', args=['feeds']))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Public news', response.content)
+        self.assertIn('Public resource', response.content)
+        self.assertNotIn('Private news', response.content)
+        response = self.client.get(reverse('community_tag_atom',
+                                           args=['feeds', 'python']))
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/atom+xml'))
+        self.assertIn('Public news', response.content)
+        self.assertNotIn('Public resource', response.content)
+        self.assertEqual(self.client.get(reverse(
+            'community_rss', args=['missing'])).status_code, 404)
+
+    def test_conditional_get(self):
+        url = reverse('community_rss', args=['feeds'])
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        with self.assertNumQueries(0):
+            response = self.client.get(url,
+                                       HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+        self.news.title = 'Updated news'
+        self.news.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Updated news', response.content)
+        self.assertNotEqual(response['ETag'], etag)
+        self.news.tags.clear()
+        response = self.client.get(
+            reverse('community_tag_rss', args=['feeds', 'python']))
+        self.assertNotIn('Updated news', response.content)
+
+    @override_settings(DASHBOARD_SHARED_CACHE=False)
+    def test_conditional_get_unshared_cache(self):
+        # the items changed before today, so the feed has been the same
+        # since yesterday ended
+        yesterday = timezone.now().date() - timedelta(days=1)
+        News.objects.update(date_created=yesterday, date_modified=yesterday)
+        Resource.objects.update(date_created=yesterday,
+                                date_modified=yesterday)
+        url = reverse('community_rss', args=['feeds'])
+        dummy_cache = get_cache("django.core.cache.backends.dummy.DummyCache")
+        with mock.patch("dashboard.feed_cache.versioned_cache",
+                        dummy_cache), \
+                mock.patch("dashboard.cache_versions.versioned_cache",
+                           dummy_cache):
+            response = self.client.get(url)
+            etag, last_modified = response['ETag'], response['Last-Modified']
+            today = timezone.now().date()
+            self.assertEqual(parse_http_date(last_modified),
+                             calendar.timegm(today.timetuple()))
+            self.assertEqual(self.client.get(url)['ETag'], etag)
+            # one query for the community and one for the items of each
+            # model, the feed isn't built
+            with self.assertNumQueries(3):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 304)
+
+            self.news.title = 'Updated news'
+            self.news.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Updated news', response.content)
+            self.assertEqual(self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+
+class DashboardThumbnailsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.storage = FileSystemStorage(location=media_root,
+                                         base_url='/media/')
+        patcher = mock.patch('dashboard.thumbnails.default_storage',
+                             self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        picture = BytesIO()
+        Image.new('RGB', (400, 300), (200, 0, 0)).save(picture, 'PNG')
+        self.name = self.storage.save('photos/ada.png',
+                                      ContentFile(picture.getvalue()))
+        user = User.objects.create(username='ada')
+        self.systeruser = SysterUser.objects.create(user=user)
+        self.pattern = r'^/media/photos/ada\.[0-9a-f]{12}\.%s\.jpg$'
+
+    def test_thumbnail_urls(self):
+        self.assertEqual(get_thumbnail_url(None, 'small'),
+                         '/static/dashboard/img/dummy-small.jpeg')
+        self.assertEqual(get_thumbnail_url(self.name, 'small'),
+                         '/static/dashboard/img/dummy-small.jpeg')
+        thumbnail_worker.join()
+        url = get_thumbnail_url(self.name, 'small')
+        self.assertRegexpMatches(url, self.pattern % 'small')
+        with self.storage.open(url[len('/media/'):]) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (48, 48))
+        self.assertRaises(ValueError, get_thumbnail_url, self.name, 'huge')
+
+        files = self.storage.listdir('photos')[1]
+        self.assertEqual(len(files), 4)
+        self.assertEqual(generate_thumbnails(self.name).keys(),
+                         generate_thumbnails(self.name).keys())
+        self.assertEqual(self.storage.listdir('photos')[1], files)
+
+        broken = self.storage.save('photos/broken.jpg',
+                                   ContentFile('not a picture'))
+        with mock.patch('dashboard.thumbnails.logger') as logger:
+            self.assertEqual(generate_thumbnails(broken), {})
+        self.assertTrue(logger.warning.called)
+        self.assertEqual(get_thumbnail_url(broken, 'large'),
+                         '/static/dashboard/img/dummy-large.jpeg')
+
+    def test_upload_and_template_tag(self):
+        template = Template('{% load thumbnails %}'
+                            '{% profile_picture_url syster_user "medium" %}')
+        context = Context({'syster_user': self.systeruser})
+        self.assertEqual(template.render(context),
+                         '/static/dashboard/img/dummy-medium.jpeg')
+        self.systeruser.profile_picture = self.name
+        self.systeruser.save()
+        thumbnail_worker.join()
+        self.assertRegexpMatches(template.render(context),
+                                 self.pattern % 'medium')
+
+        cache.clear()
+        stdout = StringIO()
+        call_command('generate_thumbnails', stdout=stdout)
+        self.assertIn('thumbnails of 1 pictures', stdout.getvalue())
+        self.assertNotIn('dummy', template.render(context))
+
+
+class FakeSMTPServer(smtpd.SMTPServer, threading.Thread):
+
+    """Local SMTP server collecting the received messages in a thread, which
+    can be told to refuse recipients.
+    """
+    def __init__(self):
+        threading.Thread.__init__(self)
+        smtpd.SMTPServer.__init__(self, ('127.0.0.1', 0), None)
+        self.port = self.socket.getsockname()[1]
+        self.messages = []
+        self.refused = set()
+        self.active = True
+        self.daemon = True
+
+    def process_message(self, peer, mailfrom, rcpttos, data):
+        if self.refused.intersection(rcpttos):
+            return '550 Refused'
+        self.messages.append((mailfrom, rcpttos, data))
+
+    def run(self):
+        while self.active:
+            asyncore.loop(timeout=0.1, count=1, map=self._map)
+
+    def stop(self):
+        if self.active:
+            self.active = False
+            self.join()
+            self.close()
+
+
+class DashboardMailTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeSMTPServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.settings = self.settings(
+            EMAIL_BACKEND='dashboard.mail.QueuedEmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.server.port,
+            EMAIL_USE_TLS=False, EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='')
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def test_queued_email(self):
+        self.assertEqual(send_mail('Hello', 'Body', 'portal@example.com',
+                                   ['ada@example.com', 'grace@example.com']),
+                         1)
+        send_mail('Refused', 'Body', 'portal@example.com',
+                  ['refused@example.com'])
+        self.assertEqual(self.server.messages, [])
+        self.assertEqual(QueuedEmail.objects.count(), 2)
+
+        self.server.refused.add('refused@example.com')
+        stdout = StringIO()
+        with mock.patch('smtplib.SMTP', wraps=smtplib.SMTP) as smtp:
+            call_command('send_queued_email', stdout=stdout)
+        self.assertEqual(smtp.call_count, 1)
+        self.assertIn('Sent 1 emails, 1 failed', stdout.getvalue())
+        mailfrom, rcpttos, data = self.server.messages[0]
+        self.assertEqual(rcpttos, ['ada@example.com', 'grace@example.com'])
+        self.assertIn('Subject: Hello', data)
+
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('Refused', email.last_error)
+        self.assertGreater(email.next_attempt, timezone.now())
+        # not due yet
+        self.assertEqual(send_queued_email(), (0, 0))
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(send_queued_email(max_attempts=2), (0, 1))
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.attempts, 2)
+        self.assertIsNone(email.next_attempt)
+
+        self.server.refused.clear()
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(send_queued_email(), (1, 0))
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_rate_limit(self):
+        for i in range(3):
+            send_mail('Hello', 'Body', 'portal@example.com',
+                      ['ada@example.com'])
+        start = time.time()
+        self.assertEqual(send_queued_email(batch_size=2, rate=20), (3, 0))
+        self.assertGreaterEqual(time.time() - start, 0.1)
+        self.assertEqual(len(self.server.messages), 3)
+
+    def test_server_down(self):
+        send_mail('Hello', 'Body', 'portal@example.com', ['ada@example.com'])
+        self.server.stop()
+        self.assertRaises(CommandError, call_command, 'send_queued_email',
+                          verbosity=0)
+        self.assertEqual(QueuedEmail.objects.get().attempts, 0)
+
+    def test_server_disconnects(self):
+        for i in range(3):
+            send_mail('Hello {0}'.format(i), 'Body', 'portal@example.com',
+                      ['ada@example.com'])
+        first, second, third = QueuedEmail.objects.order_by('pk')
+        sendmail = smtplib.SMTP.sendmail
+        calls = []
+
+        def disconnect(smtp, *args):
+            calls.append(args)
+            if len(calls) == 2:
+                self.server.stop()
+                smtp.close()
+                raise smtplib.SMTPServerDisconnected('Connection lost')
+            return sendmail(smtp, *args)
+
+        with mock.patch('smtplib.SMTP.sendmail', disconnect):
+            self.assertRaises(socket.error, send_queued_email)
+        self.assertEqual(len(self.server.messages), 1)
+        # the sent email is gone, the one that was being sent is retried and
+        # the one after it wasn't tried
+        self.assertFalse(QueuedEmail.objects.filter(pk=first.pk).exists())
+        self.assertEqual(QueuedEmail.objects.get(pk=second.pk).attempts, 1)
+        self.assertEqual(QueuedEmail.objects.get(pk=third.pk).attempts, 0)
+
+        server = FakeSMTPServer()
+        server.start()
+        self.addCleanup(server.stop)
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        with override_settings(EMAIL_PORT=server.port):
+            self.assertEqual(send_queued_email(), (2, 0))
+        self.assertEqual([data.split('Subject: ')[1].split('\n')[0]
+                          for mailfrom, rcpttos, data in server.messages],
+                         ['Hello 1', 'Hello 2'])
+        self.assertFalse(QueuedEmail.objects.exists())
+
+
+class DashboardAdminTestCase(TestCase):
+    def setUp(self):
+        self.auth_user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        self.systeruser = SysterUser.objects.create(user=self.auth_user)
+        self.client.login(username='admin', password='admin')
+
+    def create_content(self, start, stop):
+        for i in range(start, stop):
+            auth_user = User.objects.create(username='user{0}'.format(i))
+            systeruser = SysterUser.objects.create(user=auth_user)
+            community = Community.objects.create(
+                name='community{0}'.format(i), slug='community{0}'.format(i),
+                community_admin=systeruser)
+            News.objects.create(title='news{0}'.format(i),
+                                community=community, author=systeruser,
+                                slug='news{0}'.format(i))
+            Resource.objects.create(title='resource{0}'.format(i),
+                                    community=community, author=systeruser,
+                                    slug='resource{0}'.format(i))
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_changelist_queries(self):
+        """Test that the number of queries doesn't grow with the rows"""
+        urls = ['/admin/dashboard/systeruser/',
+                '/admin/dashboard/news/',
+                '/admin/dashboard/resource/']
+        self.create_content(0, 1)
+        # the first requests also fill the site and CMS caches
+        [self.count_queries(url) for url in urls]
+        queries = [self.count_queries(url) for url in urls]
+        self.create_content(1, 6)
+        self.assertEqual([self.count_queries(url) for url in urls], queries)
+
+    def test_changelist_filters(self):
+        self.create_content(0, 3)
+        response = self.client.get('/admin/dashboard/news/?is_public__exact=1'
+                                   '&q=news1')
+        self.assertEqual(response.status_code, 200)
+        result_list = response.context['cl'].result_list
+        self.assertEqual([news.slug for news in result_list], ['news1'])
+        self.assertNotIn('content', result_list[0].__dict__)
+        self.assertEqual(response.context['cl'].full_result_count, 3)
+
+    def test_change_form_widgets(self):
+        self.create_content(0, 1)
+        news = News.objects.get()
+        response = self.client.get(
+            '/admin/dashboard/news/{0}/'.format(news.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'vForeignKeyRawIdAdminField', count=2)
+        self.assertContains(response, 'vManyToManyRawIdAdminField')
+
+    def test_estimated_count_paginator(self):
+        self.create_content(0, 2)
+        estimate = ('dashboard.paginator.EstimatedCountPaginator.'
+                    'estimate_count')
+        with mock.patch(estimate, return_value=1000000):
+            paginator = EstimatedCountPaginator(News.objects.all(), 100)
+            self.assertEqual(paginator.count, 1000000)
+        with mock.patch(estimate, return_value=10):
+            paginator = EstimatedCountPaginator(News.objects.all(), 100)
+            self.assertEqual(paginator.count, 2)
+        paginator = EstimatedCountPaginator(
+            News.objects.filter(slug='news1'), 100)
+        self.assertEqual(paginator.count, 1)
+
+    def test_systeruser_unicode(self):
+        systeruser = SysterUser.objects.get(pk=self.systeruser.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(unicode(systeruser), 'admin')
+
+
+class DashboardPageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        auth_user = User.objects.create(username='foo')
+        systeruser = SysterUser.objects.create(user=auth_user)
+        community = Community.objects.create(name='Foo', slug='foo',
+                                             community_admin=systeruser)
+        self.page = create_page('About', 'page_template.html', 'en-us',
+                                published=True)
+        self.community_page = CommunityPage.objects.create(
+            title='About', page=self.page, community=community)
+        self.url = self.page.get_absolute_url()
+
+    def test_anonymous_page_cached(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(self.url)
+        self.assertEqual(cached_response.status_code, 200)
+        self.assertEqual(cached_response.content, response.content)
+
+    def test_publish_invalidates_page(self):
+        self.client.get(self.url)
+        title = self.page.title_set.get()
+        title.title = 'About us'
+        title.save()
+        with self.assertNumQueries(0):
+            self.assertNotContains(self.client.get(self.url), 'About us')
+        self.page.publish('en-us')
+        self.assertContains(self.client.get(self.url), 'About us')
+
+    def test_community_page_invalidates_page(self):
+        self.client.get(self.url)
+        self.community_page.delete()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        self.assertNotEqual(len(context), 0)
+
+    def test_authenticated_page_not_cached(self):
+        User.objects.create_user(username='bar', password='bar')
+        self.client.login(username='bar', password='bar')
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        self.assertNotEqual(len(context), 0)
+
+
+class DashboardMiddlewareTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_page('About', 'page_template.html', 'en-us', published=True)
+
+    def test_cms_middleware_skipped(self):
+        response = self.client.get('/accounts/password/reset/')
+        self.assertFalse(hasattr(response.context['request'], 'toolbar'))
+        self.assertNotIn(settings.LANGUAGE_COOKIE_NAME, response.cookies)
+        response = self.client.get('/')
+        self.assertTrue(hasattr(response.context['request'], 'toolbar'))
+        self.assertIn(settings.LANGUAGE_COOKIE_NAME, response.cookies)
+
+    def test_measure_middleware(self):
+        stdout = StringIO()
+        call_command('measure_middleware', '/', '/accounts/password/reset/',
+                     requests=2, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn('/accounts/password/reset/ (200, 2 requests)', output)
+        for middleware in settings.MIDDLEWARE_CLASSES:
+            self.assertEqual(output.count(middleware), 2)
+
+
+class DashboardInstrumentationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        request_stats.flush()
+        reset_request_stats()
+        create_page('About', 'page_template.html', 'en-us', published=True)
+
+    def test_request_metrics(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/')
+        metrics = response.context['request']._metrics
+        self.assertEqual(metrics.view, 'cms.views.details')
+        self.assertEqual(metrics.sql_count, len(context))
+        self.assertGreater(metrics.render_time, 0)
+        self.assertGreaterEqual(metrics.total_time,
+                                metrics.sql_time + metrics.render_time)
+        self.assertFalse(connection.use_debug_cursor)
+
+    def test_slow_request_logged(self):
+        with mock.patch('dashboard.instrumentation.SLOW_REQUEST_THRESHOLD',
+                        0):
+            with mock.patch('dashboard.instrumentation.logger') as logger:
+                self.client.get('/')
+        self.assertEqual(logger.warning.call_count, 1)
+        self.assertIn('SELECT', logger.warning.call_args[0][-1])
+
+    def test_request_stats(self):
+        for i in range(3):
+            self.client.get('/')
+        self.client.get('/accounts/password/reset/')
+        request_stats.flush()
+        stats = dict((view_stats['view'], view_stats)
+                     for view_stats in get_request_stats())
+        # the page is served from the page cache after the first request
+        self.assertEqual(stats['cms.views.details']['count'], 1)
+        self.assertEqual(stats[NO_VIEW]['count'], 2)
+        self.assertEqual(
+            stats['allauth.account.views.PasswordResetView']['count'], 1)
+        stdout = StringIO()
+        call_command('request_stats', reset=True, stdout=stdout)
+        self.assertIn('cms.views.details', stdout.getvalue())
+        self.assertEqual(get_request_stats(), [])
+
+
+class DashboardDatasetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command('seed_dataset', users=20, communities=10, roots=2,
+                     children=2, members=5, news=3, resources=2, tags=4,
+                     resource_types=2, verbosity=0)
+
+    def test_seed_dataset(self):
+        self.assertEqual(SysterUser.objects.count(), 20)
+        self.assertEqual(News.objects.count(), 30)
+        self.assertEqual(Resource.objects.count(), 20)
+        self.assertEqual(CommunityPage.objects.count(), 2)
+        roots = Community.objects.filter(parent_community=None)
+        self.assertEqual(sum(root.get_descendant_count() for root in roots),
+                         8)
+        for root in roots:
+            self.assertEqual(root.members_count, 5)
+            self.assertEqual(root.news_count, 3)
+            self.assertEqual(len(root.get_children()), 2)
+        tree = dict((community.pk, list(community.get_descendants()))
+                    for community in Community.objects.all())
+        Community.objects.rebuild()
+        self.assertEqual(dict((community.pk,
+                               list(community.get_descendants()))
+                              for community in Community.objects.all()),
+                         tree)
+        self.assertRaises(CommandError, call_command, 'seed_dataset',
+                          verbosity=0)
+
+    def test_run_benchmarks(self):
+        stdout = StringIO()
+        call_command('run_benchmarks', repeat=1, stdout=stdout)
+        output = stdout.getvalue()
+        for name, benchmark in BENCHMARKS:
+            self.assertIn(name, output)
+
+    def test_export_import_community(self):
+        community = Community.objects.get(slug='seed-community1')
+        community.news_set.update(
+            date_created=timezone.now().date() - timedelta(days=3))
+        news = dict((obj.slug, (obj.title, obj.author_id, obj.date_created,
+                                sorted(obj.tags.values_list('name',
+                                                            flat=True))))
+                    for obj in community.news_set.all())
+        resource_types = dict(community.resource_set.values_list(
+            'slug', 'resource_type__name'))
+        usernames = set(community.members.values_list('user__username',
+                                                      flat=True))
+        usernames.add(community.community_admin.user.username)
+        for model in (News, Resource):
+            usernames.update(model.objects.filter(
+                community=community).values_list('author__user__username',
+                                                 flat=True))
+        output = StringIO()
+        call_command('export_community', 'seed-community1', batch_size=2,
+                     stdout=output, verbosity=0)
+        lines = output.getvalue().splitlines()
+        records = [json.loads(line) for line in lines]
+        types = [record['type'] for record in records]
+        self.assertItemsEqual([record['username'] for record in records
+                               if record['type'] == 'user'], usernames)
+        self.assertEqual(types.count('community'), 1)
+        self.assertEqual(types.count('member'), 5)
+        self.assertEqual(types.count('news'), 3)
+        self.assertEqual(types.count('resource'), 2)
+        community.delete()
+        ResourceType.objects.all().delete()
+        self.assertFalse(News.objects.filter(slug__in=news).exists())
+
+        import_file = StringIO("\n".join(lines))
+        stdout = StringIO()
+        with mock.patch('sys.stdin', import_file):
+            call_command('import_community', '-', batch_size=2,
+                         stdout=stdout)
+        self.assertIn('records/s', stdout.getvalue())
+        community = Community.objects.get(slug='seed-community1')
+        self.assertEqual(community.members_count, 5)
+        self.assertEqual(community.news_count, 3)
+        self.assertEqual(community.resources_count, 2)
+        self.assertEqual(dict(
+            (obj.slug, (obj.title, obj.author_id, obj.date_created,
+                        sorted(obj.tags.values_list('name', flat=True))))
+            for obj in community.news_set.all()), news)
+        self.assertEqual(dict(community.resource_set.values_list(
+            'slug', 'resource_type__name')), resource_types)
+
+        # importing again only finds existing records
+        importer = CommunityImporter(batch_size=2)
+        counts = importer.run(lines)
+        self.assertEqual(counts, {'user': 0, 'community': 0, 'member': 0,
+                                  'news': 0, 'resource': 0})
+        self.assertRaises(TransferError, CommunityImporter().run,
+                          ['{"type": "news", "slug": "x"}'])
+
+        # the cached tag counts and feeds of the community are invalidated
+        tag_counts = get_tag_counts(community.pk, public_only=False)
+        feed_url = reverse('community_rss', args=[community.slug])
+        feed = self.client.get(feed_url).content
+        record = [record for record in records if record['type'] == 'news'][0]
+        record.update(slug='imported', title='Imported', is_public=True,
+                      tags=['imported'])
+        CommunityImporter().run([lines[types.index('community')],
+                                 json.dumps(record)])
+        self.assertItemsEqual(get_tag_counts(community.pk, public_only=False),
+                              tag_counts + [('imported', 1)])
+        self.assertNotEqual(self.client.get(feed_url).content, feed)
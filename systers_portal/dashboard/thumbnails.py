@@ -0,0 +1,187 @@
+import hashlib
+import logging
+import os
+import threading
+from io import BytesIO
+from Queue import Queue
+
+from django.conf import settings
+from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+# Names and edge lengths in pixels of the square thumbnails, a pre-sized
+# dashboard/img/dummy-<name>.jpeg static file has to exist for every name
+THUMBNAIL_SIZES = getattr(settings, "DASHBOARD_THUMBNAIL_SIZES",
+                          (("small", 48), ("medium", 96), ("large", 200)))
+
+THUMBNAIL_QUALITY = 85
+
+DUMMY_PICTURE = "photos/dummy.jpeg"
+
+# Seconds before generating the thumbnails of a picture that couldn't be read
+# is tried again
+FAILURE_TIMEOUT = 3600
+
+
+def thumbnail_name(name, content_hash, size_name):
+    """Return the name of a thumbnail, next to the original picture.
+
+    >>> thumbnail_name("photos/ada.png", "0123456789abcdef", "small")
+    'photos/ada.0123456789ab.small.jpg'
+    """
+    root, ext = os.path.splitext(name)
+    return "{0}.{1}.{2}.jpg".format(root, content_hash[:12], size_name)
+
+
+def _thumbnails_key(name):
+    return "dashboard:thumbnails:{0}".format(
+        hashlib.md5(name.encode("utf-8")).hexdigest())
+
+
+def dummy_thumbnail_url(size_name):
+    """Return the URL of the shared pre-sized dummy picture"""
+    return static("dashboard/img/dummy-{0}.jpeg".format(size_name))
+
+
+def make_thumbnail(image, size):
+    """Crop an image to a square around its center and scale it down.
+
+    :param image: PIL Image object
+    :param size: integer edge length in pixels
+    :returns: string JPEG data
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    thumbnail = ImageOps.fit(image, (size, size), Image.ANTIALIAS)
+    output = BytesIO()
+    thumbnail.save(output, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def generate_thumbnails(name, storage=None):
+    """Generate the missing thumbnails of a picture in all sizes and remember
+    their names in the cache.
+
+    The thumbnails are named after a hash of the picture content, so a
+    changed picture never gets the thumbnails of the previous one and they can
+    be cached by browsers for good.
+
+    :param name: string storage name of the picture
+    :param storage: Storage object of the picture and the thumbnails, the
+                    default storage if None
+    :returns: dictionary mapping size names to thumbnail storage names, empty
+              if the picture can't be read
+    """
+    storage = storage or default_storage
+    names = {}
+    try:
+        with storage.open(name) as picture:
+            content = picture.read()
+        content_hash = hashlib.sha1(content).hexdigest()
+        image = None
+        for size_name, size in THUMBNAIL_SIZES:
+            names[size_name] = thumbnail_name(name, content_hash, size_name)
+            if storage.exists(names[size_name]):
+                continue
+            if image is None:
+                image = Image.open(BytesIO(content))
+                image.load()
+            storage.save(names[size_name],
+                         ContentFile(make_thumbnail(image, size)))
+    except (IOError, OSError):
+        logger.warning("Can't generate the thumbnails of %s", name,
+                       exc_info=True)
+        cache.set(_thumbnails_key(name), {}, FAILURE_TIMEOUT)
+        return {}
+    cache.set(_thumbnails_key(name), names, None)
+    return names
+
+
+class ThumbnailWorker(object):
+
+    """Generate thumbnails in a background thread of the process, so uploads
+    and pages listing pictures don't wait for them. The thread is started by
+    the first queued picture and a picture is queued only once until its
+    thumbnails are done.
+    """
+    def __init__(self):
+        self.queue = Queue()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def put(self, name):
+        """Queue the generation of the thumbnails of a picture.
+
+        :param name: string storage name of the picture
+        """
+        with self.lock:
+            if name in self.pending:
+                return
+            self.pending.add(name)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run,
+                                               name="thumbnails")
+                self.thread.daemon = True
+                self.thread.start()
+        self.queue.put(name)
+
+    def run(self):
+        while True:
+            name = self.queue.get()
+            try:
+                generate_thumbnails(name)
+            except Exception:
+                logger.exception("Thumbnail generation of %s failed", name)
+            finally:
+                with self.lock:
+                    self.pending.discard(name)
+                self.queue.task_done()
+
+    def join(self):
+        """Wait until all queued thumbnails are generated"""
+        self.queue.join()
+
+
+thumbnail_worker = ThumbnailWorker()
+
+
+def queue_thumbnails(name):
+    """Generate the thumbnails of a picture in the background, unless they
+    are known already.
+
+    :param name: string storage name of the picture
+    """
+    if (name and name != DUMMY_PICTURE and
+            cache.get(_thumbnails_key(name)) is None):
+        thumbnail_worker.put(name)
+
+
+def get_thumbnail_url(name, size_name):
+    """Return the URL of the thumbnail of a picture in a size.
+
+    Until the thumbnails of the picture are generated, they are queued and
+    the URL of the dummy picture of the size is returned.
+
+    :param name: string storage name of the picture or None
+    :param size_name: string name of a size of THUMBNAIL_SIZES
+    :returns: string URL
+    :raises ValueError: if the size is unknown
+    """
+    if size_name not in dict(THUMBNAIL_SIZES):
+        raise ValueError("Unknown thumbnail size '{0}'".format(size_name))
+    if not name or name == DUMMY_PICTURE:
+        return dummy_thumbnail_url(size_name)
+    names = cache.get(_thumbnails_key(name))
+    if names is None:
+        thumbnail_worker.put(name)
+        return dummy_thumbnail_url(size_name)
+    if size_name not in names:
+        return dummy_thumbnail_url(size_name)
+    return default_storage.url(names[size_name])
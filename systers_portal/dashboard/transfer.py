@@ -0,0 +1,369 @@
+import json
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+from dashboard.feed_cache import invalidate_feeds
+from dashboard.models import (SysterUser, Community, News, Resource, Tag,
+                              ResourceType, update_community_counters)
+from dashboard.permissions import invalidate_community, invalidate_model
+from dashboard.tags import invalidate_tag_counts
+
+
+USER_FIELDS = ("username", "email", "first_name", "last_name")
+
+COMMUNITY_FIELDS = ("name", "slug", "email", "mailing_list", "resource_area",
+                    "website", "facebook", "googleplus", "twitter")
+
+CONTENT_FIELDS = ("title", "slug", "is_public", "date_created",
+                  "date_modified", "content")
+
+CONTENT_MODELS = {"news": News, "resource": Resource}
+
+
+class TransferError(Exception):
+
+    """Raised when a community can't be imported"""
+
+
+def _chunks(queryset, batch_size):
+    """Yield lists of the values dictionaries of a queryset in pk order, one
+    query per batch, so the memory use doesn't grow with the table.
+    """
+    last_pk = None
+    while True:
+        chunk = queryset.order_by("pk")
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:batch_size])
+        if not chunk:
+            return
+        last_pk = chunk[-1]["pk"]
+        yield chunk
+
+
+def _write(stream, record_type, record):
+    record["type"] = record_type
+    stream.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def export_community(community, stream, batch_size=1000, progress=None):
+    """Write the users, the community, its members, News and Resources to a
+    stream as newline-delimited JSON, one object per line.
+
+    Users and Tags are referenced by username and name, so the data can be
+    imported into another database with import_community.
+
+    :param community: Community object
+    :param stream: file-like object open for writing
+    :param batch_size: number of rows fetched per query
+    :param progress: optional function called with the string record type and
+                     the number of records written after every batch
+    :returns: dictionary mapping record types to the number of written
+              records
+    """
+    counts = dict.fromkeys(("user", "community", "member", "news",
+                            "resource"), 0)
+
+    def written(record_type, count):
+        counts[record_type] += count
+        if progress is not None:
+            progress(record_type, count)
+
+    # one subquery per relation, instead of joining them all and removing the
+    # duplicate rows of that product with DISTINCT
+    users = User.objects.filter(
+        Q(pk__in=Community.members.through.objects.filter(
+            community=community).values("systeruser__user")) |
+        Q(pk__in=SysterUser.objects.filter(pk=community.community_admin_id)
+          .values("user")) |
+        Q(pk__in=News.objects.filter(community=community).values(
+            "author__user")) |
+        Q(pk__in=Resource.objects.filter(community=community).values(
+            "author__user"))).values("pk", *USER_FIELDS)
+    for chunk in _chunks(users, batch_size):
+        for user in chunk:
+            del user["pk"]
+            _write(stream, "user", user)
+        written("user", len(chunk))
+
+    record = dict((field, getattr(community, field))
+                  for field in COMMUNITY_FIELDS)
+    record["community_admin"] = community.community_admin.user.username
+    record["parent_community"] = (community.parent_community.slug
+                                  if community.parent_community_id else None)
+    _write(stream, "community", record)
+    written("community", 1)
+
+    members = Community.members.through.objects.filter(
+        community=community).values("pk", "systeruser__user__username")
+    for chunk in _chunks(members, batch_size):
+        for member in chunk:
+            _write(stream, "member",
+                   {"username": member["systeruser__user__username"]})
+        written("member", len(chunk))
+
+    for record_type, model in sorted(CONTENT_MODELS.items()):
+        fields = ["pk", "author__user__username"] + list(CONTENT_FIELDS)
+        if model == Resource:
+            fields.append("resource_type__name")
+        objs = model.objects.filter(community=community).values(*fields)
+        through = model.tags.through
+        object_field = "{0}_id".format(model._meta.model_name)
+        for chunk in _chunks(objs, batch_size):
+            tags = {}
+            for object_id, name in through.objects.filter(**{
+                    "{0}__in".format(object_field): [obj["pk"]
+                                                     for obj in chunk]
+            }).values_list(object_field, "tag__name"):
+                tags.setdefault(object_id, []).append(name)
+            for obj in chunk:
+                record = dict((field, obj[field]) for field in CONTENT_FIELDS)
+                for field in ("date_created", "date_modified"):
+                    record[field] = record[field].isoformat()
+                record["author"] = obj["author__user__username"]
+                record["tags"] = sorted(tags.get(obj["pk"], []))
+                if model == Resource:
+                    record["resource_type"] = obj["resource_type__name"]
+                _write(stream, record_type, record)
+            written(record_type, len(chunk))
+    return counts
+
+
+class Progress(object):
+
+    """Report the number of records per type and the throughput after every
+    batch of an export or an import.
+    """
+    def __init__(self, output, verb="Exported"):
+        self.output = output
+        self.verb = verb
+        self.start = time.time()
+        self.counts = {}
+
+    def __call__(self, record_type, count):
+        self.counts[record_type] = self.counts.get(record_type, 0) + count
+        total = sum(self.counts.values())
+        elapsed = time.time() - self.start
+        self.output.write("{0} {1} {2} records, {3:.0f} records/s".format(
+            self.verb, self.counts[record_type], record_type,
+            total / elapsed if elapsed else 0))
+
+    def done(self):
+        self.output.write("{0} {1} records in {2:.1f} s".format(
+            self.verb, sum(self.counts.values()), time.time() - self.start))
+
+
+@contextmanager
+def _preserve_dates(model):
+    """Don't let the auto_now and auto_now_add fields of a model overwrite the
+    dates of the imported objects.
+    """
+    fields = [(field, field.auto_now, field.auto_now_add)
+              for field in model._meta.fields
+              if getattr(field, "auto_now", False) or
+              getattr(field, "auto_now_add", False)]
+    for field, auto_now, auto_now_add in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _get_or_create_names(model, names):
+    """Return a dictionary mapping names to the ids of Tags or
+    ResourceTypes, creating the missing ones, with at most three queries.
+    """
+    names = set(names)
+    ids = dict(model.objects.filter(name__in=names).values_list("name", "id"))
+    missing = names.difference(ids)
+    if missing:
+        model.objects.bulk_create([model(name=name) for name in missing])
+        ids.update(model.objects.filter(name__in=missing).values_list(
+            "name", "id"))
+    return ids
+
+
+def _get_syster_user_ids(usernames):
+    """Return a dictionary mapping usernames to SysterUser ids"""
+    return dict(SysterUser.objects.filter(
+        user__username__in=set(usernames)).values_list(
+        "user__username", "id"))
+
+
+class CommunityImporter(object):
+
+    """Import the records written by export_community in batches.
+
+    Records of the same type are buffered and every batch is inserted with
+    bulk_create in its own transaction. Records that already exist, matched by
+    username, slug or membership, are skipped, so an interrupted import can be
+    run again.
+    """
+    def __init__(self, batch_size=1000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.community = None
+        self.buffer_type = None
+        self.buffer = []
+        self.counts = {}
+        self.password = make_password(None)
+
+    def run(self, stream):
+        """Import the records read line by line from a stream
+
+        :param stream: iterable of string lines
+        :returns: dictionary mapping record types to the number of imported
+                  records
+        :raises TransferError: if the records are not valid
+        """
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                record_type = record.pop("type")
+            except (ValueError, KeyError):
+                raise TransferError("Line {0} is not a record".format(number))
+            if record_type not in ("user", "community", "member", "news",
+                                   "resource"):
+                raise TransferError("Line {0} has an unknown type '{1}'"
+                                    .format(number, record_type))
+            if record_type != self.buffer_type:
+                self.flush()
+                self.buffer_type = record_type
+            self.buffer.append(record)
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+        self.flush()
+        if self.community is not None:
+            update_community_counters([self.community.pk])
+            invalidate_community(self.community.pk)
+            invalidate_tag_counts(self.community.pk)
+            invalidate_feeds(self.community.pk)
+        for model in (SysterUser, Community, News, Resource):
+            invalidate_model(model)
+        return self.counts
+
+    def flush(self):
+        if not self.buffer:
+            return
+        records, self.buffer = self.buffer, []
+        if self.buffer_type != "user" and self.buffer_type != "community":
+            if self.community is None:
+                raise TransferError("The community record has to come before "
+                                    "its {0} records".format(self.buffer_type))
+        with transaction.atomic():
+            count = getattr(self, "import_{0}".format(self.buffer_type))(
+                records)
+        self.counts[self.buffer_type] = (
+            self.counts.get(self.buffer_type, 0) + count)
+        if self.progress is not None:
+            self.progress(self.buffer_type, len(records))
+
+    def import_user(self, records):
+        usernames = [record["username"] for record in records]
+        existing = set(User.objects.filter(
+            username__in=usernames).values_list("username", flat=True))
+        new = [record for record in records
+               if record["username"] not in existing]
+        User.objects.bulk_create([
+            User(password=self.password, **dict(
+                (field, record.get(field) or "") for field in USER_FIELDS))
+            for record in new])
+        SysterUser.objects.provision(User.objects.filter(
+            username__in=usernames).values_list("pk", flat=True))
+        return len(new)
+
+    def import_community(self, records):
+        if self.community is not None or len(records) > 1:
+            raise TransferError("Only one community can be imported at once")
+        record = records[0]
+        if Community.objects.filter(slug=record["slug"]).exists():
+            self.community = Community.objects.get(slug=record["slug"])
+            return 0
+        admin_ids = _get_syster_user_ids([record["community_admin"]])
+        if not admin_ids:
+            raise TransferError("The community admin {0} doesn't exist".format(
+                record["community_admin"]))
+        parent = None
+        if record.get("parent_community"):
+            parent = Community.objects.filter(
+                slug=record["parent_community"]).first()
+        self.community = Community.objects.create(
+            community_admin_id=admin_ids[record["community_admin"]],
+            parent_community=parent,
+            **dict((field, record.get(field) or "")
+                   for field in COMMUNITY_FIELDS))
+        return 1
+
+    def import_member(self, records):
+        systeruser_ids = _get_syster_user_ids(
+            record["username"] for record in records)
+        through = Community.members.through
+        existing = set(through.objects.filter(
+            community=self.community,
+            systeruser__in=systeruser_ids.values()).values_list(
+            "systeruser_id", flat=True))
+        new_ids = set(systeruser_ids.values()).difference(existing)
+        through.objects.bulk_create([
+            through(community_id=self.community.pk,
+                    systeruser_id=systeruser_id)
+            for systeruser_id in new_ids])
+        return len(new_ids)
+
+    def _import_content(self, model, records):
+        slugs = [record["slug"] for record in records]
+        existing = set(model.objects.filter(slug__in=slugs).values_list(
+            "slug", flat=True))
+        records = [record for record in records
+                   if record["slug"] not in existing]
+        if not records:
+            return 0
+        author_ids = _get_syster_user_ids(
+            record["author"] for record in records)
+        tag_ids = _get_or_create_names(
+            Tag, [name for record in records for name in record["tags"]])
+        if model == Resource:
+            type_ids = _get_or_create_names(
+                ResourceType, [record["resource_type"] for record in records
+                               if record.get("resource_type")])
+        objs = []
+        for record in records:
+            if record["author"] not in author_ids:
+                raise TransferError("The author {0} of {1} doesn't exist"
+                                    .format(record["author"], record["slug"]))
+            obj = model(community_id=self.community.pk,
+                        author_id=author_ids[record["author"]],
+                        **dict((field, record[field])
+                               for field in CONTENT_FIELDS))
+            for field in ("date_created", "date_modified"):
+                setattr(obj, field, parse_date(record[field]))
+            if model == Resource and record.get("resource_type"):
+                obj.resource_type_id = type_ids[record["resource_type"]]
+            objs.append(obj)
+        with _preserve_dates(model):
+            model.objects.bulk_create(objs)
+        object_ids = dict(model.objects.filter(
+            slug__in=[record["slug"] for record in records]).values_list(
+            "slug", "id"))
+        through = model.tags.through
+        object_field = "{0}_id".format(model._meta.model_name)
+        through.objects.bulk_create([
+            through(tag_id=tag_ids[name],
+                    **{object_field: object_ids[record["slug"]]})
+            for record in records for name in record["tags"]])
+        return len(objs)
+
+    def import_news(self, records):
+        return self._import_content(News, records)
+
+    def import_resource(self, records):
+        return self._import_content(Resource, records)
@@ -0,0 +1,22 @@
+from django.conf.urls import patterns, url
+
+from dashboard import feeds, views
+
+
+urlpatterns = patterns(
+    '',
+    url(r'^communities/(?P<community_slug>[-\w]+)/news/$', views.news_list,
+        name='api_news_list'),
+    url(r'^communities/(?P<community_slug>[-\w]+)/resources/$',
+        views.resource_list, name='api_resource_list'),
+    url(r'^communities/(?P<community_slug>[-\w]+)/tags/$', views.tag_counts,
+        name='api_tag_counts'),
+    url(r'^communities/(?P<community_slug>[-\w]+)/feed/rss/$',
+        feeds.community_rss, name='community_rss'),
+    url(r'^communities/(?P<community_slug>[-\w]+)/feed/atom/$',
+        feeds.community_atom, name='community_atom'),
+    url(r'^communities/(?P<community_slug>[-\w]+)/tags/(?P<tag>[^/]+)/feed/'
+        r'rss/$', feeds.community_rss, name='community_tag_rss'),
+    url(r'^communities/(?P<community_slug>[-\w]+)/tags/(?P<tag>[^/]+)/feed/'
+        r'atom/$', feeds.community_atom, name='community_tag_atom'),
+)
@@ -0,0 +1,104 @@
+import json
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.views.decorators.http import require_GET
+
+from dashboard.decorators import is_community_member
+from dashboard.models import Community, News, Resource
+from dashboard.paginator import KeysetPaginator
+from dashboard.permissions import get_object_community_id
+from dashboard.tags import MATCH_ALL, filter_by_tags, get_tag_counts
+
+
+API_PAGE_SIZE = getattr(settings, "DASHBOARD_API_PAGE_SIZE", 20)
+API_MAX_PAGE_SIZE = getattr(settings, "DASHBOARD_API_MAX_PAGE_SIZE", 100)
+
+
+def _json_response(data):
+    return HttpResponse(json.dumps(data), content_type="application/json")
+
+
+def _summary(obj):
+    summary = {
+        "title": obj.title,
+        "slug": obj.slug,
+        "author": obj.author.user.username,
+        "date_created": obj.date_created.isoformat(),
+        "date_modified": obj.date_modified.isoformat(),
+        "is_public": obj.is_public,
+        "tags": sorted(tag.name for tag in obj.tags.all()),
+    }
+    if isinstance(obj, Resource):
+        summary["resource_type"] = (obj.resource_type.name
+                                    if obj.resource_type_id else None)
+    return summary
+
+
+def _show_all(request, community_id):
+    return (request.user.is_authenticated() and
+            is_community_member(request, community_id))
+
+
+def _list_view(model):
+    """Build a view listing the News or Resources of a community as JSON.
+
+    Members of the community see all objects, everyone else only the public
+    ones. The objects are paged newest first by (date_created, id) cursors
+    and only the summary fields are fetched, content is deferred. The tag
+    GET parameter filters by a tag name and can be repeated, the objects
+    have all the tags unless tag_match is "any". Resources can be filtered by
+    resource_type name too.
+    """
+    @require_GET
+    def view(request, community_slug):
+        community_id = get_object_community_id(Community, "slug",
+                                               community_slug)
+        try:
+            per_page = min(int(request.GET.get("limit", API_PAGE_SIZE)),
+                           API_MAX_PAGE_SIZE)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid limit")
+        if per_page < 1:
+            return HttpResponseBadRequest("Invalid limit")
+        queryset = model.objects.filter(community=community_id)
+        if not _show_all(request, community_id):
+            queryset = queryset.filter(is_public=True)
+        try:
+            queryset = filter_by_tags(queryset, request.GET.getlist("tag"),
+                                      request.GET.get("tag_match", MATCH_ALL))
+        except ValueError:
+            return HttpResponseBadRequest("Invalid tag_match")
+        select_related = ["author__user"]
+        if model == Resource:
+            select_related.append("resource_type")
+            if "resource_type" in request.GET:
+                queryset = queryset.filter(
+                    resource_type__name=request.GET["resource_type"])
+        queryset = queryset.defer("content").select_related(
+            *select_related).prefetch_related("tags")
+        try:
+            objects, next_cursor = KeysetPaginator(queryset, per_page).page(
+                request.GET.get("cursor"))
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor")
+        return _json_response({"results": [_summary(obj) for obj in objects],
+                               "next": next_cursor})
+    return view
+
+
+news_list = _list_view(News)
+resource_list = _list_view(Resource)
+
+
+@require_GET
+def tag_counts(request, community_slug):
+    """List the tags of the News and Resources of a community with the number
+    of objects per tag as JSON, the most used tags first. Members of the
+    community get the counts of all objects, everyone else of the public ones.
+    """
+    community_id = get_object_community_id(Community, "slug", community_slug)
+    counts = get_tag_counts(community_id,
+                            public_only=not _show_all(request, community_id))
+    return _json_response({"results": [{"name": name, "count": count}
+                                       for name, count in counts]})
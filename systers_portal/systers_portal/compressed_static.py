@@ -0,0 +1,197 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+from django.conf import settings
+from django.utils.http import parse_http_date_safe
+
+
+# CachedStaticFilesStorage inserts the first 12 characters of the md5 hash of
+# the content in the names of the hashed copies, e.g. style.1a2b3c4d5e6f.css
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+ENCODINGS = (
+    ('br', '.br'),
+    ('gzip', '.gz'),
+)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class StaticFile(object):
+
+    """Metadata of a static file and its precompressed variants. Every
+    variant has its own ETag, so caches don't mix up the encodings.
+    """
+
+    def __init__(self, path, url, encodings=ENCODINGS):
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.etag = '"{0:x}-{1:x}"'.format(self.mtime, self.size)
+        content_type, encoding = mimetypes.guess_type(path)
+        self.content_type = content_type or 'application/octet-stream'
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        if HASHED_NAME_RE.search(url):
+            self.cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            max_age = getattr(settings, 'STATIC_MAX_AGE', 60)
+            self.cache_control = 'public, max-age={0}'.format(max_age)
+        self.variants = []
+        for encoding, extension in encodings:
+            variant_path = path + extension
+            if os.path.isfile(variant_path):
+                etag = '"{0:x}-{1:x}-{2}"'.format(
+                    self.mtime, self.size, encoding)
+                self.variants.append((encoding, variant_path,
+                                      os.path.getsize(variant_path), etag))
+
+    def select(self, accept_encoding):
+        """Return the encoding, the path, the size and the ETag of the
+        smallest variant the client accepts.
+
+        :param accept_encoding: string value of the Accept-Encoding header
+        :returns: tuple of string encoding or None, string path, int size and
+                  string ETag
+        """
+        accepted = [token.split(';')[0].strip()
+                    for token in accept_encoding.split(',')]
+        for encoding, path, size, etag in self.variants:
+            if encoding in accepted:
+                return encoding, path, size, etag
+        return None, self.path, self.size, self.etag
+
+
+class CompressedStatic(object):
+
+    """WSGI application serving the collected static files in front of the
+    Django application.
+
+    The files under STATIC_ROOT are indexed once, when the application is
+    created, so serving them doesn't touch the filesystem except for reading
+    the content. Precompressed variants written by collectstatic are served
+    to clients that accept them, hashed file names get far-future immutable
+    cache headers and conditional requests are answered with 304.
+    """
+
+    def __init__(self, application, root=None, url=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.url = url or settings.STATIC_URL
+        self.files = self.index_files()
+
+    def index_files(self):
+        """Index the files under the static root by their URL path
+
+        :returns: dictionary mapping string URL paths to StaticFile objects
+        """
+        files = {}
+        if not self.root or not os.path.isdir(self.root):
+            return files
+        variant_extensions = tuple(extension for encoding, extension
+                                   in ENCODINGS)
+        for directory, dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(variant_extensions):
+                    continue
+                path = os.path.join(directory, filename)
+                relative_path = os.path.relpath(path, self.root)
+                url = self.url + relative_path.replace(os.sep, '/')
+                files[url] = StaticFile(path, url)
+        return files
+
+    def find_file(self, path):
+        """Return the StaticFile of a URL path or None if there is none"""
+        return self.files.get(path)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith(self.url):
+            return self.application(environ, start_response)
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed',
+                           [('Allow', 'GET, HEAD'),
+                            ('Content-Length', '0')])
+            return []
+        static_file = self.find_file(path)
+        if static_file is None:
+            start_response('404 Not Found', [('Content-Type', 'text/plain'),
+                                             ('Content-Length', '9')])
+            return [b'Not Found']
+        return self.serve(static_file, environ, start_response)
+
+    def serve(self, static_file, environ, start_response):
+        encoding, path, size, etag = static_file.select(
+            environ.get('HTTP_ACCEPT_ENCODING', ''))
+        headers = [
+            ('Cache-Control', static_file.cache_control),
+            ('ETag', etag),
+            ('Last-Modified', static_file.last_modified),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            not_modified = (if_none_match.strip() == '*' or
+                            etag in [value.strip() for value in
+                                     if_none_match.split(',')])
+        else:
+            if_modified_since = parse_http_date_safe(
+                environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+            not_modified = (if_modified_since is not None and
+                            static_file.mtime <= if_modified_since)
+        if not_modified:
+            start_response('304 Not Modified', headers)
+            return []
+        headers.append(('Content-Type', static_file.content_type))
+        headers.append(('Content-Length', str(size)))
+        if encoding is not None:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        content = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(content, 8192)
+        return read_chunks(content)
+
+
+class MediaFiles(CompressedStatic):
+
+    """WSGI application serving the uploaded files under MEDIA_ROOT in front
+    of the Django application.
+
+    Files are uploaded while the site runs, so they are looked up on every
+    request instead of being indexed once, and they have no precompressed
+    variants.
+    """
+
+    def __init__(self, application, root=None, url=None):
+        super(MediaFiles, self).__init__(application,
+                                         root or settings.MEDIA_ROOT,
+                                         url or settings.MEDIA_URL)
+
+    def index_files(self):
+        return {}
+
+    def find_file(self, path):
+        root = os.path.abspath(self.root)
+        file_path = os.path.abspath(os.path.join(
+            root, *path[len(self.url):].split('/')))
+        if (not file_path.startswith(os.path.join(root, '')) or
+                not os.path.isfile(file_path)):
+            return None
+        return StaticFile(file_path, path, encodings=())
+
+
+def read_chunks(content, chunk_size=8192):
+    """Yield the content of a file in chunks and close it afterwards"""
+    try:
+        for chunk in iter(lambda: content.read(chunk_size), b''):
+            yield chunk
+    finally:
+        content.close()
@@ -0,0 +1,56 @@
+"""PostgreSQL backend that takes its connections from an in-process pool
+instead of opening a new connection for every request.
+
+Configure it with a POOL dictionary in the database settings, e.g.::
+
+    DATABASES['default']['ENGINE'] = 'systers_portal.db_pool'
+    DATABASES['default']['POOL'] = {
+        'MAX_SIZE': 10,
+        'TIMEOUT': 30,
+        'HEALTH_CHECK_INTERVAL': 30,
+    }
+
+The pool is per process. It only helps when the threads of a process serve
+requests concurrently, e.g. with threaded gunicorn workers. A sync worker
+serves one request at a time, so CONN_MAX_AGE keeps its single connection open
+just as well, which is why production.py enables the pool only on request.
+"""
+from __future__ import absolute_import
+
+import threading
+
+from django.db.backends.postgresql_psycopg2 import base
+
+from .pool import ConnectionPool
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    """Return the connection pool of a database alias, creating it on first
+    use from the POOL dictionary of the database settings.
+    """
+    with pools_lock:
+        if alias not in pools:
+            options = settings_dict.get('POOL', {})
+            pools[alias] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 30),
+                health_check_interval=options.get('HEALTH_CHECK_INTERVAL', 30))
+        return pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        connect = super(DatabaseWrapper, self).get_new_connection
+        return get_pool(self.alias, self.settings_dict).checkout(
+            lambda: connect(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                get_pool(self.alias, self.settings_dict).checkin(
+                    self.connection)
@@ -0,0 +1,109 @@
+import threading
+import time
+
+
+class PoolExhausted(Exception):
+
+    """Raised when no connection became available within the pool timeout"""
+
+
+class ConnectionPool(object):
+
+    """Thread-safe pool of DB-API connections.
+
+    At most max_size connections are open at the same time, counting both the
+    idle connections and the ones handed out. Idle connections that weren't
+    used for health_check_interval seconds are checked with a query before
+    they are handed out again, and the broken ones are replaced.
+
+    >>> pool = ConnectionPool(max_size=2)
+    >>> pool.size
+    0
+    """
+
+    def __init__(self, max_size=10, timeout=30, health_check_interval=30):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.size = 0
+        self.idle = []
+        self.condition = threading.Condition()
+
+    def checkout(self, connect):
+        """Return an idle connection or a new one opened with connect.
+
+        :param connect: function returning a new connection
+        :returns: DB-API connection
+        :raises PoolExhausted: if max_size connections stay in use for longer
+                               than the pool timeout
+        """
+        deadline = time.time() + self.timeout
+        with self.condition:
+            while True:
+                while self.idle:
+                    connection, returned_at = self.idle.pop()
+                    if (time.time() - returned_at <
+                            self.health_check_interval or
+                            self.is_usable(connection)):
+                        return connection
+                    self.discard(connection)
+                if self.size < self.max_size:
+                    self.size += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise PoolExhausted(
+                        "All {0} connections are in use".format(self.size))
+                self.condition.wait(remaining)
+        try:
+            return connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+
+    def checkin(self, connection):
+        """Return a connection to the pool. Connections that are closed or
+        can't be rolled back to a clean state are closed and dropped.
+
+        :param connection: DB-API connection obtained from checkout
+        """
+        usable = not getattr(connection, "closed", False)
+        if usable:
+            try:
+                connection.rollback()
+            except Exception:
+                usable = False
+        with self.condition:
+            if usable:
+                self.idle.append((connection, time.time()))
+            else:
+                self.discard(connection)
+            self.condition.notify()
+
+    def discard(self, connection):
+        """Close a connection and free its place in the pool. Must be called
+        with the condition held.
+        """
+        self.size -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def is_usable(self, connection):
+        try:
+            connection.cursor().execute("SELECT 1")
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def close_all(self):
+        """Close all the idle connections"""
+        with self.condition:
+            while self.idle:
+                connection, returned_at = self.idle.pop()
+                self.discard(connection)
+            self.condition.notify_all()
@@ -8,8 +8,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/1.6/ref/settings/
 '''
 
-# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
 
@@ -51,19 +55,23 @@ INSTALLED_APPS = (
     'dashboard',
 )
 
+# The cms middleware is wrapped by the dashboard middleware classes of the same
+# name, which skip it for the DASHBOARD_NON_CMS_PATH_PREFIXES. Measure the
+# overhead of each class with the measure_middleware command.
 MIDDLEWARE_CLASSES = (
+    'dashboard.middleware.RequestInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'django.middleware.locale.LocaleMiddleware',
-    'django.middleware.doc.XViewMiddleware',
-    'cms.middleware.user.CurrentUserMiddleware',
-    'cms.middleware.page.CurrentPageMiddleware',
-    'cms.middleware.toolbar.ToolbarMiddleware',
-    'cms.middleware.language.LanguageCookieMiddleware',
+    'dashboard.middleware.CurrentUserMiddleware',
+    'dashboard.middleware.CurrentPageMiddleware',
+    'dashboard.middleware.ToolbarMiddleware',
+    'dashboard.middleware.LanguageCookieMiddleware',
+    'dashboard.middleware.CMSPageCacheMiddleware',
 )
 
 TEMPLATE_CONTEXT_PROCESSORS = (
@@ -91,10 +99,19 @@ WSGI_APPLICATION = 'systers_portal.wsgi.application'
 TEMPLATE_DIRS = (
     os.path.join(BASE_DIR, 'templates'),
 )
+
+# Settings modules with DEBUG off wrap these in the cached template loader
+TEMPLATE_LOADERS = (
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+)
 CMS_TEMPLATES = (
     ('page_template.html', 'Page Template'),
 )
 
+CMS_PLACEHOLDER_CACHE = True
+CMS_PLUGIN_CACHE = True
+
 LANGUAGES = [
     ('en-us', 'English'),
 ]
@@ -115,14 +132,166 @@ USE_TZ = True
 
 SITE_ID = 1
 
+# Cache
+# https://docs.djangoproject.com/en/1.6/topics/cache/
+# The backend is selected with the $CACHE_BACKEND environment variable, one of
+# the keys of CACHE_BACKENDS, and its default location can be overridden with
+# $CACHE_LOCATION
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache',
+               'systers_portal'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache',
+             os.path.join(tempfile.gettempdir(), 'systers_portal_cache')),
+    'memcached': ('django.core.cache.backends.memcached.MemcachedCache',
+                  '127.0.0.1:11211'),
+    'dummy': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        "CACHE_BACKEND must be one of {0}, not '{1}'".format(
+            ", ".join(sorted(CACHE_BACKENDS)), CACHE_BACKEND))
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('CACHE_LOCATION',
+                                   CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': 'systers_portal',
+    }
+}
+
+# Whether the default cache is shared by all the processes serving the site.
+# The permission, tag count, page and feed caches of the dashboard are
+# invalidated by replacing versions in the cache, which the other processes
+# don't see with a per-process cache like locmem, so they are bypassed unless
+# the cache is shared. Set with the $DASHBOARD_SHARED_CACHE environment
+# variable, 1 or 0, the memcached and file caches are shared by default. Set
+# it to 0 with the file cache when the site runs on several hosts, and to 1
+# with locmem for single-process servers like runserver.
+SHARED_CACHE_BACKENDS = ('memcached', 'file')
+DASHBOARD_SHARED_CACHE = bool(int(os.environ.get(
+    'DASHBOARD_SHARED_CACHE', CACHE_BACKEND in SHARED_CACHE_BACKENDS)))
+
+# With a shared cache, anonymous requests for CMS pages are answered from the
+# cache by CMSPageCacheMiddleware, which keys the responses by page, language
+# and publish version instead of flushing all of them on every publish like
+# the django-cms page cache, and the placeholders django-cms caches are kept
+# longer, since a publish clears them for all the processes. Otherwise the
+# django-cms page cache and its short placeholder timeout are kept, so a
+# publish shows up in the other processes within a minute.
+if DASHBOARD_SHARED_CACHE:
+    CMS_PAGE_CACHE = False
+    CMS_CONTENT_CACHE_DURATION = 600
+
+# Logging
+# https://docs.djangoproject.com/en/1.6/topics/logging/
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'dashboard': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Sessions
+# https://docs.djangoproject.com/en/1.6/topics/http/sessions/
+# The engine is selected with the $SESSION_BACKEND environment variable, one of
+# the keys of SESSION_ENGINES. cached_db reads the sessions from the default
+# cache and writes them through to the database. Deleting a session only
+# clears it from the cache of the current process though, so with a
+# per-process cache like locmem other processes would keep serving flushed
+# sessions, e.g. after a logout, and cached_db needs a shared cache.
+# signed_cookies doesn't touch the database or the cache at all, but sessions
+# can't be revoked on the server before they expire.
+# Expired database sessions are removed with the delete_expired_sessions
+# command, which should be scheduled to run e.g. daily.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db')
+if SESSION_BACKEND not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        "SESSION_BACKEND must be one of {0}, not '{1}'".format(
+            ", ".join(sorted(SESSION_ENGINES)), SESSION_BACKEND))
+
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
+SESSION_CACHE_ALIAS = 'default'
+
+SESSION_COOKIE_AGE = int(os.environ.get('SESSION_COOKIE_AGE', 1209600))
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/1.6/howto/static-files/
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
 STATIC_URL = "/static/"
 
+# Uploaded files, e.g. profile pictures and their thumbnails. Set
+# $MEDIA_ROOT to a directory that outlives the deployments of the code.
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, "media"))
+
+MEDIA_URL = "/media/"
+
 TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
 
 # Django-allauth settings
 # https://django-allauth.readthedocs.org/en/latest/#configuration
 ACCOUNT_EMAIL_REQUIRED = True
+
+# Dashboard settings
+# Seconds to keep the resolved community roles and object lookups used by the
+# dashboard decorators in the cache
+DASHBOARD_PERMISSION_CACHE_TIMEOUT = 300
+
+# PostgreSQL text search configuration used to index and search the content of
+# News and Resources
+DASHBOARD_SEARCH_CONFIG = 'english'
+
+# Seconds the responses of CMS pages are cached for anonymous visitors
+DASHBOARD_PAGE_CACHE_TIMEOUT = 600
+
+# Seconds the per-community tag counts are cached, they are invalidated when
+# the tags of News and Resources change
+DASHBOARD_TAG_CACHE_TIMEOUT = 3600
+
+# Seconds the bodies of the community feeds are cached and the number of items
+# per feed, the feeds are invalidated when their News and Resources change
+DASHBOARD_FEED_CACHE_TIMEOUT = 3600
+DASHBOARD_FEED_ITEMS = 20
+
+# Maximum number of emails sent per second by the send_queued_email command
+# and the number of failed attempts after which an email is given up
+DASHBOARD_EMAIL_RATE = 5
+DASHBOARD_EMAIL_MAX_ATTEMPTS = 5
+
+# Names and edge lengths in pixels of the square profile picture thumbnails,
+# dashboard/static/dashboard/img has a pre-sized dummy picture for each name
+DASHBOARD_THUMBNAIL_SIZES = (('small', 48), ('medium', 96), ('large', 200))
+
+# Paths that are never served by django-cms and skip the cms middleware
+DASHBOARD_NON_CMS_PATH_PREFIXES = ('/accounts/', '/api/', STATIC_URL,
+                                   MEDIA_URL)
+
+# Requests taking longer than this many milliseconds are logged with their
+# slowest queries by RequestInstrumentationMiddleware
+DASHBOARD_SLOW_REQUEST_THRESHOLD = int(
+    os.environ.get('DASHBOARD_SLOW_REQUEST_THRESHOLD', 1000))
+
+# Default and maximum number of objects per page of the JSON listings
+DASHBOARD_API_PAGE_SIZE = 20
+DASHBOARD_API_MAX_PAGE_SIZE = 100
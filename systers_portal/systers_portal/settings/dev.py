@@ -1,3 +1,8 @@
+import os
+
+# runserver is a single process, so even the locmem cache is shared
+os.environ.setdefault('DASHBOARD_SHARED_CACHE', '1')
+
 from base import *
 
 DEBUG = True
@@ -11,6 +16,7 @@ DATABASES = {
         'PASSWORD': '',
         'HOST': 'localhost',
         'PORT': '5432',
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 60)),
     }
 }
 INTERNAL_IPS = ('127.0.0.1',)
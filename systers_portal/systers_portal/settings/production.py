@@ -1,15 +1,55 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
 from base import *
 
 DEBUG = False
 TEMPLATE_DEBUG = DEBUG
 
+# Compile each template once per process instead of on every render
+TEMPLATE_LOADERS = (
+    ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+)
+
 DATABASES = {}
 
 INTERNAL_IPS = ('127.0.0.1',)
 
 # Parse database configuration from $DATABASE_URL
 import dj_database_url
-DATABASES['default'] =  dj_database_url.config()
+DATABASES['default'] = dj_database_url.config()
+
+# Keep connections open between requests for $CONN_MAX_AGE seconds, or take
+# them from an in-process pool of at most $DATABASE_POOL_MAX_SIZE connections
+# that are returned at the end of every request. The pool only pays off with
+# threaded gunicorn workers, the sync workers of the Procfile serve one request
+# at a time per process and reuse their connection with CONN_MAX_AGE alone.
+DATABASES['default']['CONN_MAX_AGE'] = int(
+    os.environ.get('CONN_MAX_AGE', 600))
+if os.environ.get('DATABASE_POOL_MAX_SIZE'):
+    DATABASES['default']['ENGINE'] = 'systers_portal.db_pool'
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['POOL'] = {
+        'MAX_SIZE': int(os.environ['DATABASE_POOL_MAX_SIZE']),
+        'TIMEOUT': int(os.environ.get('DATABASE_POOL_TIMEOUT', 30)),
+        'HEALTH_CHECK_INTERVAL': int(
+            os.environ.get('DATABASE_POOL_HEALTH_CHECK_INTERVAL', 30)),
+    }
+
+# The dashboard caches permissions, tag counts, pages and feeds across
+# requests only with a cache shared by all gunicorn workers and dynos, set
+# $CACHE_BACKEND to memcached and $CACHE_LOCATION to the memcached servers
+# to enable them, or to file when the site runs on a single host. The
+# sessions are then read from the cache too, unless $SESSION_BACKEND selects
+# another engine.
+if DASHBOARD_SHARED_CACHE and 'SESSION_BACKEND' not in os.environ:
+    SESSION_BACKEND = 'cached_db'
+    SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+if SESSION_BACKEND == 'cached_db' and not DASHBOARD_SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "SESSION_BACKEND cached_db needs a cache shared by all the processes, "
+        "set CACHE_BACKEND to memcached or file")
 
 # Honor the 'X-Forwarded-Proto' header for request.is_secure()
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
@@ -18,15 +58,22 @@ SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 ALLOWED_HOSTS = ['*']
 
 # Static asset configuration
-import os
 # BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATIC_URL = '/static/'
+# Save hashed and precompressed copies of the static files on collectstatic,
+# which systers_portal.compressed_static.CompressedStatic serves with long
+# cache headers
+STATICFILES_STORAGE = (
+    'systers_portal.storage.CompressedCachedStaticFilesStorage')
 
 # STATICFILES_DIRS = (
 #     os.path.join(BASE_DIR, 'systers_portal/static'),
 # )
 
+# Store outgoing emails in the database, the send_queued_email command sends
+# them over a single SMTP connection configured below
+EMAIL_BACKEND = 'dashboard.mail.QueuedEmailBackend'
 EMAIL_USE_TLS = True
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
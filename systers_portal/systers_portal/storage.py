@@ -0,0 +1,67 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import CachedStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.json', '.svg', '.html', '.htm', '.txt', '.xml',
+    '.eot', '.ttf', '.otf', '.ico',
+)
+
+
+def compress_file(path):
+    """Write gzip and, if the brotli package is installed, brotli variants
+    next to a file, e.g. style.css.gz and style.css.br. Variants that are not
+    smaller than the original file are not kept.
+
+    :param path: string absolute path of the file
+    :returns: list of string paths of the written variants
+    """
+    with open(path, 'rb') as original:
+        content = original.read()
+    variants = []
+    gzip_path = path + '.gz'
+    # mtime=0 keeps the output identical between collectstatic runs
+    with open(gzip_path, 'wb') as output:
+        gzip_file = gzip.GzipFile(filename='', mode='wb', fileobj=output,
+                                  mtime=0)
+        gzip_file.write(content)
+        gzip_file.close()
+    variants.append(gzip_path)
+    if brotli is not None:
+        brotli_path = path + '.br'
+        with open(brotli_path, 'wb') as output:
+            output.write(brotli.compress(content))
+        variants.append(brotli_path)
+    kept = []
+    for variant in variants:
+        if os.path.getsize(variant) < len(content):
+            kept.append(variant)
+        else:
+            os.remove(variant)
+    return kept
+
+
+class CompressedCachedStaticFilesStorage(CachedStaticFilesStorage):
+
+    """Static files storage that saves hashed copies of the files for
+    cache-busting and precompressed variants of the text files, so that they
+    can be served with far-future cache headers and without compressing them
+    on every request.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_files = super(CompressedCachedStaticFilesStorage,
+                                self).post_process(paths, dry_run, **options)
+        for name, hashed_name, processed in processed_files:
+            if (not dry_run and hashed_name is not None and
+                    name.lower().endswith(COMPRESSIBLE_EXTENSIONS)):
+                for compressed_name in (name, hashed_name):
+                    compress_file(self.path(compressed_name))
+            yield name, hashed_name, processed
@@ -0,0 +1,210 @@
+from __future__ import absolute_import
+
+import gzip
+import os
+import shutil
+import tempfile
+from email.utils import formatdate
+from StringIO import StringIO
+
+import mock
+
+from django.test import SimpleTestCase
+
+from .compressed_static import (CompressedStatic, IMMUTABLE_CACHE_CONTROL,
+                                MediaFiles)
+from .db_pool.pool import ConnectionPool, PoolExhausted
+from .storage import compress_file
+
+
+class CompressedStaticTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.root, 'css'))
+        self.content = 'body { color: black; }\n' * 100
+        for name in ('css/style.css', 'css/style.0123456789ab.css'):
+            path = os.path.join(self.root, name)
+            with open(path, 'w') as static_file:
+                static_file.write(self.content)
+            compress_file(path)
+        self.application = mock.MagicMock(return_value=['django'])
+        self.static = CompressedStatic(self.application, root=self.root,
+                                       url='/static/')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def request(self, path, **environ):
+        environ.setdefault('REQUEST_METHOD', 'GET')
+        environ['PATH_INFO'] = path
+        start_response = mock.MagicMock()
+        body = ''.join(self.static(environ, start_response))
+        status, headers = start_response.call_args[0]
+        return status, dict(headers), body
+
+    def test_index(self):
+        self.assertItemsEqual(self.static.files.keys(),
+                              ['/static/css/style.css',
+                               '/static/css/style.0123456789ab.css'])
+
+    def test_serve(self):
+        status, headers, body = self.request('/static/css/style.css')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, self.content)
+        self.assertEqual(headers['Content-Type'], 'text/css; charset=utf-8')
+        self.assertEqual(headers['Content-Length'], str(len(self.content)))
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertNotEqual(headers['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        status, headers, body = self.request(
+            '/static/css/style.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+        self.assertEqual(gzip.GzipFile(fileobj=StringIO(body)).read(),
+                         self.content)
+
+    def test_conditional_requests(self):
+        status, headers, body = self.request('/static/css/style.css')
+        status, headers, body = self.request(
+            '/static/css/style.css', HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, '')
+        status, headers, body = self.request(
+            '/static/css/style.css',
+            HTTP_IF_MODIFIED_SINCE=headers['Last-Modified'])
+        self.assertEqual(status, '304 Not Modified')
+        status, headers, body = self.request('/static/css/style.css',
+                                             HTTP_IF_NONE_MATCH='"foo"')
+        self.assertEqual(status, '200 OK')
+
+    def test_conditional_requests_dates(self):
+        static_file = self.static.files['/static/css/style.css']
+        for offset, expected_status in ((3600, '304 Not Modified'),
+                                        (-3600, '200 OK')):
+            status, headers, body = self.request(
+                '/static/css/style.css',
+                HTTP_IF_MODIFIED_SINCE=formatdate(
+                    static_file.mtime + offset, usegmt=True))
+            self.assertEqual(status, expected_status)
+        status, headers, body = self.request('/static/css/style.css',
+                                             HTTP_IF_MODIFIED_SINCE='foo')
+        self.assertEqual(status, '200 OK')
+
+    def test_etag_per_encoding(self):
+        status, headers, body = self.request('/static/css/style.css')
+        identity_etag = headers['ETag']
+        status, headers, body = self.request('/static/css/style.css',
+                                             HTTP_ACCEPT_ENCODING='gzip')
+        gzip_etag = headers['ETag']
+        self.assertNotEqual(gzip_etag, identity_etag)
+        status, headers, body = self.request(
+            '/static/css/style.css', HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=identity_etag)
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        status, headers, body = self.request(
+            '/static/css/style.css', HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=gzip_etag)
+        self.assertEqual(status, '304 Not Modified')
+
+    def test_other_requests(self):
+        status, headers, body = self.request('/static/css/missing.css')
+        self.assertEqual(status, '404 Not Found')
+        status, headers, body = self.request('/static/css/style.css',
+                                             REQUEST_METHOD='POST')
+        self.assertEqual(status, '405 Method Not Allowed')
+        environ = {'PATH_INFO': '/admin/', 'REQUEST_METHOD': 'GET'}
+        start_response = mock.MagicMock()
+        self.assertEqual(self.static(environ, start_response), ['django'])
+        self.application.assert_called_with(environ, start_response)
+
+
+class MediaFilesTestCase(SimpleTestCase):
+    def setUp(self):
+        self.parent = tempfile.mkdtemp()
+        self.root = os.path.join(self.parent, 'media')
+        os.makedirs(os.path.join(self.root, 'photos'))
+        with open(os.path.join(self.parent, 'secret.txt'), 'w') as secret:
+            secret.write('secret')
+        self.application = mock.MagicMock(return_value=['django'])
+        self.media = MediaFiles(self.application, root=self.root,
+                                url='/media/')
+
+    def tearDown(self):
+        shutil.rmtree(self.parent)
+
+    def request(self, path, **environ):
+        environ.setdefault('REQUEST_METHOD', 'GET')
+        environ['PATH_INFO'] = path
+        start_response = mock.MagicMock()
+        body = ''.join(self.media(environ, start_response))
+        status, headers = start_response.call_args[0]
+        return status, dict(headers), body
+
+    def test_serve_uploaded_file(self):
+        status, headers, body = self.request('/media/photos/ada.png')
+        self.assertEqual(status, '404 Not Found')
+        path = os.path.join(self.root, 'photos', 'ada.png')
+        with open(path, 'wb') as picture:
+            picture.write('png')
+        with open(path + '.gz', 'wb') as variant:
+            variant.write('gz')
+        status, headers, body = self.request(
+            '/media/photos/ada.png', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, 'png')
+        self.assertEqual(headers['Content-Type'], 'image/png')
+        self.assertNotIn('Content-Encoding', headers)
+        status, headers, body = self.request(
+            '/media/photos/ada.png', HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        start_response = mock.MagicMock()
+        self.assertEqual(self.media({'PATH_INFO': '/about/'}, start_response),
+                         ['django'])
+
+    def test_outside_root(self):
+        for path in ('/media/../secret.txt', '/media/photos/../../secret.txt',
+                     '/media/photos', '/media/'):
+            status, headers, body = self.request(path)
+            self.assertEqual(status, '404 Not Found')
+            self.assertNotEqual(body, 'secret')
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(max_size=2, timeout=0,
+                                   health_check_interval=0)
+        self.connect = mock.MagicMock(
+            side_effect=lambda: mock.MagicMock(closed=0))
+
+    def test_reuse(self):
+        connection = self.pool.checkout(self.connect)
+        self.pool.checkin(connection)
+        self.assertIs(self.pool.checkout(self.connect), connection)
+        self.assertEqual(self.connect.call_count, 1)
+        connection.rollback.assert_called_with()
+
+    def test_max_size(self):
+        first = self.pool.checkout(self.connect)
+        self.pool.checkout(self.connect)
+        self.assertRaises(PoolExhausted, self.pool.checkout, self.connect)
+        self.pool.checkin(first)
+        self.assertIs(self.pool.checkout(self.connect), first)
+        self.assertEqual(self.pool.size, 2)
+
+    def test_health_check(self):
+        broken = self.pool.checkout(self.connect)
+        self.pool.checkin(broken)
+        broken.cursor.side_effect = Exception
+        connection = self.pool.checkout(self.connect)
+        self.assertIsNot(connection, broken)
+        broken.close.assert_called_with()
+        self.assertEqual(self.pool.size, 1)
+
+    def test_checkin_closed(self):
+        connection = self.pool.checkout(self.connect)
+        connection.closed = 1
+        self.pool.checkin(connection)
+        self.assertEqual(self.pool.size, 0)
+        self.assertEqual(self.pool.idle, [])
@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.conf.urls import patterns, include, url
+from django.conf.urls.static import static
 from django.contrib import admin
-from django.conf import settings
 
 try:
     admin.autodiscover()
@@ -11,11 +12,15 @@ urlpatterns = patterns(
     '',
     url(r'^admin/', include(admin.site.urls)),
     url(r'^accounts/', include('allauth.urls')),
-    url(r'^', include('cms.urls')),
+    url(r'^api/', include('dashboard.urls')),
 )
 
-if not settings.DEBUG:
-    urlpatterns += patterns('',
-        (r'^static/(?P<path>.*)$', 'django.views.static.serve',
-         {'document_root': settings.STATIC_ROOT}),
-    )
+# Serve the uploaded files with DEBUG on, wsgi.application serves them
+# otherwise. They have to come before the pages of the cms, which match
+# every path.
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+urlpatterns += patterns(
+    '',
+    url(r'^', include('cms.urls')),
+)
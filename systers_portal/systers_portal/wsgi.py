@@ -6,12 +6,13 @@ It exposes the WSGI callable as a module-level variable named ``application``.
 For more information on this file, see
 https://docs.djangoproject.com/en/1.6/howto/deployment/wsgi/
 """
+from __future__ import absolute_import
 
 import os
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "systers_portal.settings.dev")
 
 
 from django.core.wsgi import get_wsgi_application
-from dj_static import Cling
+from .compressed_static import CompressedStatic, MediaFiles
 
-application = Cling(get_wsgi_application())
+application = CompressedStatic(MediaFiles(get_wsgi_application()))